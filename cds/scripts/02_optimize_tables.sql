@@ -175,8 +175,124 @@ BEGIN
 END;
 /
 
--- 7. Comentários
+-- 7. Staging para carga direta (ETL --carga-direta)
+-- Sem gatilhos nem FKs: os lotes são publicados em tarifas com
+-- INSERT /*+ APPEND */ e auditados com uma linha por lote. A staging é
+-- preenchida com INSERTs convencionais (executemany, vários escritores em
+-- paralelo), em que NOLOGGING não tem efeito; por isso fica em LOGGING.
+CREATE TABLE stg_tarifas (
+    lote VARCHAR2(300) NOT NULL,
+    id_distribuidora NUMBER,
+    id_componente NUMBER,
+    id_subgrupo NUMBER,
+    id_modalidade NUMBER,
+    id_classe NUMBER,
+    data_inicio_vigencia DATE,
+    data_fim_vigencia DATE,
+    posto_tarifario VARCHAR2(20),
+    valor NUMBER(12,4),
+    base_tarifaria VARCHAR2(50),
+    hash_linha VARCHAR2(16),
+    hash_chave VARCHAR2(16),
+    hash_registro VARCHAR2(16)
+);
+
+CREATE INDEX idx_stg_tarifas_lote ON stg_tarifas(lote);
+
+-- 8. Rollups de consumo (hora, dia e mês)
+-- Mantidos incrementalmente a cada commit via MV log (fast refresh); as
+-- leituras da aplicação usam o rollup mais grosso que atende ao período
+
+-- 8.1 Log de alterações de consumption_history
+CREATE MATERIALIZED VIEW LOG ON consumption_history
+WITH ROWID, SEQUENCE (timestamp, source, equipment, consumption, cost)
+INCLUDING NEW VALUES;
+
+-- 8.2 Consumo por hora, fonte e equipamento
+CREATE MATERIALIZED VIEW mv_consumo_horario
+BUILD IMMEDIATE
+REFRESH FAST ON COMMIT
+ENABLE QUERY REWRITE
+AS
+SELECT
+    TRUNC(timestamp, 'HH24') as bucket,
+    source,
+    equipment,
+    SUM(consumption) as consumo_total,
+    COUNT(consumption) as qtd_consumo,
+    SUM(cost) as custo_total,
+    COUNT(cost) as qtd_custo,
+    COUNT(*) as total_registros
+FROM consumption_history
+GROUP BY
+    TRUNC(timestamp, 'HH24'),
+    source,
+    equipment;
+
+CREATE INDEX idx_mv_consumo_horario_bucket ON mv_consumo_horario(bucket, source);
+
+-- 8.3 Consumo por dia, fonte e equipamento
+CREATE MATERIALIZED VIEW mv_consumo_diario
+BUILD IMMEDIATE
+REFRESH FAST ON COMMIT
+ENABLE QUERY REWRITE
+AS
+SELECT
+    TRUNC(timestamp, 'DD') as bucket,
+    source,
+    equipment,
+    SUM(consumption) as consumo_total,
+    COUNT(consumption) as qtd_consumo,
+    SUM(cost) as custo_total,
+    COUNT(cost) as qtd_custo,
+    COUNT(*) as total_registros
+FROM consumption_history
+GROUP BY
+    TRUNC(timestamp, 'DD'),
+    source,
+    equipment;
+
+CREATE INDEX idx_mv_consumo_diario_bucket ON mv_consumo_diario(bucket, source);
+
+-- 8.4 Consumo por mês, fonte e equipamento
+CREATE MATERIALIZED VIEW mv_consumo_mensal
+BUILD IMMEDIATE
+REFRESH FAST ON COMMIT
+ENABLE QUERY REWRITE
+AS
+SELECT
+    TRUNC(timestamp, 'MM') as bucket,
+    source,
+    equipment,
+    SUM(consumption) as consumo_total,
+    COUNT(consumption) as qtd_consumo,
+    SUM(cost) as custo_total,
+    COUNT(cost) as qtd_custo,
+    COUNT(*) as total_registros
+FROM consumption_history
+GROUP BY
+    TRUNC(timestamp, 'MM'),
+    source,
+    equipment;
+
+CREATE INDEX idx_mv_consumo_mensal_bucket ON mv_consumo_mensal(bucket, source);
+
+-- 8.5 Consumo por fonte a partir do rollup mensal (sem varrer o histórico)
+CREATE OR REPLACE VIEW vw_consumo_por_fonte AS
+SELECT
+    source as fonte,
+    SUM(consumo_total) as consumo_total,
+    SUM(custo_total) / NULLIF(SUM(qtd_custo), 0) as custo_medio,
+    SUM(total_registros) as total_registros
+FROM mv_consumo_mensal
+GROUP BY source;
+
+-- 9. Comentários
 COMMENT ON MATERIALIZED VIEW mv_media_mensal_componente IS 'Análise mensal dos componentes tarifários';
 COMMENT ON MATERIALIZED VIEW mv_analise_subgrupo_classe IS 'Análise por subgrupo e classe de consumo';
 COMMENT ON MATERIALIZED VIEW mv_analise_regional IS 'Análise regional das tarifas';
 COMMENT ON TABLE audit_tarifas IS 'Registro de alterações na tabela de tarifas';
+COMMENT ON TABLE stg_tarifas IS 'Staging da carga direta de tarifas';
+COMMENT ON MATERIALIZED VIEW mv_consumo_horario IS 'Consumo por hora, fonte e equipamento';
+COMMENT ON MATERIALIZED VIEW mv_consumo_diario IS 'Consumo por dia, fonte e equipamento';
+COMMENT ON MATERIALIZED VIEW mv_consumo_mensal IS 'Consumo por mês, fonte e equipamento';
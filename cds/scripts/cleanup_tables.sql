@@ -15,12 +15,19 @@ DROP SEQUENCE seq_metrica;
 DROP SEQUENCE seq_renovavel;
 DROP SEQUENCE seq_optimization;
 
+-- Drop materialized views (rollups de consumo)
+DROP MATERIALIZED VIEW mv_consumo_mensal;
+DROP MATERIALIZED VIEW mv_consumo_diario;
+DROP MATERIALIZED VIEW mv_consumo_horario;
+DROP MATERIALIZED VIEW LOG ON consumption_history;
+
 -- Drop views
 DROP VIEW vw_media_tarifas_distribuidora;
 DROP VIEW vw_evolucao_tarifas;
 DROP VIEW vw_consumo_por_fonte;
 
 -- Drop tables (em ordem para respeitar constraints)
+DROP TABLE etl_controle_cargas;
 DROP TABLE optimization_results;
 DROP TABLE fontes_renovaveis;
 DROP TABLE metricas_eficiencia;
@@ -57,6 +57,9 @@ CREATE TABLE tarifas (
     posto_tarifario VARCHAR2(20),
     valor NUMBER(12,4) NOT NULL,
     base_tarifaria VARCHAR2(50),
+    hash_linha VARCHAR2(16),
+    hash_chave VARCHAR2(16),
+    hash_registro VARCHAR2(16),
     data_cadastro DATE DEFAULT SYSDATE,
     CONSTRAINT fk_tarifa_distribuidora FOREIGN KEY (id_distribuidora) REFERENCES distribuidoras(id_distribuidora),
     CONSTRAINT fk_tarifa_componente FOREIGN KEY (id_componente) REFERENCES componentes_tarifarios(id_componente),
@@ -121,9 +124,20 @@ CREATE TABLE optimization_results (
     CONSTRAINT ck_economia_positive CHECK (economia_estimada >= 0)
 );
 
+-- Tabela de Controle de Cargas (marca d'água por arquivo do ETL)
+CREATE TABLE etl_controle_cargas (
+    arquivo VARCHAR2(255) PRIMARY KEY,
+    hash_arquivo VARCHAR2(64) NOT NULL,
+    dat_geracao DATE,
+    linhas_carregadas NUMBER,
+    data_carga TIMESTAMP DEFAULT SYSTIMESTAMP
+);
+
 -- Índices para otimização
 CREATE INDEX idx_tarifa_datas ON tarifas(data_inicio_vigencia, data_fim_vigencia);
 CREATE INDEX idx_tarifa_valor ON tarifas(valor);
+CREATE INDEX idx_tarifa_hash_chave ON tarifas(hash_chave);
+CREATE INDEX idx_tarifa_hash_linha ON tarifas(hash_linha, data_inicio_vigencia);
 CREATE INDEX idx_distribuidora_nome ON distribuidoras(nome);
 CREATE INDEX idx_componente_desc ON componentes_tarifarios(descricao);
 CREATE INDEX idx_consumption_timestamp ON consumption_history(timestamp);
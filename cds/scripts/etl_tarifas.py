@@ -8,8 +8,21 @@ Data: 25/11/2025
 """
 
 import os
+import glob
+import hashlib
+import time
+import argparse
+import json
+import tempfile
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from threading import Lock
+import numpy as np
 import pandas as pd
 import oracledb
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 from datetime import datetime
 from dotenv import load_dotenv
 import logging
@@ -34,6 +47,139 @@ DB_CONFIG = {
     'dsn': os.getenv('ORACLE_DSN')
 }
 
+# Diretório e padrão dos arquivos anuais da ANEEL
+DIRETORIO_DADOS = "../../scr/data"
+PADRAO_ARQUIVOS = "componentes-tarifarias-*.csv"
+
+# Cache Parquet dos dados limpos (particionado por ano/distribuidora)
+DIRETORIO_CACHE = "../../scr/data/parquet"
+PARTICIONAMENTO_CACHE = ds.partitioning(
+    pa.schema([('ano', pa.int32()), ('distribuidora', pa.string())]),
+    flavor='hive'
+)
+
+# Conexões de escrita no modo multiarquivo
+NUM_WRITERS = 4
+
+# Tamanho dos lotes enviados com executemany
+TAMANHO_LOTE = 5000
+
+# Máximo de erros de lote detalhados no log
+MAX_ERROS_LOG = 20
+
+# Linhas do CSV lidas por vez no modo streaming
+TAMANHO_CHUNK = 100000
+
+# Tamanho da amostra usada para estimar os quantis de outliers
+TAMANHO_AMOSTRA_QUANTIS = 200000
+
+# Versão do conteúdo do cache Parquet (alterações na limpeza invalidam o cache)
+VERSAO_CACHE = 3
+
+# Colunas de data do arquivo ANEEL
+COLUNAS_DATA = ['DatGeracaoConjuntoDados', 'DatInicioVigencia', 'DatFimVigencia']
+
+# Colunas lidas como texto (decimal com vírgula e CNPJ com zeros à esquerda)
+TIPOS_TEXTO = {'VlrComponenteTarifario': str, 'NumCPFCNPJ': str}
+
+# Colunas que compõem as tabelas dimensão
+COLUNAS_DIMENSAO = [
+    'SigNomeAgente',
+    'NumCPFCNPJ',
+    'DscComponenteTarifario',
+    'DscUnidade',
+    'DscSubGrupoTarifario',
+    'DscModalidadeTarifaria',
+    'DscClasseConsumidor',
+    'DscSubClasseConsumidor',
+    'DscDetalheConsumidor'
+]
+
+# Carga direta: gatilho e FKs de tarifas impedem INSERT /*+ APPEND */
+# (FK -> coluna de tarifas e tabela de dimensão referenciada)
+GATILHO_AUDITORIA = 'trg_audit_tarifas'
+RESTRICOES_TARIFAS = {
+    'fk_tarifa_distribuidora': ('id_distribuidora', 'distribuidoras'),
+    'fk_tarifa_componente': ('id_componente', 'componentes_tarifarios'),
+    'fk_tarifa_subgrupo': ('id_subgrupo', 'subgrupos_tarifarios'),
+    'fk_tarifa_modalidade': ('id_modalidade', 'modalidades_tarifarias'),
+    'fk_tarifa_classe': ('id_classe', 'classes_consumidor')
+}
+
+# Colunas da tabela fato (banco), na ordem dos binds
+COLUNAS_FATO = [
+    'id_distribuidora',
+    'id_componente',
+    'id_subgrupo',
+    'id_modalidade',
+    'id_classe',
+    'data_inicio_vigencia',
+    'data_fim_vigencia',
+    'posto_tarifario',
+    'valor',
+    'base_tarifaria',
+    'hash_linha',
+    'hash_chave',
+    'hash_registro'
+]
+
+# Colunas que identificam uma linha tarifária (sem datas e valor)
+COLUNAS_LINHA_TARIFARIA = [
+    'NumCPFCNPJ',
+    'DscComponenteTarifario',
+    'DscUnidade',
+    'DscSubGrupoTarifario',
+    'DscModalidadeTarifaria',
+    'DscClasseConsumidor',
+    'DscSubClasseConsumidor',
+    'DscDetalheConsumidor',
+    'DscPostoTarifario',
+    'DscBaseTarifaria'
+]
+
+# Dimensões: tabela, id, sequência, chave natural e colunas extras (banco -> CSV)
+DIMENSOES = [
+    {
+        'tabela': 'distribuidoras',
+        'id': 'id_distribuidora',
+        'sequencia': 'seq_distribuidora',
+        'chave': {'cnpj': 'NumCPFCNPJ'},
+        'extras': {'nome': 'SigNomeAgente'}
+    },
+    {
+        'tabela': 'componentes_tarifarios',
+        'id': 'id_componente',
+        'sequencia': 'seq_componente',
+        'chave': {'descricao': 'DscComponenteTarifario', 'unidade': 'DscUnidade'},
+        'extras': {}
+    },
+    {
+        'tabela': 'subgrupos_tarifarios',
+        'id': 'id_subgrupo',
+        'sequencia': 'seq_subgrupo',
+        'chave': {'codigo': 'DscSubGrupoTarifario'},
+        'extras': {'descricao': 'DscSubGrupoTarifario'}
+    },
+    {
+        'tabela': 'modalidades_tarifarias',
+        'id': 'id_modalidade',
+        'sequencia': 'seq_modalidade',
+        'chave': {'nome': 'DscModalidadeTarifaria'},
+        'extras': {}
+    },
+    {
+        'tabela': 'classes_consumidor',
+        'id': 'id_classe',
+        'sequencia': 'seq_classe',
+        'chave': {
+            'nome': 'DscClasseConsumidor',
+            'subclasse': 'DscSubClasseConsumidor',
+            'detalhe': 'DscDetalheConsumidor'
+        },
+        'extras': {}
+    }
+]
+
 def conectar_banco():
     """Estabelece conexão com o banco Oracle"""
     try:
@@ -51,197 +197,1229 @@ def carregar_dados(arquivo):
             arquivo,
             sep=';',
             encoding='utf-8',
-            parse_dates=['DatGeracaoConjuntoDados', 'DatInicioVigencia', 'DatFimVigencia']
+            parse_dates=COLUNAS_DATA,
+            dtype=TIPOS_TEXTO
         )
+        df = normalizar_colunas(df)
         logging.info(f"Dados carregados: {len(df)} registros")
         return df
     except Exception as e:
         logging.error(f"Erro ao carregar arquivo: {str(e)}")
         raise
 
-def limpar_dados(df):
-    """Limpa e prepara os dados para carga"""
+def carregar_dados_em_chunks(arquivo, chunksize=TAMANHO_CHUNK, usecols=None):
+    """Lê o arquivo CSV em blocos de tamanho fixo (memória limitada)"""
+    try:
+        datas = COLUNAS_DATA if usecols is None else [c for c in COLUNAS_DATA if c in usecols]
+        leitor = pd.read_csv(
+            arquivo,
+            sep=';',
+            encoding='utf-8',
+            parse_dates=datas,
+            dtype=TIPOS_TEXTO,
+            usecols=usecols,
+            chunksize=chunksize
+        )
+        with leitor:
+            for chunk in leitor:
+                yield normalizar_colunas(chunk)
+    except Exception as e:
+        logging.error(f"Erro ao carregar arquivo: {str(e)}")
+        raise
+
+def normalizar_colunas(df):
+    """Padroniza colunas de chave lidas como texto"""
+    if 'NumCPFCNPJ' in df.columns:
+        # CNPJ com 14 dígitos (zeros à esquerda preservados)
+        df['NumCPFCNPJ'] = df['NumCPFCNPJ'].str.strip().str.zfill(14)
+    return df
+
+def converter_valores(serie):
+    """Converte VlrComponenteTarifario (decimal com vírgula) para numérico"""
+    return pd.to_numeric(serie.str.replace(',', '.'), errors='coerce')
+
+class EstimadorQuantis:
+    """Estimador aproximado de quantis por amostragem de reservatório
+    
+    Mantém uma amostra uniforme de tamanho fixo do fluxo de valores, de forma
+    que os quantis de arquivos de qualquer tamanho usam memória constante.
+    """
+    
+    def __init__(self, tamanho=TAMANHO_AMOSTRA_QUANTIS, seed=42):
+        """Inicializa estimador"""
+        self.tamanho = tamanho
+        self.amostra = np.empty(tamanho, dtype='float64')
+        self.vistos = 0
+        self.rng = np.random.default_rng(seed)
+    
+    def atualizar(self, valores):
+        """Incorpora um bloco de valores à amostra"""
+        valores = np.asarray(valores, dtype='float64')
+        valores = valores[~np.isnan(valores)]
+        
+        # Preenche o reservatório enquanto houver espaço
+        livres = max(self.tamanho - self.vistos, 0)
+        inicio = min(livres, len(valores))
+        self.amostra[self.vistos:self.vistos + inicio] = valores[:inicio]
+        
+        # Algoritmo R vetorizado: o i-ésimo valor entra com probabilidade k/i
+        restantes = valores[inicio:]
+        if len(restantes):
+            posicoes = self.vistos + inicio + np.arange(1, len(restantes) + 1)
+            aceitos = self.rng.random(len(restantes)) < self.tamanho / posicoes
+            slots = self.rng.integers(0, self.tamanho, int(aceitos.sum()))
+            self.amostra[slots] = restantes[aceitos]
+        
+        self.vistos += len(valores)
+    
+    def quantil(self, q):
+        """Retorna quantil aproximado"""
+        n = min(self.vistos, self.tamanho)
+        if n == 0:
+            return np.nan
+        return float(np.quantile(self.amostra[:n], q))
+
+class FiltroDuplicatas:
+    """Descarta linhas repetidas de um arquivo lido em blocos
+    
+    Guarda um hash de 64 bits de cada linha já vista (array ordenado, 8 bytes
+    por linha distinta), de modo que duplicatas em blocos diferentes também
+    são removidas, como na leitura do arquivo inteiro. O hash só vale dentro
+    da execução e não é gravado no banco.
+    """
+    
+    def __init__(self):
+        """Inicializa filtro"""
+        self.vistos = np.empty(0, dtype='uint64')
+    
+    def filtrar(self, df):
+        """Retorna as linhas de df ainda não vistas"""
+        df = df.drop_duplicates()
+        if df.empty:
+            return df
+        
+        hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        posicoes = np.searchsorted(self.vistos, hashes)
+        encontrados = posicoes < len(self.vistos)
+        encontrados[encontrados] = self.vistos[posicoes[encontrados]] == hashes[encontrados]
+        
+        self.vistos = np.union1d(self.vistos, hashes[~encontrados])
+        return df[~encontrados]
+
+class CacheParquet:
+    """Cache colunar dos dados limpos, particionado por ano e distribuidora
+    
+    Layout Hive (ano=AAAA/distribuidora=CNPJ/<arquivo>-<bloco>-<n>.parquet),
+    legível com poda de colunas e filtros por partição (pyarrow, arrow no R).
+    Cada arquivo de origem tem um manifesto com seu SHA-256 e o resumo da
+    primeira passada; o cache só é usado se o hash ainda corresponder.
+    """
+    
+    def __init__(self, diretorio=DIRETORIO_CACHE):
+        """Inicializa o diretório do cache"""
+        self.diretorio = diretorio
+        self.diretorio_manifestos = os.path.join(diretorio, '_manifestos')
+        os.makedirs(self.diretorio_manifestos, exist_ok=True)
+    
+    @staticmethod
+    def _prefixo(arquivo):
+        """Nome base do arquivo de origem, usado nos nomes das partes"""
+        return os.path.splitext(os.path.basename(arquivo))[0]
+    
+    def _caminho_manifesto(self, arquivo):
+        """Caminho do manifesto do arquivo de origem"""
+        return os.path.join(self.diretorio_manifestos, f"{self._prefixo(arquivo)}.json")
+    
+    def _partes(self, arquivo):
+        """Arquivos Parquet gerados a partir do arquivo de origem"""
+        padrao = os.path.join(self.diretorio, 'ano=*', 'distribuidora=*',
+                              f"{self._prefixo(arquivo)}-*.parquet")
+        return sorted(glob.glob(padrao))
+    
+    def manifesto(self, arquivo, hash_atual):
+        """Retorna o manifesto se o cache corresponder ao arquivo atual"""
+        try:
+            with open(self._caminho_manifesto(arquivo), encoding='utf-8') as f:
+                manifesto = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        
+        if manifesto.get('hash_arquivo') != hash_atual \
+                or manifesto.get('versao') != VERSAO_CACHE:
+            return None
+        return manifesto
+    
+    def resumo(self, manifesto):
+        """Resumo da primeira passada (datas como Timestamp)"""
+        return {
+            chave: pd.Timestamp(valor) if valor is not None else None
+            for chave, valor in manifesto['resumo'].items()
+        }
+    
+    def invalidar(self, arquivo):
+        """Remove manifesto e partes de um arquivo de origem"""
+        try:
+            os.remove(self._caminho_manifesto(arquivo))
+        except FileNotFoundError:
+            pass
+        for parte in self._partes(arquivo):
+            os.remove(parte)
+    
+    def gravar(self, arquivo, numero, df):
+        """Grava um bloco limpo nas partições ano/distribuidora"""
+        if df.empty:
+            return
+        
+        tabela = pa.Table.from_pandas(
+            df.assign(
+                ano=df['DatInicioVigencia'].dt.year.astype('int32'),
+                distribuidora=df['NumCPFCNPJ']
+            ),
+            preserve_index=False
+        )
+        pq.write_to_dataset(
+            tabela,
+            self.diretorio,
+            partition_cols=['ano', 'distribuidora'],
+            basename_template=f"{self._prefixo(arquivo)}-{numero:05d}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore'
+        )
+    
+    def concluir(self, arquivo, hash_atual, resumo, linhas):
+        """Grava o manifesto, validando o cache do arquivo"""
+        manifesto = {
+            'arquivo': os.path.basename(arquivo),
+            'hash_arquivo': hash_atual,
+            'versao': VERSAO_CACHE,
+            'linhas': int(linhas),
+            'resumo': {
+                chave: pd.Timestamp(valor).isoformat() if valor is not None else None
+                for chave, valor in resumo.items()
+            },
+            'gerado_em': datetime.now().isoformat()
+        }
+        
+        caminho = self._caminho_manifesto(arquivo)
+        temporario = f"{caminho}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(manifesto, f, ensure_ascii=False, indent=2)
+        os.replace(temporario, caminho)
+        logging.info(f"Cache Parquet atualizado: {arquivo} ({linhas} registros)")
+    
+    def dataset(self, arquivo=None):
+        """Dataset Arrow do cache (inteiro ou de um arquivo de origem)"""
+        if arquivo is None:
+            return ds.dataset(self.diretorio, format='parquet',
+                              partitioning=PARTICIONAMENTO_CACHE)
+        return ds.dataset(
+            self._partes(arquivo),
+            format='parquet',
+            partitioning=PARTICIONAMENTO_CACHE,
+            partition_base_dir=self.diretorio
+        )
+    
+    def ler(self, arquivo=None, chunksize=TAMANHO_CHUNK, colunas=None, filtro=None):
+        """Lê o cache em blocos, com poda de colunas e filtro empurrado ao Parquet
+        
+        Ex.: filtro=(ds.field('ano') == 2013) & (ds.field('distribuidora') == cnpj)
+        """
+        dataset = self.dataset(arquivo)
+        colunas = colunas or [
+            coluna for coluna in dataset.schema.names
+            if coluna not in ('ano', 'distribuidora')
+        ]
+        for lote in dataset.to_batches(columns=colunas, filter=filtro, batch_size=chunksize):
+            if lote.num_rows:
+                yield lote.to_pandas()
+
+def preparar_blocos(arquivo, chunksize=TAMANHO_CHUNK, cache=None, hash_atual=None):
+    """Retorna (dimensões, resumo, blocos limpos) de um arquivo
+    
+    Se o cache Parquet corresponder ao arquivo, as duas passadas sobre o CSV
+    são evitadas; caso contrário os blocos limpos são gravados no cache
+    enquanto são consumidos.
+    """
+    if cache is not None:
+        manifesto = cache.manifesto(arquivo, hash_atual)
+        if manifesto is not None:
+            logging.info(f"Usando cache Parquet de {arquivo}")
+            dimensoes = pd.concat(
+                [
+                    chunk.drop_duplicates()
+                    for chunk in cache.ler(arquivo, chunksize, colunas=COLUNAS_DIMENSAO)
+                ] or [pd.DataFrame(columns=COLUNAS_DIMENSAO)],
+                ignore_index=True
+            ).drop_duplicates()
+            return dimensoes, cache.resumo(manifesto), cache.ler(arquivo, chunksize)
+    
+    limites, dimensoes, resumo = analisar_arquivo(arquivo, chunksize)
+    
+    def blocos():
+        if cache is not None:
+            cache.invalidar(arquivo)
+        total = 0
+        duplicatas = FiltroDuplicatas()
+        for numero, chunk in enumerate(carregar_dados_em_chunks(arquivo, chunksize), 1):
+            # Duplicatas são removidas no arquivo inteiro, não só dentro do bloco
+            chunk = limpar_dados(duplicatas.filtrar(chunk), limites)
+            if cache is not None:
+                cache.gravar(arquivo, numero, chunk)
+            total += len(chunk)
+            yield chunk
+        if cache is not None:
+            cache.concluir(arquivo, hash_atual, resumo, total)
+    
+    return dimensoes, resumo, blocos()
+
+def analisar_arquivo(arquivo, chunksize=TAMANHO_CHUNK):
+    """Primeira passada: limites de outliers e membros das dimensões
+    
+    Lê apenas as colunas necessárias e retorna ((q01, q99), dimensoes, resumo),
+    onde resumo traz a data de geração do conjunto e o intervalo de vigências.
+    """
+    estimador = EstimadorQuantis()
+    dimensoes = []
+    resumo = {'dat_geracao': None, 'inicio_min': None, 'inicio_max': None}
+    
+    for chunk in carregar_dados_em_chunks(
+        arquivo,
+        chunksize,
+        usecols=COLUNAS_DIMENSAO + [
+            'VlrComponenteTarifario',
+            'DatGeracaoConjuntoDados',
+            'DatInicioVigencia'
+        ]
+    ):
+        valores = converter_valores(chunk['VlrComponenteTarifario'])
+        estimador.atualizar(valores.to_numpy())
+        dimensoes.append(chunk.loc[valores.notna(), COLUNAS_DIMENSAO].drop_duplicates())
+        
+        for chave, coluna, funcao in [
+            ('dat_geracao', 'DatGeracaoConjuntoDados', max),
+            ('inicio_min', 'DatInicioVigencia', min),
+            ('inicio_max', 'DatInicioVigencia', max)
+        ]:
+            datas = pd.to_datetime(chunk[coluna], errors='coerce')
+            valor = getattr(datas, funcao.__name__)()
+            if pd.notna(valor):
+                atual = resumo[chave]
+                resumo[chave] = valor if atual is None else funcao(atual, valor)
+    
+    limites = (estimador.quantil(0.01), estimador.quantil(0.99))
+    dimensoes = (
+        pd.concat(dimensoes, ignore_index=True).drop_duplicates()
+        if dimensoes else pd.DataFrame(columns=COLUNAS_DIMENSAO)
+    )
+    logging.info(
+        f"Arquivo analisado: {estimador.vistos} valores, "
+        f"limites de outliers [{limites[0]:.4f}, {limites[1]:.4f}]"
+    )
+    return limites, dimensoes, resumo
+
+def limpar_dados(df, limites=None):
+    """Limpa e prepara os dados para carga
+    
+    limites: (mínimo, máximo) aceitos para o valor. Quando omitido, usa os
+    quantis 1%/99% do próprio DataFrame.
+    """
     try:
         # Remove duplicatas
         df = df.drop_duplicates()
         
         # Converte valores para numérico
-        df['VlrComponenteTarifario'] = pd.to_numeric(
-            df['VlrComponenteTarifario'].str.replace(',', '.'),
-            errors='coerce'
-        )
+        df['VlrComponenteTarifario'] = converter_valores(df['VlrComponenteTarifario'])
         
         # Remove valores nulos
         df = df.dropna(subset=['VlrComponenteTarifario'])
         
+        # Datas de vigência inválidas viram NaT e são descartadas (NOT NULL no banco)
+        for coluna in ['DatInicioVigencia', 'DatFimVigencia']:
+            df[coluna] = pd.to_datetime(df[coluna], errors='coerce')
+        sem_data = df['DatInicioVigencia'].isna() | df['DatFimVigencia'].isna()
+        if sem_data.any():
+            logging.warning(f"{int(sem_data.sum())} registros sem data de vigência válida descartados")
+            df = df[~sem_data]
+        
         # Remove outliers (valores extremos)
-        q1 = df['VlrComponenteTarifario'].quantile(0.01)
-        q3 = df['VlrComponenteTarifario'].quantile(0.99)
+        if limites is None:
+            limites = (
+                df['VlrComponenteTarifario'].quantile(0.01),
+                df['VlrComponenteTarifario'].quantile(0.99)
+            )
+        q1, q3 = limites
         df = df[
             (df['VlrComponenteTarifario'] >= q1) & 
             (df['VlrComponenteTarifario'] <= q3)
         ]
         
-        logging.info(f"Dados limpos: {len(df)} registros mantidos")
+        logging.debug(f"Dados limpos: {len(df)} registros mantidos")
         return df
     except Exception as e:
         logging.error(f"Erro na limpeza dos dados: {str(e)}")
         raise
 
-def inserir_dimensoes(conn, df):
-    """Insere dados nas tabelas dimensão"""
-    try:
-        cursor = conn.cursor()
+def _linhas_para_bind(df):
+    """Converte DataFrame em lista de tuplas com None no lugar de NaN/NaT"""
+    return list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+
+def executar_em_lotes(conn, cursor, sql, df, descricao, tamanho_lote=TAMANHO_LOTE):
+    """Executa sql com executemany em lotes, registrando erros por lote
+    
+    Retorna o número de linhas gravadas com sucesso.
+    """
+    total = len(df)
+    gravadas = 0
+    inicio = time.perf_counter()
+    
+    for offset in range(0, total, tamanho_lote):
+        lote = _linhas_para_bind(df.iloc[offset:offset + tamanho_lote])
+        cursor.executemany(sql, lote, batcherrors=True)
         
-        # Distribuidoras
-        distribuidoras = df[['SigNomeAgente', 'NumCPFCNPJ']].drop_duplicates()
-        for _, row in distribuidoras.iterrows():
-            cursor.execute("""
-                INSERT INTO distribuidoras (id_distribuidora, nome, cnpj)
-                VALUES (seq_distribuidora.nextval, :nome, :cnpj)
-            """, nome=row['SigNomeAgente'], cnpj=row['NumCPFCNPJ'])
-        
-        # Componentes
-        componentes = df[['DscComponenteTarifario', 'DscUnidade']].drop_duplicates()
-        for _, row in componentes.iterrows():
-            cursor.execute("""
-                INSERT INTO componentes_tarifarios (id_componente, descricao, unidade)
-                VALUES (seq_componente.nextval, :desc, :unidade)
-            """, desc=row['DscComponenteTarifario'], unidade=row['DscUnidade'])
-        
-        # Subgrupos
-        subgrupos = df[['DscSubGrupoTarifario']].drop_duplicates()
-        for _, row in subgrupos.iterrows():
-            cursor.execute("""
-                INSERT INTO subgrupos_tarifarios (id_subgrupo, codigo, descricao)
-                VALUES (seq_subgrupo.nextval, :codigo, :codigo)
-            """, codigo=row['DscSubGrupoTarifario'])
-        
-        # Modalidades
-        modalidades = df[['DscModalidadeTarifaria']].drop_duplicates()
-        for _, row in modalidades.iterrows():
-            cursor.execute("""
-                INSERT INTO modalidades_tarifarias (id_modalidade, nome)
-                VALUES (seq_modalidade.nextval, :nome)
-            """, nome=row['DscModalidadeTarifaria'])
-        
-        # Classes
-        classes = df[[
-            'DscClasseConsumidor',
-            'DscSubClasseConsumidor',
-            'DscDetalheConsumidor'
-        ]].drop_duplicates()
-        for _, row in classes.iterrows():
-            cursor.execute("""
-                INSERT INTO classes_consumidor (
-                    id_classe, nome, subclasse, detalhe
-                )
-                VALUES (
-                    seq_classe.nextval, :nome, :subclasse, :detalhe
-                )
-            """, 
-            nome=row['DscClasseConsumidor'],
-            subclasse=row['DscSubClasseConsumidor'],
-            detalhe=row['DscDetalheConsumidor'])
+        erros = cursor.getbatcherrors()
+        for erro in erros[:MAX_ERROS_LOG]:
+            logging.warning(
+                f"{descricao}: erro na linha {offset + erro.offset}: {erro.message}"
+            )
+        if len(erros) > MAX_ERROS_LOG:
+            logging.warning(f"{descricao}: {len(erros) - MAX_ERROS_LOG} erros omitidos")
         
         conn.commit()
-        logging.info("Dimensões inseridas com sucesso")
+        gravadas += len(lote) - len(erros)
+        
+        decorrido = time.perf_counter() - inicio
+        logging.info(
+            f"{descricao}: {min(offset + tamanho_lote, total)}/{total} linhas "
+            f"({gravadas / decorrido if decorrido > 0 else 0:.0f} linhas/s)"
+        )
+    
+    decorrido = time.perf_counter() - inicio
+    logging.info(
+        f"{descricao}: {gravadas} linhas gravadas em {decorrido:.2f}s "
+        f"({gravadas / decorrido if decorrido > 0 else 0:.0f} linhas/s)"
+    )
+    return gravadas
+
+class ResolvedorDimensoes:
+    """Resolve membros das dimensões com cache em memória
+    
+    Pré-carrega as chaves existentes em hash maps (chave natural -> id) e
+    grava apenas membros novos, via MERGE, de forma idempotente. Os mapas
+    resultantes permitem carregar os fatos sem consultas por linha.
+    """
+    
+    def __init__(self, conn):
+        """Inicializa resolvedor e pré-carrega chaves existentes"""
+        self.mapas = {}
+        cursor = conn.cursor()
+        for dimensao in DIMENSOES:
+            self._carregar(cursor, dimensao)
+    
+    def _carregar(self, cursor, dimensao):
+        """Carrega (chave natural -> id) de uma dimensão"""
+        colunas = ', '.join(dimensao['chave'])
+        cursor.execute(f"SELECT {colunas}, {dimensao['id']} FROM {dimensao['tabela']}")
+        self.mapas[dimensao['tabela']] = {
+            tuple(linha[:-1]): linha[-1] for linha in cursor.fetchall()
+        }
+    
+    @staticmethod
+    def _sql_merge(dimensao):
+        """Monta MERGE que insere o membro apenas se a chave natural não existir"""
+        chave = list(dimensao['chave'])
+        colunas = chave + list(dimensao['extras'])
+        origem = ', '.join(f":{i} AS {coluna}" for i, coluna in enumerate(colunas, 1))
+        # DECODE trata NULL = NULL como verdadeiro na comparação da chave
+        condicao = ' AND '.join(f"DECODE(t.{c}, s.{c}, 1, 0) = 1" for c in chave)
+        return f"""
+            MERGE INTO {dimensao['tabela']} t
+            USING (SELECT {origem} FROM dual) s
+            ON ({condicao})
+            WHEN NOT MATCHED THEN INSERT ({dimensao['id']}, {', '.join(colunas)})
+            VALUES ({dimensao['sequencia']}.nextval, {', '.join('s.' + c for c in colunas)})
+        """
+    
+    def resolver(self, conn, df):
+        """Grava membros novos de df e retorna os mapas de todas as dimensões"""
+        cursor = conn.cursor()
+        
+        for dimensao in DIMENSOES:
+            origem_chave = list(dimensao['chave'].values())
+            origem = origem_chave + list(dimensao['extras'].values())
+            mapa = self.mapas[dimensao['tabela']]
+            
+            membros = pd.DataFrame({
+                f"c{i}": df[coluna] for i, coluna in enumerate(origem)
+            }).drop_duplicates(subset=[f"c{i}" for i in range(len(origem_chave))])
+            chaves = _linhas_para_bind(membros.iloc[:, :len(origem_chave)])
+            novos = membros[[chave not in mapa for chave in chaves]]
+            
+            if novos.empty:
+                continue
+            
+            executar_em_lotes(
+                conn, cursor, self._sql_merge(dimensao), novos, dimensao['tabela']
+            )
+            self._carregar(cursor, dimensao)
+        
+        return self.mapas_dataframe()
+    
+    def mapas_dataframe(self):
+        """Retorna os mapas como DataFrames (colunas do CSV + id) para merge"""
+        mapas = []
+        for dimensao in DIMENSOES:
+            colunas = list(dimensao['chave'].values()) + [dimensao['id']]
+            mapa = self.mapas[dimensao['tabela']]
+            mapas.append(pd.DataFrame(
+                [chave + (id_,) for chave, id_ in mapa.items()],
+                columns=colunas
+            ))
+        return mapas
+
+def inserir_dimensoes(conn, df, resolvedor=None):
+    """Insere membros novos nas tabelas dimensão e retorna os mapas de IDs"""
+    try:
+        resolvedor = resolvedor or ResolvedorDimensoes(conn)
+        mapas = resolvedor.resolver(conn, df)
+        logging.info("Dimensões resolvidas com sucesso")
+        return mapas
     except Exception as e:
         conn.rollback()
         logging.error(f"Erro ao inserir dimensões: {str(e)}")
         raise
 
-def inserir_fatos(conn, df):
-    """Insere dados na tabela fato (tarifas)"""
+def mapear_chaves(df, mapas):
+    """Resolve as chaves estrangeiras dos fatos com merges vetorizados"""
+    for mapa in mapas:
+        df = df.merge(mapa, on=list(mapa.columns[:-1]), how='left')
+    
+    # Descarta linhas sem correspondência nas dimensões
+    colunas_id = [mapa.columns[-1] for mapa in mapas]
+    sem_chave = df[colunas_id].isna().any(axis=1)
+    if sem_chave.any():
+        logging.warning(f"{int(sem_chave.sum())} registros sem chave de dimensão descartados")
+        df = df[~sem_chave]
+    
+    return df.astype({coluna: 'int64' for coluna in colunas_id})
+
+def _binds(quantidade, inicio=1):
+    """Lista de binds posicionais (:1, :2, ...)"""
+    return ', '.join(f':{i}' for i in range(inicio, inicio + quantidade))
+
+def preparar_fatos(df, mapas):
+    """Mapeia IDs de dimensão e seleciona as colunas da tabela fato"""
+    if 'hash_chave' not in df.columns:
+        df = calcular_impressoes(df)
+    
+    return mapear_chaves(df, mapas)[[
+        'id_distribuidora',
+        'id_componente',
+        'id_subgrupo',
+        'id_modalidade',
+        'id_classe',
+        'DatInicioVigencia',
+        'DatFimVigencia',
+        'DscPostoTarifario',
+        'VlrComponenteTarifario',
+        'DscBaseTarifaria',
+        'hash_linha',
+        'hash_chave',
+        'hash_registro'
+    ]]
+
+def inserir_fatos(conn, df, mapas=None):
+    """Insere dados na tabela fato (tarifas)
+    
+    mapas: mapas de dimensão já resolvidos (inserir_dimensoes); quando
+    omitido, são lidos do banco.
+    """
     try:
         cursor = conn.cursor()
+        if mapas is None:
+            mapas = ResolvedorDimensoes(conn).mapas_dataframe()
         
-        # Mapeia IDs
-        cursor.execute("SELECT id_distribuidora, nome FROM distribuidoras")
-        map_distribuidoras = dict(cursor.fetchall())
+        # Insere tarifas
+        gravadas = executar_em_lotes(conn, cursor, f"""
+            INSERT INTO tarifas (
+                id_tarifa,
+                {', '.join(COLUNAS_FATO)}
+            ) VALUES (
+                seq_tarifa.nextval,
+                {_binds(len(COLUNAS_FATO))}
+            )
+        """, preparar_fatos(df, mapas), "Tarifas")
         
-        cursor.execute("SELECT id_componente, descricao FROM componentes_tarifarios")
-        map_componentes = dict(cursor.fetchall())
+        logging.info("Fatos inseridos com sucesso")
+        return gravadas
+    except Exception as e:
+        conn.rollback()
+        logging.error(f"Erro ao inserir fatos: {str(e)}")
+        raise
+
+def _texto_canonico(serie):
+    """Representação textual estável de uma coluna, independente do dtype
+    
+    Datas viram AAAA-MM-DD (independe da unidade datetime64 do pandas),
+    números viram inteiros em décimos de milésimo (precisão de tarifas.valor)
+    e nulos viram texto vazio.
+    """
+    nulos = serie.isna().to_numpy()
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        texto = serie.to_numpy().astype('datetime64[D]').astype(str)
+    elif pd.api.types.is_numeric_dtype(serie):
+        valores = serie.to_numpy(dtype='float64', na_value=0.0)
+        texto = np.round(valores * 10000).astype('int64').astype(str)
+    else:
+        texto = serie.to_numpy(dtype=object, na_value='').astype(str)
+    return np.where(nulos, '', texto).tolist()
+
+def _hash_textos(partes):
+    """SHA-256 (64 bits, hexadecimal) de cada linha de colunas já serializadas"""
+    return [
+        hashlib.sha256('\x1f'.join(linha).encode('utf-8')).hexdigest()[:16]
+        for linha in zip(*partes)
+    ]
+
+def calcular_impressoes(df):
+    """Adiciona as impressões digitais de linha, vigência e registro
+    
+    hash_linha identifica a linha tarifária (sem datas nem valor),
+    hash_chave a vigência (linha + início) e hash_registro o conteúdo
+    completo, usado para detectar alterações. Os hashes são calculados
+    sobre a serialização canônica das colunas (hashlib), de modo que as
+    impressões gravadas no banco não mudam com a versão do pandas.
+    """
+    colunas = COLUNAS_LINHA_TARIFARIA + [
+        'DatInicioVigencia',
+        'DatFimVigencia',
+        'VlrComponenteTarifario'
+    ]
+    textos = [_texto_canonico(df[coluna]) for coluna in colunas]
+    linha = len(COLUNAS_LINHA_TARIFARIA)
+    
+    return df.assign(
+        hash_linha=pd.Series(_hash_textos(textos[:linha]), index=df.index, dtype=object),
+        hash_chave=pd.Series(_hash_textos(textos[:linha + 1]), index=df.index, dtype=object),
+        hash_registro=pd.Series(_hash_textos(textos), index=df.index, dtype=object)
+    )
+
+class ImpressoesTarifas:
+    """Impressões digitais das vigências já carregadas (hash_chave -> hash_registro)
+    
+    Vigências separadas por um bloco ficam pendentes até a gravação ser
+    confirmada; se a carga do bloco falhar elas são liberadas e continuam
+    sendo tratadas como novas ou alteradas.
+    """
+    
+    def __init__(self, conn, inicio_min, inicio_max):
+        """Carrega impressões do intervalo de vigências do arquivo"""
+        self.lock = Lock()
+        self.pendentes = {}
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT hash_chave, hash_registro
+            FROM tarifas
+            WHERE data_inicio_vigencia BETWEEN :1 AND :2
+              AND hash_chave IS NOT NULL
+        """, [inicio_min, inicio_max])
+        self.registros = dict(cursor.fetchall())
+        logging.info(f"{len(self.registros)} impressões de vigências carregadas")
+    
+    def separar(self, df):
+        """Separa linhas novas e alteradas; linhas idênticas são descartadas
         
-        cursor.execute("SELECT id_subgrupo, codigo FROM subgrupos_tarifarios")
-        map_subgrupos = dict(cursor.fetchall())
+        As linhas retornadas ficam pendentes (blocos concorrentes do mesmo
+        arquivo não as gravam de novo) até confirmar ou liberar.
+        """
+        df = df.drop_duplicates(subset='hash_chave', keep='last')
+        with self.lock:
+            atual = df['hash_chave'].map(self.pendentes).combine_first(
+                df['hash_chave'].map(self.registros)
+            )
+            novos = df[atual.isna()]
+            alterados = df[atual.notna() & (atual != df['hash_registro'])]
+            for separados in (novos, alterados):
+                self.pendentes.update(zip(separados['hash_chave'], separados['hash_registro']))
+        return novos, alterados
+    
+    def confirmar(self, *separados):
+        """Registra as impressões de linhas gravadas com sucesso"""
+        with self.lock:
+            for df in separados:
+                for chave, registro in zip(df['hash_chave'], df['hash_registro']):
+                    self.pendentes.pop(chave, None)
+                    self.registros[chave] = registro
+    
+    def liberar(self, *separados):
+        """Descarta as pendências de linhas cuja gravação falhou"""
+        with self.lock:
+            for df in separados:
+                for chave in df['hash_chave']:
+                    self.pendentes.pop(chave, None)
+
+def atualizar_fatos(conn, df):
+    """Atualiza vigências republicadas com valores diferentes"""
+    cursor = conn.cursor()
+    return executar_em_lotes(conn, cursor, """
+        UPDATE tarifas
+        SET valor = :1,
+            data_fim_vigencia = :2,
+            hash_registro = :3
+        WHERE hash_chave = :4
+    """, df[[
+        'VlrComponenteTarifario',
+        'DatFimVigencia',
+        'hash_registro',
+        'hash_chave'
+    ]], "Tarifas alteradas")
+
+def encerrar_vigencias(conn, df):
+    """Encerra vigências anteriores substituídas pelas novas vigências"""
+    novas = df[['hash_linha', 'DatInicioVigencia']].drop_duplicates()
+    inicio = novas['DatInicioVigencia']
+    cursor = conn.cursor()
+    return executar_em_lotes(conn, cursor, """
+        UPDATE tarifas
+        SET data_fim_vigencia = :1 - 1
+        WHERE hash_linha = :2
+          AND data_inicio_vigencia < :3
+          AND data_fim_vigencia >= :4
+    """, pd.DataFrame({
+        'fim': inicio,
+        'hash_linha': novas['hash_linha'],
+        'inicio': inicio,
+        'limite': inicio
+    }), "Vigências encerradas")
+
+def inserir_staging(conn, df, mapas, lote):
+    """Grava fatos na tabela de staging (sem gatilhos nem FKs)"""
+    try:
+        cursor = conn.cursor()
+        fatos = preparar_fatos(df, mapas)
+        fatos.insert(0, 'lote', lote)
         
-        cursor.execute("SELECT id_modalidade, nome FROM modalidades_tarifarias")
-        map_modalidades = dict(cursor.fetchall())
+        return executar_em_lotes(conn, cursor, f"""
+            INSERT INTO stg_tarifas (
+                lote,
+                {', '.join(COLUNAS_FATO)}
+            ) VALUES (
+                {_binds(len(COLUNAS_FATO) + 1)}
+            )
+        """, fatos, "Staging")
+    except Exception as e:
+        conn.rollback()
+        logging.error(f"Erro ao gravar staging: {str(e)}")
+        raise
+
+def _condicao_orfa(alias):
+    """Condição SQL de linha sem dimensão referenciada em alguma das FKs"""
+    return ' OR '.join(
+        f"({alias}.{coluna} IS NOT NULL AND NOT EXISTS ("
+        f"SELECT 1 FROM {tabela} d WHERE d.{coluna} = {alias}.{coluna}))"
+        for coluna, tabela in RESTRICOES_TARIFAS.values()
+    )
+
+def publicar_staging(conn, lote):
+    """Move um lote da staging para tarifas com um único INSERT direto
+    
+    Como as FKs ficam desabilitadas durante a carga direta, as linhas do
+    lote sem dimensão correspondente (órfãs) são contadas e não são
+    publicadas. Registra uma linha de auditoria por lote, em vez de uma por
+    registro, com o número de órfãs. Retorna (publicadas, órfãs).
+    """
+    try:
+        cursor = conn.cursor()
+        inicio = time.perf_counter()
         
-        cursor.execute("SELECT id_classe, nome FROM classes_consumidor")
-        map_classes = dict(cursor.fetchall())
+        cursor.execute(f"""
+            SELECT COUNT(*)
+            FROM stg_tarifas s
+            WHERE s.lote = :1
+              AND ({_condicao_orfa('s')})
+        """, [lote])
+        orfas = cursor.fetchone()[0]
+        if orfas:
+            logging.error(f"Lote {lote}: {orfas} registros sem dimensão não publicados")
         
-        # Insere tarifas
-        for _, row in df.iterrows():
-            cursor.execute("""
-                INSERT INTO tarifas (
-                    id_tarifa,
-                    id_distribuidora,
-                    id_componente,
-                    id_subgrupo,
-                    id_modalidade,
-                    id_classe,
-                    data_inicio_vigencia,
-                    data_fim_vigencia,
-                    posto_tarifario,
-                    valor,
-                    base_tarifaria
-                ) VALUES (
-                    seq_tarifa.nextval,
-                    :id_dist,
-                    :id_comp,
-                    :id_sub,
-                    :id_mod,
-                    :id_classe,
-                    :dt_ini,
-                    :dt_fim,
-                    :posto,
-                    :valor,
-                    :base
-                )
-            """,
-            id_dist=map_distribuidoras[row['SigNomeAgente']],
-            id_comp=map_componentes[row['DscComponenteTarifario']],
-            id_sub=map_subgrupos[row['DscSubGrupoTarifario']],
-            id_mod=map_modalidades[row['DscModalidadeTarifaria']],
-            id_classe=map_classes[row['DscClasseConsumidor']],
-            dt_ini=row['DatInicioVigencia'],
-            dt_fim=row['DatFimVigencia'],
-            posto=row['DscPostoTarifario'],
-            valor=row['VlrComponenteTarifario'],
-            base=row['DscBaseTarifaria'])
-            
-            if _ % 1000 == 0:  # Commit a cada 1000 registros
-                conn.commit()
-                logging.info(f"Inseridos {_} registros")
+        cursor.execute(f"""
+            INSERT /*+ APPEND */ INTO tarifas (
+                id_tarifa,
+                {', '.join(COLUNAS_FATO)}
+            )
+            SELECT
+                seq_tarifa.nextval,
+                {', '.join(COLUNAS_FATO)}
+            FROM stg_tarifas s
+            WHERE s.lote = :1
+              AND NOT ({_condicao_orfa('s')})
+        """, [lote])
+        publicadas = cursor.rowcount
+        # Após carga direta a tabela só pode ser lida depois do commit
+        conn.commit()
         
+        cursor.execute("""
+            INSERT INTO audit_tarifas (
+                audit_id,
+                table_name,
+                operation,
+                new_value,
+                changed_by,
+                change_date
+            ) VALUES (
+                seq_audit.NEXTVAL,
+                'TARIFAS',
+                'BULK_LOAD',
+                :1,
+                USER,
+                SYSTIMESTAMP
+            )
+        """, [f"Lote: {lote}, Registros: {publicadas}, Órfãos: {orfas}"])
+        cursor.execute("DELETE FROM stg_tarifas WHERE lote = :1", [lote])
         conn.commit()
-        logging.info("Fatos inseridos com sucesso")
+        
+        duracao = time.perf_counter() - inicio
+        logging.info(
+            f"Lote {lote} publicado: {publicadas} registros em {duracao:.2f}s"
+        )
+        return publicadas, orfas
     except Exception as e:
         conn.rollback()
-        logging.error(f"Erro ao inserir fatos: {str(e)}")
+        logging.error(f"Erro ao publicar lote {lote}: {str(e)}")
         raise
 
+@contextmanager
+def modo_carga_direta(conn):
+    """Desativa gatilho de auditoria e FKs de tarifas durante a carga direta
+    
+    Com gatilhos ou FKs habilitados o Oracle ignora o hint APPEND e volta à
+    inserção convencional. As FKs são reabilitadas com VALIDATE, conferindo
+    as linhas publicadas enquanto estavam desabilitadas (publicar_staging já
+    descarta as órfãs); falha na validação é erro da carga.
+    """
+    cursor = conn.cursor()
+    cursor.execute(f"ALTER TRIGGER {GATILHO_AUDITORIA} DISABLE")
+    for restricao in RESTRICOES_TARIFAS:
+        cursor.execute(f"ALTER TABLE tarifas DISABLE CONSTRAINT {restricao}")
+    logging.info("Modo de carga direta ativado")
+    
+    try:
+        yield
+    finally:
+        invalidas = []
+        for restricao in RESTRICOES_TARIFAS:
+            try:
+                cursor.execute(f"ALTER TABLE tarifas ENABLE VALIDATE CONSTRAINT {restricao}")
+            except Exception as e:
+                logging.error(f"Erro ao validar {restricao}: {str(e)}")
+                invalidas.append(restricao)
+        cursor.execute(f"ALTER TRIGGER {GATILHO_AUDITORIA} ENABLE")
+        logging.info("Modo de carga direta desativado")
+        if invalidas:
+            raise RuntimeError(f"Restrições não validadas após a carga direta: {', '.join(invalidas)}")
+
+def atualizar_vigencias(conn, novos, alterados):
+    """Encerra vigências substituídas pelas novas e regrava as alteradas
+    
+    Retorna o número de vigências alteradas gravadas.
+    """
+    gravadas = 0
+    if not novos.empty:
+        encerrar_vigencias(conn, novos)
+    if not alterados.empty:
+        gravadas += atualizar_fatos(conn, alterados)
+    return gravadas
+
+def concluir_delta(impressoes, novos, alterados, gravadas):
+    """Confirma ou libera as impressões de um bloco e retorna as falhas
+    
+    Com linhas rejeitadas o bloco não é confirmado: o arquivo será
+    reprocessado e as impressões voltam a ser lidas do banco.
+    """
+    falhas = len(novos) + len(alterados) - gravadas
+    if falhas:
+        impressoes.liberar(novos, alterados)
+    else:
+        impressoes.confirmar(novos, alterados)
+    return falhas
+
+def carregar_delta(conn, df, mapas, impressoes, lote=None, adiados=None):
+    """Carrega apenas vigências novas ou alteradas de um bloco limpo
+    
+    Com lote informado, as vigências novas vão para a staging e só chegam a
+    tarifas em publicar_staging. Retorna (gravadas, falhas), onde falhas
+    conta as linhas do delta rejeitadas nos lotes; as impressões só são
+    registradas depois que todas as linhas do bloco foram gravadas.
+    
+    adiados (lista) recebe os UPDATEs do bloco em vez de executá-los: na
+    carga direta eles rodam em aplicar_adiados, com o gatilho de auditoria
+    já reabilitado, e as falhas do bloco são contadas lá.
+    """
+    novos, alterados = impressoes.separar(calcular_impressoes(df))
+    
+    try:
+        gravadas = 0
+        if not novos.empty:
+            if lote is None:
+                gravadas += inserir_fatos(conn, novos, mapas)
+            else:
+                gravadas += inserir_staging(conn, novos, mapas, lote)
+        if adiados is None:
+            gravadas += atualizar_vigencias(conn, novos, alterados)
+    except Exception:
+        impressoes.liberar(novos, alterados)
+        raise
+    
+    if adiados is None:
+        falhas = concluir_delta(impressoes, novos, alterados, gravadas)
+    else:
+        adiados.append((impressoes, novos, alterados, gravadas))
+        falhas = 0
+    logging.info(
+        f"Delta do bloco: {len(novos)} novos, {len(alterados)} alterados, "
+        f"{len(df) - len(novos) - len(alterados)} inalterados, {falhas} falhas"
+    )
+    return gravadas, falhas
+
+def aplicar_adiados(conn, adiados):
+    """Executa os UPDATEs adiados pela carga direta, com auditoria por linha
+    
+    Deve rodar depois de modo_carga_direta: encerramentos e alterações de
+    vigências passam pelo gatilho de auditoria como na carga convencional.
+    Retorna (alteradas, falhas).
+    """
+    alteradas = 0
+    falhas = 0
+    for impressoes, novos, alterados, inseridas in adiados:
+        gravadas = atualizar_vigencias(conn, novos, alterados)
+        alteradas += gravadas
+        falhas += concluir_delta(impressoes, novos, alterados, inseridas + gravadas)
+    adiados.clear()
+    return alteradas, falhas
+
+def hash_arquivo(arquivo):
+    """Calcula SHA-256 do arquivo em blocos"""
+    digest = hashlib.sha256()
+    with open(arquivo, 'rb') as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(bloco)
+    return digest.hexdigest()
+
+def obter_marca_carga(conn, arquivo):
+    """Retorna (hash_arquivo, dat_geracao) da última carga do arquivo"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT hash_arquivo, dat_geracao
+        FROM etl_controle_cargas
+        WHERE arquivo = :1
+    """, [os.path.basename(arquivo)])
+    return cursor.fetchone()
+
+def arquivo_atualizado(conn, arquivo, hash_atual):
+    """Indica se o arquivo mudou desde a última carga registrada"""
+    marca = obter_marca_carga(conn, arquivo)
+    if marca is not None and marca[0] == hash_atual:
+        logging.info(f"Arquivo sem alterações desde a última carga: {arquivo}")
+        return False
+    return True
+
+def conjunto_obsoleto(conn, arquivo, dat_geracao):
+    """Indica se o arquivo é mais antigo que o conjunto já carregado"""
+    marca = obter_marca_carga(conn, arquivo)
+    if marca is not None and marca[1] is not None and dat_geracao is not None \
+            and pd.Timestamp(dat_geracao) < pd.Timestamp(marca[1]):
+        logging.warning(
+            f"Arquivo {arquivo} gerado em {dat_geracao} é anterior à carga "
+            f"registrada ({marca[1]}); ignorado"
+        )
+        return True
+    return False
+
+def registrar_carga(conn, arquivo, hash_atual, dat_geracao, linhas):
+    """Atualiza a marca d'água do arquivo na tabela de controle"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        MERGE INTO etl_controle_cargas c
+        USING (SELECT :1 AS arquivo FROM dual) s
+        ON (c.arquivo = s.arquivo)
+        WHEN MATCHED THEN UPDATE SET
+            hash_arquivo = :2,
+            dat_geracao = :3,
+            linhas_carregadas = :4,
+            data_carga = SYSTIMESTAMP
+        WHEN NOT MATCHED THEN INSERT (
+            arquivo, hash_arquivo, dat_geracao, linhas_carregadas, data_carga
+        ) VALUES (
+            s.arquivo, :5, :6, :7, SYSTIMESTAMP
+        )
+    """, [
+        os.path.basename(arquivo),
+        hash_atual, dat_geracao, linhas,
+        hash_atual, dat_geracao, linhas
+    ])
+    conn.commit()
+
+def concluir_carga(conn, arquivo, hash_atual, dat_geracao, linhas, falhas):
+    """Registra a marca d'água do arquivo, se todas as linhas foram gravadas
+    
+    Com falhas, o arquivo não é registrado e é reprocessado na próxima
+    execução; as vigências já gravadas são reconhecidas pelas impressões.
+    """
+    if falhas:
+        logging.warning(
+            f"Arquivo {arquivo}: {falhas} linhas não gravadas; marca d'água não "
+            f"registrada (o arquivo será reprocessado na próxima carga)"
+        )
+        return False
+    registrar_carga(conn, arquivo, hash_atual, dat_geracao, linhas)
+    return True
+
+def processar_arquivo(
+    conn,
+    arquivo,
+    chunksize=TAMANHO_CHUNK,
+    forcar=False,
+    direta=False,
+    cache=None
+):
+    """Processa um arquivo em streaming (parse, limpeza e carga por bloco)
+    
+    Somente vigências novas ou alteradas são gravadas. Arquivos já carregados
+    (mesmo hash) são ignorados, a menos que forcar seja verdadeiro. Com
+    direta, cada bloco passa pela staging e é publicado com carga direta.
+    cache (CacheParquet) evita reler o CSV quando o arquivo não mudou.
+    """
+    hash_atual = hash_arquivo(arquivo)
+    if not forcar and not arquivo_atualizado(conn, arquivo, hash_atual):
+        return 0
+    
+    # Passada 1 (ou cache): dimensões e marca d'água
+    dimensoes, resumo, blocos = preparar_blocos(arquivo, chunksize, cache, hash_atual)
+    if not forcar and conjunto_obsoleto(conn, arquivo, resumo['dat_geracao']):
+        return 0
+    mapas = inserir_dimensoes(conn, dimensoes)
+    impressoes = ImpressoesTarifas(conn, resumo['inicio_min'], resumo['inicio_max'])
+    
+    # Passada 2: limpeza e carga do delta bloco a bloco
+    total = 0
+    falhas = 0
+    adiados = []
+    with modo_carga_direta(conn) if direta else nullcontext():
+        for numero, chunk in enumerate(blocos, 1):
+            if direta:
+                lote = f"{os.path.basename(arquivo)}#{numero}"
+                carregar_delta(conn, chunk, mapas, impressoes, lote, adiados)
+                publicadas, orfas = publicar_staging(conn, lote)
+                total += publicadas
+                falhas += orfas
+            else:
+                gravadas, falhas_bloco = carregar_delta(conn, chunk, mapas, impressoes)
+                total += gravadas
+                falhas += falhas_bloco
+            logging.info(f"Bloco {numero} processado: {total} registros gravados")
+    
+    # Com o gatilho de auditoria reabilitado
+    alteradas, falhas_adiadas = aplicar_adiados(conn, adiados)
+    total += alteradas
+    falhas += falhas_adiadas
+    
+    concluir_carga(conn, arquivo, hash_atual, resumo['dat_geracao'], total, falhas)
+    logging.info(f"Arquivo {arquivo} processado: {total} registros gravados")
+    return total
+
+def listar_arquivos(diretorio=DIRETORIO_DADOS):
+    """Lista os arquivos anuais da ANEEL disponíveis no diretório"""
+    return sorted(glob.glob(os.path.join(diretorio, PADRAO_ARQUIVOS)))
+
+def preparar_arquivo(
+    arquivo,
+    diretorio_blocos,
+    chunksize=TAMANHO_CHUNK,
+    diretorio_cache=None,
+    hash_atual=None
+):
+    """Worker: analisa e limpa um arquivo, gravando os blocos limpos em disco
+    
+    Executado em processo separado. Retorna (arquivo, dimensões, resumo, blocos).
+    """
+    cache = CacheParquet(diretorio_cache) if diretorio_cache else None
+    dimensoes, resumo, limpos = preparar_blocos(arquivo, chunksize, cache, hash_atual)
+    
+    blocos = []
+    prefixo = os.path.splitext(os.path.basename(arquivo))[0]
+    for numero, chunk in enumerate(limpos):
+        if chunk.empty:
+            continue
+        caminho = os.path.join(diretorio_blocos, f"{prefixo}_{numero:05d}.pkl")
+        chunk.to_pickle(caminho)
+        blocos.append(caminho)
+    
+    return arquivo, dimensoes, resumo, blocos
+
+def carregar_bloco(pool, caminho, mapas, impressoes, lote=None, adiados=None):
+    """Writer: carrega o delta de um bloco limpo usando uma conexão do pool"""
+    chunk = pd.read_pickle(caminho)
+    try:
+        with pool.acquire() as conn:
+            return carregar_delta(conn, chunk, mapas, impressoes, lote, adiados)
+    finally:
+        os.remove(caminho)
+
+def processar_arquivos_paralelo(
+    arquivos,
+    workers=None,
+    writers=NUM_WRITERS,
+    chunksize=TAMANHO_CHUNK,
+    forcar=False,
+    direta=False,
+    diretorio_cache=None
+):
+    """Processa vários arquivos em paralelo
+    
+    Parse e limpeza rodam em processos (um arquivo por worker); os blocos
+    limpos são carregados por um pool pequeno de conexões de escrita. Novos
+    membros de dimensão são resolvidos uma única vez no processo principal e
+    os mapas de IDs são compartilhados por todos os writers. Com direta, os
+    writers gravam na staging e cada arquivo é publicado em um único lote;
+    os UPDATEs de vigências ficam para depois da carga direta, com o gatilho
+    de auditoria reabilitado.
+    """
+    # Uma conexão além dos writers para controle (carga direta) e publicação
+    pool = oracledb.create_pool(min=1, max=writers + 1, increment=1, **DB_CONFIG)
+    total = 0
+    
+    try:
+        # Ignora arquivos idênticos aos já carregados antes de distribuir
+        hashes = {arquivo: hash_arquivo(arquivo) for arquivo in arquivos}
+        if not forcar:
+            with pool.acquire() as conn:
+                arquivos = [
+                    arquivo for arquivo in arquivos
+                    if arquivo_atualizado(conn, arquivo, hashes[arquivo])
+                ]
+        
+        cargas = {}
+        resumos = {}
+        adiados = {}
+        with pool.acquire() if direta else nullcontext() as conn_controle, \
+                modo_carga_direta(conn_controle) if direta else nullcontext(), \
+                tempfile.TemporaryDirectory(prefix='etl_tarifas_') as diretorio_blocos, \
+                ProcessPoolExecutor(max_workers=workers) as parsers, \
+                ThreadPoolExecutor(max_workers=writers) as escritores:
+            futuros = [
+                parsers.submit(
+                    preparar_arquivo, arquivo, diretorio_blocos, chunksize,
+                    diretorio_cache, hashes[arquivo]
+                )
+                for arquivo in arquivos
+            ]
+            
+            with pool.acquire() as conn:
+                resolvedor = ResolvedorDimensoes(conn)
+            
+            for futuro in as_completed(futuros):
+                arquivo, dimensoes, resumo, blocos = futuro.result()
+                logging.info(f"Arquivo preparado: {arquivo} ({len(blocos)} blocos)")
+                
+                with pool.acquire() as conn:
+                    if not forcar and conjunto_obsoleto(conn, arquivo, resumo['dat_geracao']):
+                        for bloco in blocos:
+                            os.remove(bloco)
+                        continue
+                    
+                    # Apenas membros ainda ausentes do cache vão ao banco
+                    mapas = inserir_dimensoes(conn, dimensoes, resolvedor)
+                    impressoes = ImpressoesTarifas(
+                        conn, resumo['inicio_min'], resumo['inicio_max']
+                    )
+                
+                resumos[arquivo] = resumo
+                lote = os.path.basename(arquivo) if direta else None
+                adiados[arquivo] = [] if direta else None
+                cargas[arquivo] = [
+                    escritores.submit(
+                        carregar_bloco, pool, bloco, mapas, impressoes, lote, adiados[arquivo]
+                    )
+                    for bloco in blocos
+                ]
+            
+            # Aguarda todos os blocos de cada arquivo
+            for arquivo, futuros_arquivo in cargas.items():
+                resultados = [carga.result() for carga in futuros_arquivo]
+                gravadas = sum(gravadas for gravadas, _ in resultados)
+                falhas = sum(falhas for _, falhas in resultados)
+                if direta:
+                    gravadas, orfas = publicar_staging(conn_controle, os.path.basename(arquivo))
+                    falhas += orfas
+                cargas[arquivo] = (gravadas, falhas)
+        
+        # Com o gatilho de auditoria reabilitado: UPDATEs adiados e marca d'água
+        for arquivo, (gravadas, falhas) in cargas.items():
+            with pool.acquire() as conn:
+                if direta:
+                    alteradas, falhas_adiadas = aplicar_adiados(conn, adiados[arquivo])
+                    gravadas += alteradas
+                    falhas += falhas_adiadas
+                concluir_carga(
+                    conn, arquivo, hashes[arquivo],
+                    resumos[arquivo]['dat_geracao'], gravadas, falhas
+                )
+            total += gravadas
+    finally:
+        pool.close()
+    
+    logging.info(f"{len(arquivos)} arquivos processados: {total} registros")
+    return total
+
 def main():
     """Função principal do ETL"""
+    parser = argparse.ArgumentParser(description="ETL de tarifas ANEEL")
+    parser.add_argument(
+        'arquivos',
+        nargs='*',
+        help="Arquivos CSV a carregar (padrão: todos os anos em --diretorio)"
+    )
+    parser.add_argument('--diretorio', default=DIRETORIO_DADOS)
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Processos de parse/limpeza (padrão: nº de CPUs)")
+    parser.add_argument('--writers', type=int, default=NUM_WRITERS,
+                        help="Conexões de escrita no banco")
+    parser.add_argument('--forcar', action='store_true',
+                        help="Reprocessa arquivos mesmo sem alterações")
+    parser.add_argument('--carga-direta', action='store_true',
+                        help="Carrega via staging e INSERT /*+ APPEND */")
+    parser.add_argument('--cache', default=DIRETORIO_CACHE,
+                        help="Diretório do cache Parquet dos dados limpos")
+    parser.add_argument('--sem-cache', action='store_true',
+                        help="Não lê nem grava o cache Parquet")
+    args = parser.parse_args()
+    
     try:
         inicio = datetime.now()
         logging.info("Iniciando processo de ETL")
         
-        # Conecta ao banco
-        conn = conectar_banco()
-        
-        # Carrega e limpa dados
-        df = carregar_dados("../../scr/data/componentes-tarifarias-2012.csv")
-        df = limpar_dados(df)
+        arquivos = args.arquivos or listar_arquivos(args.diretorio)
+        if not arquivos:
+            raise FileNotFoundError(f"Nenhum arquivo encontrado em {args.diretorio}")
         
-        # Insere dados
-        inserir_dimensoes(conn, df)
-        inserir_fatos(conn, df)
+        diretorio_cache = None if args.sem_cache else args.cache
         
-        # Fecha conexão
-        conn.close()
+        if len(arquivos) == 1:
+            # Conecta ao banco
+            conn = conectar_banco()
+            
+            # Carrega, limpa e insere dados em blocos
+            processar_arquivo(
+                conn, arquivos[0], forcar=args.forcar, direta=args.carga_direta,
+                cache=CacheParquet(diretorio_cache) if diretorio_cache else None
+            )
+            
+            # Fecha conexão
+            conn.close()
+        else:
+            processar_arquivos_paralelo(
+                arquivos, args.workers, args.writers,
+                forcar=args.forcar, direta=args.carga_direta,
+                diretorio_cache=diretorio_cache
+            )
         
         fim = datetime.now()
         duracao = fim - inicio
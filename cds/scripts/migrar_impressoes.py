@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Migração das impressões digitais da tabela tarifas
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2025
+
+Bancos criados antes da carga incremental não têm as colunas de hash nem a
+tabela de controle de cargas. Este script cria os objetos que faltarem e
+preenche hash_linha, hash_chave e hash_registro das tarifas já gravadas,
+com o mesmo cálculo do ETL (etl_tarifas.calcular_impressoes). O log vai
+para etl_tarifas.log, junto com o das cargas.
+"""
+
+import argparse
+import logging
+import pandas as pd
+from etl_tarifas import (
+    TAMANHO_LOTE,
+    calcular_impressoes,
+    conectar_banco,
+    executar_em_lotes,
+    normalizar_colunas
+)
+
+# Colunas de impressão digital da tabela tarifas
+COLUNAS_HASH = ['hash_linha', 'hash_chave', 'hash_registro']
+
+# Índices usados pela carga incremental
+INDICES = {
+    'idx_tarifa_hash_chave': 'tarifas(hash_chave)',
+    'idx_tarifa_hash_linha': 'tarifas(hash_linha, data_inicio_vigencia)'
+}
+
+# Tarifas com as dimensões resolvidas, nas colunas do CSV da ANEEL
+CONSULTA_TARIFAS = """
+    SELECT
+        t.id_tarifa,
+        d.cnpj AS "NumCPFCNPJ",
+        c.descricao AS "DscComponenteTarifario",
+        c.unidade AS "DscUnidade",
+        s.codigo AS "DscSubGrupoTarifario",
+        m.nome AS "DscModalidadeTarifaria",
+        cl.nome AS "DscClasseConsumidor",
+        cl.subclasse AS "DscSubClasseConsumidor",
+        cl.detalhe AS "DscDetalheConsumidor",
+        t.posto_tarifario AS "DscPostoTarifario",
+        t.base_tarifaria AS "DscBaseTarifaria",
+        t.data_inicio_vigencia AS "DatInicioVigencia",
+        t.data_fim_vigencia AS "DatFimVigencia",
+        t.valor AS "VlrComponenteTarifario"
+    FROM tarifas t
+    JOIN distribuidoras d ON d.id_distribuidora = t.id_distribuidora
+    JOIN componentes_tarifarios c ON c.id_componente = t.id_componente
+    JOIN subgrupos_tarifarios s ON s.id_subgrupo = t.id_subgrupo
+    JOIN modalidades_tarifarias m ON m.id_modalidade = t.id_modalidade
+    JOIN classes_consumidor cl ON cl.id_classe = t.id_classe
+    WHERE t.id_tarifa > :1
+      {filtro}
+    ORDER BY t.id_tarifa
+    FETCH FIRST :2 ROWS ONLY
+"""
+
+def criar_estrutura(conn):
+    """Cria colunas de hash, índices e tabela de controle que faltarem"""
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        SELECT LOWER(column_name)
+        FROM user_tab_columns
+        WHERE table_name = 'TARIFAS'
+    """)
+    existentes = {coluna for coluna, in cursor.fetchall()}
+    for coluna in COLUNAS_HASH:
+        if coluna not in existentes:
+            cursor.execute(f"ALTER TABLE tarifas ADD ({coluna} VARCHAR2(16))")
+            logging.info(f"Coluna tarifas.{coluna} criada")
+    
+    cursor.execute("SELECT LOWER(index_name) FROM user_indexes WHERE table_name = 'TARIFAS'")
+    existentes = {indice for indice, in cursor.fetchall()}
+    for indice, definicao in INDICES.items():
+        if indice not in existentes:
+            cursor.execute(f"CREATE INDEX {indice} ON {definicao}")
+            logging.info(f"Índice {indice} criado")
+    
+    cursor.execute("SELECT COUNT(*) FROM user_tables WHERE table_name = 'ETL_CONTROLE_CARGAS'")
+    if cursor.fetchone()[0] == 0:
+        cursor.execute("""
+            CREATE TABLE etl_controle_cargas (
+                arquivo VARCHAR2(255) PRIMARY KEY,
+                hash_arquivo VARCHAR2(64) NOT NULL,
+                dat_geracao DATE,
+                linhas_carregadas NUMBER,
+                data_carga TIMESTAMP DEFAULT SYSTIMESTAMP
+            )
+        """)
+        logging.info("Tabela etl_controle_cargas criada")
+
+def preparar_lote(df):
+    """Converte um lote lido do banco como o ETL faz antes das impressões
+    
+    Tarifas gravadas antes da normalização podem ter CNPJ sem os zeros à
+    esquerda; sem o mesmo strip/zfill(14) do ETL, as impressões delas nunca
+    coincidiriam com as das novas cargas.
+    """
+    df['NumCPFCNPJ'] = df['NumCPFCNPJ'].astype('string')
+    df = normalizar_colunas(df)
+    df['DatInicioVigencia'] = pd.to_datetime(df['DatInicioVigencia'])
+    df['DatFimVigencia'] = pd.to_datetime(df['DatFimVigencia'])
+    df['VlrComponenteTarifario'] = df['VlrComponenteTarifario'].astype('float64')
+    return calcular_impressoes(df)
+
+def preencher_impressoes(conn, recalcular=False, tamanho_lote=TAMANHO_LOTE):
+    """Calcula e grava as impressões das tarifas existentes
+    
+    Por padrão só preenche linhas sem hash_chave; com recalcular, regrava
+    todas (necessário após mudanças no cálculo das impressões). Percorre a
+    tabela por id_tarifa em lotes, com commit a cada lote.
+    """
+    consulta = CONSULTA_TARIFAS.format(
+        filtro='' if recalcular else 'AND t.hash_chave IS NULL'
+    )
+    cursor = conn.cursor()
+    ultimo = 0
+    total = 0
+    
+    while True:
+        cursor.execute(consulta, [ultimo, tamanho_lote])
+        colunas = [descricao[0] for descricao in cursor.description]
+        df = pd.DataFrame(cursor.fetchall(), columns=colunas)
+        if df.empty:
+            break
+        ultimo = int(df['ID_TARIFA'].iloc[-1])
+        
+        df = preparar_lote(df)
+        
+        total += executar_em_lotes(conn, conn.cursor(), """
+            UPDATE tarifas
+            SET hash_linha = :1,
+                hash_chave = :2,
+                hash_registro = :3
+            WHERE id_tarifa = :4
+        """, df[COLUNAS_HASH + ['ID_TARIFA']], "Impressões", tamanho_lote)
+    
+    logging.info(f"Migração concluída: {total} tarifas com impressões gravadas")
+    return total
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Migração das impressões digitais de tarifas")
+    parser.add_argument('--recalcular', action='store_true',
+                        help="Recalcula as impressões de todas as tarifas")
+    args = parser.parse_args()
+    
+    try:
+        conn = conectar_banco()
+        criar_estrutura(conn)
+        preencher_impressoes(conn, recalcular=args.recalcular)
+    except Exception as e:
+        logging.error(f"Erro na migração: {str(e)}")
+        raise
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Configuração comum dos testes dos scripts de banco e ETL
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2025
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Scripts são importados diretamente de cds/scripts
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / 'scripts'
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+# etl_tarifas abre seu arquivo de log no diretório atual ao ser importado;
+# a importação é feita em um diretório temporário para não sujar o repositório
+_diretorio_atual = os.getcwd()
+os.chdir(tempfile.mkdtemp(prefix='cds_tests_'))
+try:
+    import etl_tarifas  # noqa: F401
+finally:
+    os.chdir(_diretorio_atual)
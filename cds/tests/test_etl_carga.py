@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do registro de impressões e marcas d'água da carga incremental
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2025
+"""
+
+import unittest
+from datetime import datetime
+from unittest import mock
+import pandas as pd
+import etl_tarifas
+from etl_tarifas import (
+    COLUNAS_LINHA_TARIFARIA,
+    ImpressoesTarifas,
+    aplicar_adiados,
+    calcular_impressoes,
+    carregar_delta,
+    concluir_carga,
+    modo_carga_direta,
+    publicar_staging
+)
+
+class CursorFalso:
+    """Cursor que devolve registros fixos"""
+    
+    def __init__(self, registros):
+        self.registros = registros
+    
+    def execute(self, sql, parametros=None):
+        pass
+    
+    def fetchall(self):
+        return list(self.registros)
+
+class ConexaoFalsa:
+    """Conexão com impressões já gravadas no banco"""
+    
+    def __init__(self, registros=()):
+        self.registros = registros
+    
+    def cursor(self):
+        return CursorFalso(self.registros)
+
+class CursorGravador:
+    """Cursor que registra os comandos; erro simula falha de um comando"""
+    
+    def __init__(self, conexao):
+        self.conexao = conexao
+        self.rowcount = 0
+    
+    def execute(self, sql, parametros=None):
+        comando = ' '.join(sql.split())
+        if self.conexao.erro and self.conexao.erro in comando:
+            raise RuntimeError('ORA-02298')
+        self.conexao.comandos.append((comando, parametros))
+        if comando.startswith('INSERT /*+ APPEND */'):
+            self.rowcount = self.conexao.publicadas
+    
+    def fetchone(self):
+        return (self.conexao.orfas,)
+
+class ConexaoGravadora:
+    """Conexão que registra comandos e commits"""
+    
+    def __init__(self, orfas=0, publicadas=0, erro=None):
+        self.orfas = orfas
+        self.publicadas = publicadas
+        self.erro = erro
+        self.comandos = []
+        self.commits = 0
+    
+    def cursor(self):
+        return CursorGravador(self)
+    
+    def commit(self):
+        self.commits += 1
+    
+    def rollback(self):
+        pass
+
+def vigencias(valores=(10.0, 20.0)):
+    """Vigências limpas de linhas tarifárias distintas"""
+    df = pd.DataFrame({coluna: ['Não se aplica'] * len(valores) for coluna in COLUNAS_LINHA_TARIFARIA})
+    df['NumCPFCNPJ'] = [f'{numero:014d}' for numero in range(len(valores))]
+    df['DatInicioVigencia'] = pd.Timestamp('2024-01-01')
+    df['DatFimVigencia'] = pd.Timestamp('2024-12-31')
+    df['VlrComponenteTarifario'] = list(valores)
+    return df
+
+def impressoes_vazias():
+    """Impressões sem nenhuma vigência gravada"""
+    return ImpressoesTarifas(ConexaoFalsa(), datetime(2024, 1, 1), datetime(2024, 12, 31))
+
+class TestImpressoesTarifas(unittest.TestCase):
+    """Testes de separar, confirmar e liberar"""
+    
+    def test_separar_deixa_pendente_ate_confirmar(self):
+        """Vigências separadas não entram nos registros antes da confirmação"""
+        impressoes = impressoes_vazias()
+        novos, alterados = impressoes.separar(calcular_impressoes(vigencias()))
+        
+        self.assertEqual(len(novos), 2)
+        self.assertTrue(alterados.empty)
+        self.assertEqual(impressoes.registros, {})
+        
+        # Bloco concorrente com as mesmas vigências não as grava de novo
+        repetidos, _ = impressoes.separar(calcular_impressoes(vigencias()))
+        self.assertTrue(repetidos.empty)
+        
+        impressoes.confirmar(novos, alterados)
+        self.assertEqual(impressoes.registros, dict(zip(novos['hash_chave'], novos['hash_registro'])))
+        self.assertEqual(impressoes.pendentes, {})
+    
+    def test_liberar_volta_a_tratar_como_novas(self):
+        """Após falha, as vigências voltam a ser separadas como novas"""
+        impressoes = impressoes_vazias()
+        novos, alterados = impressoes.separar(calcular_impressoes(vigencias()))
+        impressoes.liberar(novos, alterados)
+        
+        novamente, _ = impressoes.separar(calcular_impressoes(vigencias()))
+        self.assertEqual(len(novamente), 2)
+        self.assertEqual(impressoes.registros, {})
+    
+    def test_alteradas_comparam_com_registros(self):
+        """Vigência gravada com outro valor é separada como alterada"""
+        gravadas = calcular_impressoes(vigencias())
+        conn = ConexaoFalsa(zip(gravadas['hash_chave'], gravadas['hash_registro']))
+        impressoes = ImpressoesTarifas(conn, datetime(2024, 1, 1), datetime(2024, 12, 31))
+        
+        novos, alterados = impressoes.separar(calcular_impressoes(vigencias((10.0, 25.0))))
+        self.assertTrue(novos.empty)
+        self.assertEqual(alterados['VlrComponenteTarifario'].tolist(), [25.0])
+
+class TestCarregarDelta(unittest.TestCase):
+    """Testes de carregar_delta e concluir_carga"""
+    
+    def carregar(self, gravadas=None, erro=None):
+        """Carrega vigências novas com inserir_fatos simulado"""
+        impressoes = impressoes_vazias()
+        inserir = mock.Mock(return_value=gravadas, side_effect=erro)
+        with mock.patch.object(etl_tarifas, 'inserir_fatos', inserir), \
+                mock.patch.object(etl_tarifas, 'encerrar_vigencias'):
+            if erro:
+                with self.assertRaises(type(erro)):
+                    carregar_delta(None, vigencias(), {}, impressoes)
+                return None, impressoes
+            return carregar_delta(None, vigencias(), {}, impressoes), impressoes
+    
+    def test_confirma_apos_gravar(self):
+        """Impressões são registradas quando todas as linhas foram gravadas"""
+        resultado, impressoes = self.carregar(gravadas=2)
+        self.assertEqual(resultado, (2, 0))
+        self.assertEqual(len(impressoes.registros), 2)
+    
+    def test_linhas_rejeitadas_nao_confirmam(self):
+        """Com linhas rejeitadas nos lotes as impressões não são registradas"""
+        resultado, impressoes = self.carregar(gravadas=1)
+        self.assertEqual(resultado, (1, 1))
+        self.assertEqual(impressoes.registros, {})
+        self.assertEqual(impressoes.pendentes, {})
+    
+    def test_excecao_libera_pendencias(self):
+        """Erro na gravação libera as vigências separadas"""
+        _, impressoes = self.carregar(erro=RuntimeError('falha'))
+        self.assertEqual(impressoes.registros, {})
+        self.assertEqual(impressoes.pendentes, {})
+    
+    def test_carga_direta_adia_updates(self):
+        """Na carga direta os UPDATEs só rodam em aplicar_adiados"""
+        impressoes = impressoes_vazias()
+        adiados = []
+        with mock.patch.object(etl_tarifas, 'inserir_staging', return_value=2), \
+                mock.patch.object(etl_tarifas, 'encerrar_vigencias') as encerrar:
+            resultado = carregar_delta(None, vigencias(), {}, impressoes, 'lote', adiados)
+            encerrar.assert_not_called()
+            self.assertEqual(resultado, (2, 0))
+            self.assertEqual(impressoes.registros, {})
+            
+            self.assertEqual(aplicar_adiados(None, adiados), (0, 0))
+            encerrar.assert_called_once()
+        self.assertEqual(len(impressoes.registros), 2)
+        self.assertEqual(adiados, [])
+    
+    def test_marca_dagua_so_sem_falhas(self):
+        """Arquivo com falhas não recebe marca d'água"""
+        with mock.patch.object(etl_tarifas, 'registrar_carga') as registrar:
+            self.assertFalse(concluir_carga(None, 'a.csv', 'h', None, 10, 1))
+            registrar.assert_not_called()
+            
+            self.assertTrue(concluir_carga(None, 'a.csv', 'h', None, 10, 0))
+            registrar.assert_called_once_with(None, 'a.csv', 'h', None, 10)
+
+class TestCargaDireta(unittest.TestCase):
+    """Testes da publicação da staging e da validação das FKs"""
+    
+    def test_orfas_nao_publicadas_e_auditadas(self):
+        """Órfãs ficam fora do INSERT direto e entram na linha de auditoria"""
+        conn = ConexaoGravadora(orfas=2, publicadas=8)
+        self.assertEqual(publicar_staging(conn, 'a.csv#1'), (8, 2))
+        
+        publicacao = next(sql for sql, _ in conn.comandos if sql.startswith('INSERT /*+ APPEND */'))
+        self.assertIn('AND NOT (', publicacao)
+        self.assertIn('NOT EXISTS (SELECT 1 FROM classes_consumidor', publicacao)
+        auditoria = next(parametros for sql, parametros in conn.comandos if 'audit_tarifas' in sql)
+        self.assertEqual(auditoria, ['Lote: a.csv#1, Registros: 8, Órfãos: 2'])
+    
+    def test_fks_reabilitadas_com_validate(self):
+        """FKs voltam com VALIDATE e o gatilho é reabilitado depois delas"""
+        conn = ConexaoGravadora()
+        with modo_carga_direta(conn):
+            pass
+        comandos = [sql for sql, _ in conn.comandos]
+        self.assertTrue(all('NOVALIDATE' not in sql for sql in comandos))
+        self.assertEqual(sum('ENABLE VALIDATE CONSTRAINT' in sql for sql in comandos), 5)
+        self.assertTrue(comandos[-1].endswith('ENABLE'))
+    
+    def test_validacao_com_erro_falha_a_carga(self):
+        """FK que não valida é erro, mas o gatilho é reabilitado"""
+        conn = ConexaoGravadora(erro='ENABLE VALIDATE CONSTRAINT fk_tarifa_classe')
+        with self.assertRaises(RuntimeError):
+            with modo_carga_direta(conn):
+                pass
+        self.assertTrue(conn.comandos[-1][0].endswith('ENABLE'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes da leitura em blocos do ETL de tarifas
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2025
+"""
+
+import os
+import tempfile
+import unittest
+import pandas as pd
+import etl_tarifas
+from etl_tarifas import CacheParquet, FiltroDuplicatas, hash_arquivo, preparar_blocos
+
+CABECALHO = [
+    'DatGeracaoConjuntoDados', 'SigNomeAgente', 'NumCPFCNPJ',
+    'DatInicioVigencia', 'DatFimVigencia', 'DscComponenteTarifario',
+    'DscUnidade', 'DscSubGrupoTarifario', 'DscModalidadeTarifaria',
+    'DscClasseConsumidor', 'DscSubClasseConsumidor', 'DscDetalheConsumidor',
+    'DscPostoTarifario', 'DscBaseTarifaria', 'VlrComponenteTarifario'
+]
+
+def linha(inicio='2024-01-01', valor='100,5', cnpj='123'):
+    """Linha do arquivo ANEEL"""
+    return [
+        '2024-06-01', 'ENEL', cnpj, inicio, '2024-12-31', 'TE', 'R$/MWh',
+        'B1', 'Convencional', 'Residencial', 'Residencial', 'Não se aplica',
+        'Não se aplica', 'Tarifa de Aplicação', valor
+    ]
+
+def gravar_csv(diretorio, linhas):
+    """Grava arquivo no formato ANEEL (separador ;)"""
+    caminho = os.path.join(diretorio, 'componentes-tarifarias-2024.csv')
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write(';'.join(CABECALHO) + '\n')
+        for campos in linhas:
+            f.write(';'.join(campos) + '\n')
+    return caminho
+
+class TestFiltroDuplicatas(unittest.TestCase):
+    """Testes de FiltroDuplicatas"""
+    
+    def test_remove_duplicatas_entre_blocos(self):
+        """Linha repetida em outro bloco é descartada"""
+        filtro = FiltroDuplicatas()
+        primeiro = pd.DataFrame({'a': [1, 2, 2], 'b': ['x', 'y', 'y']})
+        segundo = pd.DataFrame({'a': [2, 3], 'b': ['y', 'z']})
+        
+        self.assertEqual(filtro.filtrar(primeiro)['a'].tolist(), [1, 2])
+        self.assertEqual(filtro.filtrar(segundo)['a'].tolist(), [3])
+        self.assertEqual(len(filtro.vistos), 3)
+
+class TestPrepararBlocos(unittest.TestCase):
+    """Testes de preparar_blocos sem cache"""
+    
+    def setUp(self):
+        """Diretório temporário para o CSV"""
+        self.tmp = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        """Remove diretório temporário"""
+        self.tmp.cleanup()
+    
+    def test_duplicatas_em_blocos_diferentes(self):
+        """Com blocos de 2 linhas a duplicata da última linha é removida"""
+        arquivo = gravar_csv(self.tmp.name, [
+            linha('2024-01-01'), linha('2024-02-01'),
+            linha('2024-03-01'), linha('2024-01-01')
+        ])
+        _, resumo, blocos = preparar_blocos(arquivo, chunksize=2)
+        limpos = pd.concat(list(blocos), ignore_index=True)
+        
+        self.assertEqual(len(limpos), 3)
+        self.assertEqual(resumo['inicio_min'], pd.Timestamp('2024-01-01'))
+    
+    def test_datas_invalidas_descartadas(self):
+        """Vigências com data inválida são descartadas antes do cache"""
+        arquivo = gravar_csv(self.tmp.name, [
+            linha('2024-01-01'), linha('sem data'), linha('2024-03-01')
+        ])
+        cache = CacheParquet(os.path.join(self.tmp.name, 'parquet'))
+        _, resumo, blocos = preparar_blocos(arquivo, 2, cache, hash_arquivo(arquivo))
+        limpos = pd.concat(list(blocos), ignore_index=True)
+        
+        self.assertEqual(len(limpos), 2)
+        self.assertFalse(limpos['DatInicioVigencia'].isna().any())
+        self.assertEqual(resumo['inicio_max'], pd.Timestamp('2024-03-01'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes das impressões digitais de vigências do ETL de tarifas
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2025
+"""
+
+import hashlib
+import unittest
+import numpy as np
+import pandas as pd
+from etl_tarifas import COLUNAS_LINHA_TARIFARIA, calcular_impressoes
+
+def vigencias(unidade='ns'):
+    """Vigências limpas com datas na unidade informada"""
+    df = pd.DataFrame({coluna: ['Não se aplica', 'Não se aplica'] for coluna in COLUNAS_LINHA_TARIFARIA})
+    df['NumCPFCNPJ'] = ['00000000000123', None]
+    df['DatInicioVigencia'] = pd.to_datetime(['2024-01-01', '2024-07-01']).astype(f'datetime64[{unidade}]')
+    df['DatFimVigencia'] = pd.to_datetime(['2024-06-30', None]).astype(f'datetime64[{unidade}]')
+    df['VlrComponenteTarifario'] = [100.5, 0.12345]
+    return df
+
+class TestImpressoes(unittest.TestCase):
+    """Testes de calcular_impressoes"""
+    
+    def test_independe_da_unidade_de_data(self):
+        """Datas em ns (pandas 2) e us (pandas 3) geram as mesmas impressões"""
+        ns = calcular_impressoes(vigencias('ns'))
+        us = calcular_impressoes(vigencias('us'))
+        for coluna in ['hash_linha', 'hash_chave', 'hash_registro']:
+            self.assertEqual(ns[coluna].tolist(), us[coluna].tolist())
+    
+    def test_serializacao_canonica(self):
+        """Impressão é o SHA-256 da serialização canônica da linha"""
+        df = calcular_impressoes(vigencias())
+        texto = '\x1f'.join(
+            ['00000000000123'] + ['Não se aplica'] * (len(COLUNAS_LINHA_TARIFARIA) - 1)
+            + ['2024-01-01', '2024-06-30', '1005000']
+        )
+        esperado = hashlib.sha256(texto.encode('utf-8')).hexdigest()[:16]
+        self.assertEqual(df['hash_registro'].iloc[0], esperado)
+    
+    def test_nulos_e_precisao(self):
+        """Nulos viram texto vazio e valores usam a precisão do banco (4 casas)"""
+        df = vigencias()
+        base = calcular_impressoes(df)
+        
+        com_nan = df.assign(NumCPFCNPJ=['00000000000123', np.nan])
+        arredondado = df.assign(VlrComponenteTarifario=[100.50001, 0.12345])
+        alterado = df.assign(VlrComponenteTarifario=[100.6, 0.12345])
+        
+        self.assertEqual(calcular_impressoes(com_nan)['hash_linha'].tolist(), base['hash_linha'].tolist())
+        self.assertEqual(calcular_impressoes(arredondado)['hash_registro'].tolist(), base['hash_registro'].tolist())
+        self.assertNotEqual(calcular_impressoes(alterado)['hash_registro'].iloc[0], base['hash_registro'].iloc[0])
+        self.assertEqual(calcular_impressoes(alterado)['hash_chave'].iloc[0], base['hash_chave'].iloc[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes da migração das impressões digitais de tarifas
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2025
+"""
+
+import unittest
+from datetime import datetime
+from decimal import Decimal
+import pandas as pd
+from etl_tarifas import COLUNAS_LINHA_TARIFARIA, calcular_impressoes, normalizar_colunas
+from migrar_impressoes import preparar_lote
+
+def lote_banco(cnpj):
+    """Lote no formato lido pela CONSULTA_TARIFAS (tipos do oracledb)"""
+    df = pd.DataFrame({coluna: ['Não se aplica'] for coluna in COLUNAS_LINHA_TARIFARIA})
+    df['NumCPFCNPJ'] = [cnpj]
+    df['DatInicioVigencia'] = [datetime(2024, 1, 1)]
+    df['DatFimVigencia'] = [datetime(2024, 12, 31)]
+    df['VlrComponenteTarifario'] = [Decimal('100.5')]
+    df.insert(0, 'ID_TARIFA', [1])
+    return df
+
+def lote_csv(cnpj):
+    """Mesma vigência como chega do CSV da ANEEL ao ETL"""
+    df = pd.DataFrame({coluna: ['Não se aplica'] for coluna in COLUNAS_LINHA_TARIFARIA})
+    df['NumCPFCNPJ'] = pd.Series([cnpj], dtype='string')
+    df = normalizar_colunas(df)
+    df['DatInicioVigencia'] = pd.to_datetime(['2024-01-01'])
+    df['DatFimVigencia'] = pd.to_datetime(['2024-12-31'])
+    df['VlrComponenteTarifario'] = [100.5]
+    return calcular_impressoes(df)
+
+class TestPrepararLote(unittest.TestCase):
+    """Testes de preparar_lote"""
+    
+    def test_cnpj_sem_zeros_coincide_com_carga(self):
+        """CNPJ legado sem zeros à esquerda gera as mesmas impressões da nova carga"""
+        migrado = preparar_lote(lote_banco('123'))
+        carregado = lote_csv(' 00000000000123 ')
+        
+        self.assertEqual(migrado['NumCPFCNPJ'].iloc[0], '00000000000123')
+        for coluna in ['hash_linha', 'hash_chave', 'hash_registro']:
+            self.assertEqual(migrado[coluna].iloc[0], carregado[coluna].iloc[0], coluna)
+    
+    def test_cnpj_completo_inalterado(self):
+        """CNPJ já com 14 dígitos mantém as impressões"""
+        self.assertEqual(
+            preparar_lote(lote_banco('12345678000199'))['hash_registro'].iloc[0],
+            lote_csv('12345678000199')['hash_registro'].iloc[0]
+        )
+
+if __name__ == '__main__':
+    unittest.main()
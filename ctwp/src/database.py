@@ -9,23 +9,132 @@ Data: 25/11/2023
 
 import os
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 from datetime import datetime, timedelta
+from threading import Event, Lock, RLock, Thread
 import oracledb
 import pandas as pd
 import numpy as np
 from dotenv import load_dotenv
+from local_store import LocalStore
+from query_cache import QueryCache, tables_written
+from rollups import ROLLUPS, finish_rollup, rollup_frame, rollup_query, select_rollup
 
-# Configura logging mais detalhado
-logging.getLogger().setLevel(logging.DEBUG)
-logging.getLogger('oracledb').setLevel(logging.DEBUG)
+# Validade (segundos) das consultas em cache
+TARIFFS_TTL = 15 * 60           # tarifas_vigentes
+EFFICIENCY_TTL = 6 * 60 * 60    # metricas_eficiencia (linhas mensais)
+RENEWABLES_TTL = 6 * 60 * 60    # fontes_renovaveis (linhas mensais)
+
+# Chaves de tarifa por consulta na recarga parcial do índice (4 binds por chave)
+TARIFF_KEYS_PER_QUERY = 250
+
+# Espera (segundos) entre tentativas de conexão em segundo plano: dobra a cada falha
+CONNECT_RETRY_INITIAL = 2.0
+CONNECT_RETRY_MAX = 5 * 60
+
+# Erros que indicam conexão perdida (rede, sessão encerrada, banco fora do ar)
+CONNECTION_LOST_ERRORS = (
+    'DPI-1010',   # not connected
+    'DPI-1080',   # connection was closed by ORA-%d
+    'DPY-1001',   # not connected to database
+    'DPY-4011',   # the database or network closed the connection
+    'ORA-03113',  # end-of-file on communication channel
+    'ORA-03114',  # not connected to ORACLE
+    'ORA-03135',  # connection lost contact
+    'ORA-12537'   # TNS:connection closed
+)
+
+# Registros da base local enviados por lote ao voltar ao modo online
+SYNC_BATCH_SIZE = 500
+
+# Colunas gravadas por save_consumption/save_optimization (binds dos INSERTs)
+CONSUMPTION_COLUMNS = ['timestamp', 'consumption', 'cost', 'source', 'equipment']
+OPTIMIZATION_COLUMNS = [
+    'timestamp', 'tipo', 'valor_anterior', 'valor_otimizado',
+    'economia_estimada', 'recomendacao'
+]
+
+CONSUMPTION_INSERT = """
+INSERT INTO consumption_history (
+    id,
+    timestamp,
+    consumption,
+    cost,
+    source,
+    equipment
+) VALUES (
+    seq_consumption.NEXTVAL,
+    :timestamp,
+    :consumption,
+    :cost,
+    :source,
+    :equipment
+)
+"""
+
+OPTIMIZATION_INSERT = """
+INSERT INTO optimization_results (
+    id,
+    timestamp,
+    tipo,
+    valor_anterior,
+    valor_otimizado,
+    economia_estimada,
+    recomendacao
+) VALUES (
+    seq_optimization.NEXTVAL,
+    :timestamp,
+    :tipo,
+    :valor_anterior,
+    :valor_otimizado,
+    :economia_estimada,
+    :recomendacao
+)
+"""
+
+CONSUMPTION_RANGE_QUERY = """
+SELECT 
+    source,
+    consumption as value,
+    timestamp,
+    cost,
+    equipment
+FROM consumption_history 
+WHERE timestamp >= :start_ts
+  AND timestamp < :end_ts
+ORDER BY timestamp
+"""
+
+def _bind_params(data: Dict[str, Any], columns: List[str]) -> Dict[str, Any]:
+    """Seleciona os binds do INSERT (chaves extras, como dados do sensor, são ignoradas)"""
+    return {column: data.get(column) for column in columns}
 
 class OracleConnection:
     """Gerencia conexão com Oracle"""
     
-    def __init__(self):
-        """Inicializa conexão"""
+    def __init__(
+        self,
+        local_store: Optional[LocalStore] = None,
+        offline: bool = False,
+        query_cache: Optional[QueryCache] = None
+    ):
+        """Inicializa conexão
+        
+        local_store: base local que responde às consultas no modo offline.
+        offline: inicia diretamente em modo offline, sem tentar conectar.
+        query_cache: cache de resultados (padrão: LRU em memória).
+        """
         logging.debug("Iniciando configuração da conexão Oracle")
+        self.local_store = local_store
+        self.query_cache = query_cache or QueryCache()
+        
+        # Reconexão em segundo plano (connect_async): callback e tentativas em andamento
+        self._on_online = None
+        self._connect_stop = None
+        self._connect_lock = Lock()
+        
+        # Troca da conexão (thread de conexão) x uso pelas consultas (thread da interface)
+        self._connection_lock = RLock()
         
         try:
             # Carrega variáveis de ambiente
@@ -43,6 +152,12 @@ class OracleConnection:
             # Inicializa conexão como None e modo offline como False
             self.connection = None
             self._offline_mode = False
+            self._client_ready = False
+            
+            if offline:
+                logging.info("Iniciando em modo offline")
+                self._offline_mode = True
+                return
             
             # Verifica credenciais
             if not all([self.user, self.password, self.dsn]):
@@ -51,15 +166,9 @@ class OracleConnection:
                 return
             
             # Configura cliente Oracle
-            if self.oracle_client_path:
-                try:
-                    logging.debug(f"Inicializando cliente Oracle em: {self.oracle_client_path}")
-                    oracledb.init_oracle_client(lib_dir=self.oracle_client_path)
-                    logging.debug("Cliente Oracle inicializado")
-                except Exception as e:
-                    logging.error(f"Erro ao inicializar cliente Oracle: {str(e)}")
-                    self._offline_mode = True
-                    return
+            if not self._init_client():
+                self._offline_mode = True
+                return
             
             # Testa conexão inicial
             if not self.test_connection():
@@ -70,6 +179,147 @@ class OracleConnection:
             logging.error(f"Erro na inicialização: {str(e)}")
             self._offline_mode = True
     
+    @property
+    def online(self) -> bool:
+        """Indica se as consultas vão ao Oracle (fora do modo offline)"""
+        return not self._offline_mode
+    
+    def _init_client(self) -> bool:
+        """Inicializa o cliente Oracle (thick) uma única vez, se configurado"""
+        if not self.oracle_client_path or self._client_ready:
+            return True
+        try:
+            logging.debug(f"Inicializando cliente Oracle em: {self.oracle_client_path}")
+            oracledb.init_oracle_client(lib_dir=self.oracle_client_path)
+            self._client_ready = True
+            logging.debug("Cliente Oracle inicializado")
+            return True
+        except Exception as e:
+            logging.error(f"Erro ao inicializar cliente Oracle: {str(e)}")
+            return False
+    
+    def go_online(self) -> bool:
+        """Abre a conexão e sai do modo offline
+        
+        A sessão aberta é a usada pelas consultas (um único handshake). Em
+        caso de falha a conexão continua em modo offline.
+        """
+        if not all([self.user, self.password, self.dsn]):
+            logging.warning("Credenciais incompletas")
+            return False
+        if not self._init_client():
+            return False
+        
+        try:
+            connection = oracledb.connect(
+                user=self.user,
+                password=self.password,
+                dsn=self.dsn
+            )
+        except Exception as e:
+            logging.warning(f"Falha ao conectar: {str(e)}")
+            return False
+        
+        with self._connection_lock:
+            self.disconnect()
+            self.connection = connection
+            self._offline_mode = False
+            logging.info("Conexão estabelecida - modo online")
+            self.sync_pending()
+        return True
+    
+    def sync_pending(self, batch_size: int = SYNC_BATCH_SIZE) -> int:
+        """Envia ao Oracle os registros gravados na base local em modo offline
+        
+        Cada lote é marcado como sincronizado só depois do commit no Oracle;
+        em caso de falha o envio para e o restante fica pendente para a
+        próxima conexão. Retorna o número de registros enviados.
+        """
+        with self._connection_lock:
+            return self._sync_pending(batch_size)
+    
+    def _sync_pending(self, batch_size: int) -> int:
+        """Envia os lotes pendentes (com a conexão travada)"""
+        if self._offline_mode or self.local_store is None:
+            return 0
+        
+        sent = 0
+        for table, statement, columns, pending in [
+            ('consumption_history', CONSUMPTION_INSERT, CONSUMPTION_COLUMNS,
+             self.local_store.get_pending_consumption),
+            ('optimization_results', OPTIMIZATION_INSERT, OPTIMIZATION_COLUMNS,
+             self.local_store.get_pending_optimizations)
+        ]:
+            while True:
+                df = pending(batch_size)
+                if df.empty:
+                    break
+                
+                rows = df[columns].astype(object).where(df[columns].notna(), None)
+                if not self._execute_many(statement, rows.to_dict('records')):
+                    logging.warning(f"Sincronização interrompida: {sent} registros enviados")
+                    return sent
+                
+                self.local_store.mark_synced(df['id'], table)
+                sent += len(df)
+        
+        if sent:
+            logging.info(f"{sent} registros da base local sincronizados com o Oracle")
+        return sent
+    
+    def connect_async(
+        self,
+        on_online: Optional[Callable[[], None]] = None,
+        max_attempts: Optional[int] = None
+    ) -> Event:
+        """Conecta em segundo plano com espera exponencial entre tentativas
+        
+        A conexão segue em modo offline (base local) até uma tentativa dar
+        certo; como os serviços compartilham esta instância, passam a
+        consultar o Oracle a partir daí. on_online é chamado na thread de
+        conexão e guardado para as reconexões disparadas por connect().
+        Retorna o Event que interrompe as tentativas (o das tentativas já em
+        andamento, se houver).
+        """
+        with self._connect_lock:
+            if on_online is not None:
+                self._on_online = on_online
+            if self._connect_stop is not None:
+                return self._connect_stop
+            stop = self._connect_stop = Event()
+        
+        def finish():
+            # Libera novas tentativas (uma queda durante on_online já reconecta)
+            with self._connect_lock:
+                if self._connect_stop is stop:
+                    self._connect_stop = None
+        
+        def run():
+            delay = CONNECT_RETRY_INITIAL
+            attempt = 0
+            while not stop.is_set():
+                attempt += 1
+                if self.go_online():
+                    finish()
+                    if self._on_online is not None:
+                        try:
+                            self._on_online()
+                        except Exception as e:
+                            logging.error(f"Erro ao ativar modo online: {str(e)}")
+                    return
+                
+                if max_attempts is not None and attempt >= max_attempts:
+                    logging.warning(f"Conexão não estabelecida após {attempt} tentativas")
+                    break
+                
+                logging.info(f"Nova tentativa de conexão em {delay:.0f}s")
+                stop.wait(delay)
+                delay = min(delay * 2, CONNECT_RETRY_MAX)
+            finish()
+        
+        Thread(target=run, name='oracle-connect', daemon=True).start()
+        return stop
+    
     def test_connection(self) -> bool:
         """Testa conexão com o banco"""
         if not all([self.user, self.password, self.dsn]):
@@ -98,43 +348,78 @@ class OracleConnection:
             return False
     
     def connect(self) -> bool:
-        """Estabelece conexão"""
-        if self._offline_mode:
-            return False
+        """Estabelece conexão
+        
+        Se a conexão cair, entra em modo offline e volta a tentar em segundo
+        plano (connect_async), chamando o mesmo on_online ao reconectar.
+        """
+        with self._connection_lock:
+            if self._offline_mode:
+                return False
+            
+            logging.debug("Tentando estabelecer conexão")
+            try:
+                if not self.connection:
+                    logging.debug("Criando nova conexão")
+                    self.connection = oracledb.connect(
+                        user=self.user,
+                        password=self.password,
+                        dsn=self.dsn
+                    )
+                    logging.info("Conexão estabelecida")
+                elif not self.connection.is_healthy():
+                    self._handle_connection_loss("conexão não está saudável")
+                    return False
+                return True
             
-        logging.debug("Tentando estabelecer conexão")
+            except Exception as e:
+                logging.error(f"Erro ao conectar: {str(e)}")
+                self._handle_connection_loss(e)
+                return False
+    
+    def _is_connection_lost(self, error: Exception) -> bool:
+        """Indica se o erro (ou o estado da conexão) mostra que a conexão caiu"""
+        message = str(error)
+        if any(code in message for code in CONNECTION_LOST_ERRORS):
+            return True
         try:
-            if not self.connection:
-                logging.debug("Criando nova conexão")
-                self.connection = oracledb.connect(
-                    user=self.user,
-                    password=self.password,
-                    dsn=self.dsn
-                )
-                logging.info("Conexão estabelecida")
+            return self.connection is not None and not self.connection.is_healthy()
+        except Exception:
             return True
-                
-        except Exception as e:
-            logging.error(f"Erro ao conectar: {str(e)}")
-            self.connection = None
+    
+    def _handle_connection_loss(self, error) -> None:
+        """Descarta a conexão, entra em modo offline e reconecta em segundo plano"""
+        with self._connection_lock:
+            logging.warning(f"Conexão perdida: {str(error)} - modo offline")
+            self.disconnect()
             self._offline_mode = True
-            return False
+        self.connect_async()
     
     def disconnect(self) -> None:
         """Encerra conexão"""
-        if self.connection:
+        with self._connection_lock:
+            if self.connection:
+                try:
+                    self.connection.close()
+                    logging.info("Conexão encerrada")
+                except Exception as e:
+                    logging.error(f"Erro ao desconectar: {str(e)}")
+                finally:
+                    self.connection = None
+    
+    @staticmethod
+    def _close_cursor(cursor) -> None:
+        """Fecha o cursor; com a conexão perdida o fechamento também falha"""
+        if cursor:
             try:
-                self.connection.close()
-                logging.info("Conexão encerrada")
+                cursor.close()
             except Exception as e:
-                logging.error(f"Erro ao desconectar: {str(e)}")
-            finally:
-                self.connection = None
+                logging.debug(f"Erro ao fechar cursor: {str(e)}")
     
-    def _generate_mock_data(self, days: int = 30) -> pd.DataFrame:
+    def _generate_mock_data(self, days: float = 30, end: Optional[datetime] = None) -> pd.DataFrame:
         """Gera dados mock para modo offline"""
-        now = datetime.now()
-        dates = [now - timedelta(hours=i) for i in range(days * 24)]
+        now = end or datetime.now()
+        dates = [now - timedelta(hours=i) for i in range(int(days * 24))]
         sources = ['Rede', 'Solar', 'Bateria']
         base_values = {'Rede': 500.0, 'Solar': 250.0, 'Bateria': 100.0}
         
@@ -162,69 +447,194 @@ class OracleConnection:
         
         return pd.DataFrame(data)
     
-    def execute_query(self, query: str, params: Dict = None) -> pd.DataFrame:
-        """Executa query e retorna DataFrame"""
+    def _generate_mock_tariffs(self) -> pd.DataFrame:
+        """Gera tarifas mock para modo offline"""
+        return pd.DataFrame({
+            'source': ['Energia', 'Transmissão', 'Distribuição', 'Encargos'],
+            'value': [0.35, 0.15, 0.10, 0.05],
+            'distribuidora': ['ENEL'] * 4,
+            'unidade': ['R$/kWh'] * 4
+        })
+    
+    def _generate_mock_efficiency(self) -> pd.DataFrame:
+        """Gera métricas de eficiência mock para modo offline"""
+        now = datetime.now()
+        dates = [now - timedelta(days=i*30) for i in range(12)]
+        
+        base = 70  # Eficiência base de 70%
+        trend = np.linspace(0, 15, len(dates))  # Tendência de melhoria
+        noise = np.random.normal(0, 2, len(dates))  # Variação mensal
+        values = base + trend + noise
+        values = np.clip(values, 0, 100)  # Limita entre 0 e 100%
+        
+        return pd.DataFrame({
+            'mes': dates,
+            'valor_medio': values,
+            'variacao_anterior': np.diff(values, prepend=values[0]),
+            'ranking_eficiencia': np.random.randint(1, 100, len(dates))
+        })
+    
+    def _generate_mock_renewables(self) -> pd.DataFrame:
+        """Gera dados de fontes renováveis mock para modo offline"""
+        now = datetime.now()
+        dates = [now - timedelta(days=i*30) for i in range(12)]
+        sources = ['Solar', 'Eólica', 'Biomassa']
+        
+        data = []
+        for dt in dates:
+            for source in sources:
+                base = 100.0 if source == 'Solar' else (
+                    75.0 if source == 'Eólica' else 50.0
+                )
+                value = base * (1 + np.random.normal(0, 0.1))
+                data.append({
+                    'source': source,
+                    'value': value,
+                    'mes': dt
+                })
+        
+        return pd.DataFrame(data)
+    
+    def _offline_query(
+        self,
+        query: Callable[[LocalStore], pd.DataFrame],
+        fallback: Callable[[], pd.DataFrame]
+    ) -> pd.DataFrame:
+        """Responde consulta offline pela base local, ou com dados mock se vazia"""
+        if self.local_store is not None:
+            try:
+                df = query(self.local_store)
+                if not df.empty:
+                    return df
+            except Exception as e:
+                logging.error(f"Erro na base local: {str(e)}")
+        return fallback()
+    
+    def execute_query(self, query: str, params: Dict = None, ttl: Optional[float] = None) -> pd.DataFrame:
+        """Executa query e retorna DataFrame
+        
+        Com ttl (segundos), o resultado passa pelo cache de consultas.
+        """
         if self._offline_mode:
             logging.warning("Operação ignorada - modo offline")
             return pd.DataFrame()
-            
-        cursor = None
-        try:
-            if not self.connect():
-                return pd.DataFrame()
+        
+        if ttl:
+            return self.query_cache.get_or_load(
+                query, params, ttl, lambda: self._fetch_query(query, params)
+            )
+        
+        df = self._fetch_query(query, params)
+        return pd.DataFrame() if df is None else df
+    
+    def _fetch_query(self, query: str, params: Dict = None) -> Optional[pd.DataFrame]:
+        """Executa query no banco; retorna None em caso de erro"""
+        with self._connection_lock:
+            cursor = None
+            try:
+                if not self.connect():
+                    return None
                 
-            cursor = self.connection.cursor()
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            
-            columns = [desc[0].lower() for desc in cursor.description]
-            data = cursor.fetchall()
-            return pd.DataFrame(data, columns=columns)
+                cursor = self.connection.cursor()
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                
+                columns = [desc[0].lower() for desc in cursor.description]
+                data = cursor.fetchall()
+                return pd.DataFrame(data, columns=columns)
             
-        except Exception as e:
-            logging.error(f"Erro na query: {str(e)}")
-            return pd.DataFrame()
+            except Exception as e:
+                logging.error(f"Erro na query: {str(e)}")
+                if self._is_connection_lost(e):
+                    self._handle_connection_loss(e)
+                return None
             
-        finally:
-            if cursor:
-                cursor.close()
+            finally:
+                self._close_cursor(cursor)
     
     def execute_dml(self, statement: str, params: Dict = None) -> bool:
         """Executa DML (insert, update, delete)"""
         if self._offline_mode:
             logging.warning("Operação ignorada - modo offline")
             return False
+        
+        with self._connection_lock:
+            cursor = None
+            try:
+                if not self.connect():
+                    return False
+                
+                cursor = self.connection.cursor()
+                if params:
+                    cursor.execute(statement, params)
+                else:
+                    cursor.execute(statement)
+                
+                self.connection.commit()
+                self._invalidate_written(statement)
+                return True
             
-        cursor = None
-        try:
-            if not self.connect():
+            except Exception as e:
+                logging.error(f"Erro no DML: {str(e)}")
+                self._rollback_or_drop(e)
                 return False
+            
+            finally:
+                self._close_cursor(cursor)
+    
+    def _execute_many(self, statement: str, rows: List[Dict[str, Any]]) -> bool:
+        """Executa DML para várias linhas em uma única transação"""
+        with self._connection_lock:
+            cursor = None
+            try:
+                if not self.connect():
+                    return False
                 
-            cursor = self.connection.cursor()
-            if params:
-                cursor.execute(statement, params)
-            else:
-                cursor.execute(statement)
+                cursor = self.connection.cursor()
+                cursor.executemany(statement, rows)
+                self.connection.commit()
+                self._invalidate_written(statement)
+                return True
             
-            self.connection.commit()
-            return True
+            except Exception as e:
+                logging.error(f"Erro no DML em lote: {str(e)}")
+                self._rollback_or_drop(e)
+                return False
             
+            finally:
+                self._close_cursor(cursor)
+    
+    def _rollback_or_drop(self, error: Exception) -> None:
+        """Desfaz a transação; se a conexão caiu, entra em modo offline"""
+        if self._is_connection_lost(error):
+            self._handle_connection_loss(error)
+            return
+        if self.connection is None:
+            return
+        try:
+            self.connection.rollback()
         except Exception as e:
-            if self.connection:
-                self.connection.rollback()
-            logging.error(f"Erro no DML: {str(e)}")
-            return False
-            
-        finally:
-            if cursor:
-                cursor.close()
+            logging.error(f"Erro no rollback: {str(e)}")
+            if self._is_connection_lost(e):
+                self._handle_connection_loss(e)
+    
+    def _invalidate_written(self, statement: str) -> None:
+        """Invalida consultas em cache afetadas por um DML"""
+        self.query_cache.invalidate_statement(statement)
+        if 'consumption_history' in tables_written(statement):
+            # Rollups são atualizados no commit (fast refresh on commit)
+            for _, table in ROLLUPS:
+                self.query_cache.invalidate_table(table)
     
     def get_consumption_history(self, days: int = 30) -> pd.DataFrame:
         """Obtém histórico de consumo"""
         if self._offline_mode:
-            return self._generate_mock_data(days)
+            return self._offline_query(
+                lambda store: store.get_consumption_history(days),
+                lambda: self._generate_mock_data(days)
+            )
             
         query = """
         SELECT 
@@ -244,16 +654,80 @@ class OracleConnection:
             
         return df
     
+    def _generate_mock_range(self, start: datetime, end: datetime) -> pd.DataFrame:
+        """Gera dados mock horários no intervalo [start, end)"""
+        end = min(end, datetime.now())
+        hours = max(int((end - start).total_seconds() // 3600), 0)
+        if hours == 0:
+            return pd.DataFrame(columns=['source', 'value', 'timestamp', 'cost', 'equipment'])
+        
+        df = self._generate_mock_data(days=hours / 24, end=end - timedelta(hours=1))
+        df = df[(df['timestamp'] >= start) & (df['timestamp'] < end)]
+        return df.sort_values('timestamp').reset_index(drop=True)
+    
+    def get_consumption_range(self, start: datetime, end: datetime) -> pd.DataFrame:
+        """Obtém histórico de consumo no intervalo [start, end)
+        
+        O filtro é feito no banco para usar idx_consumption_timestamp,
+        evitando trazer registros fora do período solicitado.
+        """
+        if self._offline_mode:
+            return self._offline_query(
+                lambda store: store.get_consumption_range(start, end),
+                lambda: self._generate_mock_range(start, end)
+            )
+        
+        return self.execute_query(CONSUMPTION_RANGE_QUERY, {'start_ts': start, 'end_ts': end})
+    
+    def read_consumption_range(self, start: datetime, end: datetime) -> pd.DataFrame:
+        """Lê histórico de consumo no intervalo [start, end) sem dados substitutos
+        
+        Ao contrário de get_consumption_range, falhas da consulta (Oracle ou
+        base local) geram exceção em vez de DataFrame vazio ou mock; usado
+        pela exportação, que não pode gravar arquivo incompleto.
+        """
+        if self._offline_mode:
+            if self.local_store is None:
+                raise ConnectionError("Banco indisponível e sem base local")
+            return self.local_store.get_consumption_range(start, end)
+        
+        df = self._fetch_query(CONSUMPTION_RANGE_QUERY, {'start_ts': start, 'end_ts': end})
+        if df is None:
+            raise ConnectionError(f"Falha ao ler consumo de {start} a {end}")
+        return df
+    
+    def get_consumption_rollup(
+        self,
+        start: datetime,
+        end: datetime,
+        freq: str = 'h',
+        by_equipment: bool = False
+    ) -> pd.DataFrame:
+        """Obtém consumo agregado por fonte no intervalo [start, end)
+        
+        Lê a materialized view de rollup mais grossa que atende à frequência
+        pedida ('h', 'D', 'MS'), sem varrer consumption_history.
+        """
+        if self._offline_mode:
+            return self._offline_query(
+                lambda store: store.get_consumption_rollup(start, end, freq, by_equipment),
+                lambda: rollup_frame(self._generate_mock_range(start, end), freq, by_equipment)
+            )
+        
+        table = select_rollup(start, end, freq)
+        df = self.execute_query(
+            rollup_query(table, by_equipment),
+            {'start_ts': start, 'end_ts': end}
+        )
+        return finish_rollup(df, table, freq, by_equipment)
+    
     def get_current_tariffs(self) -> pd.DataFrame:
         """Obtém tarifas atuais"""
         if self._offline_mode:
-            # Dados mock de tarifas
-            return pd.DataFrame({
-                'source': ['Energia', 'Transmissão', 'Distribuição', 'Encargos'],
-                'value': [0.35, 0.15, 0.10, 0.05],
-                'distribuidora': ['ENEL'] * 4,
-                'unidade': ['R$/kWh'] * 4
-            })
+            return self._offline_query(
+                lambda store: store.get_current_tariffs(),
+                self._generate_mock_tariffs
+            )
         
         query = """
         SELECT 
@@ -264,36 +738,115 @@ class OracleConnection:
         FROM tarifas_vigentes
         """
         
-        df = self.execute_query(query)
+        df = self.execute_query(query, ttl=TARIFFS_TTL)
         if df.empty:
-            return pd.DataFrame({
-                'source': ['Energia', 'Transmissão', 'Distribuição', 'Encargos'],
-                'value': [0.35, 0.15, 0.10, 0.05],
-                'distribuidora': ['ENEL'] * 4,
-                'unidade': ['R$/kWh'] * 4
-            })
+            return self._generate_mock_tariffs()
         
         return df
     
+    def get_tariff_vigencias(self, keys: Optional[List[tuple]] = None) -> Optional[pd.DataFrame]:
+        """Obtém vigências da tabela tarifas para o índice de tarifas
+        
+        keys: tuplas (distribuidora, componente, subgrupo, modalidade) a
+        recarregar; sem keys, retorna todas as vigências. Retorna None se a
+        consulta falhar (ou em modo offline), para não confundir erro com
+        ausência de vigências.
+        """
+        columns = ['distribuidora', 'componente', 'subgrupo', 'modalidade', 'inicio', 'fim', 'valor']
+        if self._offline_mode:
+            logging.warning("Vigências de tarifas indisponíveis - modo offline")
+            return None
+        
+        query = """
+        SELECT
+            d.nome as distribuidora,
+            c.descricao as componente,
+            s.codigo as subgrupo,
+            m.nome as modalidade,
+            t.data_inicio_vigencia as inicio,
+            t.data_fim_vigencia as fim,
+            t.valor
+        FROM tarifas t
+        JOIN distribuidoras d ON t.id_distribuidora = d.id_distribuidora
+        JOIN componentes_tarifarios c ON t.id_componente = c.id_componente
+        JOIN subgrupos_tarifarios s ON t.id_subgrupo = s.id_subgrupo
+        JOIN modalidades_tarifarias m ON t.id_modalidade = m.id_modalidade
+        """
+        if keys is None:
+            return self._fetch_query(query)
+        
+        # Lista IN de tuplas limitada a 1000 expressões por consulta
+        frames = []
+        for offset in range(0, len(keys), TARIFF_KEYS_PER_QUERY):
+            chunk = keys[offset:offset + TARIFF_KEYS_PER_QUERY]
+            binds = ', '.join(f"(:d{i}, :c{i}, :s{i}, :m{i})" for i in range(len(chunk)))
+            params = {}
+            for i, (distribuidora, componente, subgrupo, modalidade) in enumerate(chunk):
+                params.update({
+                    f'd{i}': distribuidora,
+                    f'c{i}': componente,
+                    f's{i}': subgrupo,
+                    f'm{i}': modalidade
+                })
+            df = self._fetch_query(
+                f"{query} WHERE (d.nome, c.descricao, s.codigo, m.nome) IN ({binds})",
+                params
+            )
+            if df is None:
+                return None
+            frames.append(df)
+        
+        frames = [df for df in frames if not df.empty]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+    
+    def get_tariff_signatures(self) -> Optional[pd.DataFrame]:
+        """Obtém assinatura (quantidade e hash das vigências) de cada grupo de tarifas
+        
+        Retorna None se a consulta falhar (ou em modo offline).
+        """
+        if self._offline_mode:
+            return None
+        
+        query = """
+        SELECT
+            d.nome as distribuidora,
+            c.descricao as componente,
+            s.codigo as subgrupo,
+            m.nome as modalidade,
+            COUNT(*) as total,
+            SUM(ORA_HASH(
+                TO_CHAR(t.data_inicio_vigencia, 'YYYYMMDD') || '|' ||
+                TO_CHAR(t.data_fim_vigencia, 'YYYYMMDD') || '|' ||
+                TO_CHAR(t.valor)
+            )) as assinatura
+        FROM tarifas t
+        JOIN distribuidoras d ON t.id_distribuidora = d.id_distribuidora
+        JOIN componentes_tarifarios c ON t.id_componente = c.id_componente
+        JOIN subgrupos_tarifarios s ON t.id_subgrupo = s.id_subgrupo
+        JOIN modalidades_tarifarias m ON t.id_modalidade = m.id_modalidade
+        GROUP BY d.nome, c.descricao, s.codigo, m.nome
+        """
+        
+        return self._fetch_query(query)
+    
+    def get_tariff_load_mark(self) -> Optional[datetime]:
+        """Obtém instante da última carga do ETL de tarifas (etl_controle_cargas)"""
+        if self._offline_mode:
+            return None
+        
+        df = self.execute_query("SELECT MAX(data_carga) as data_carga FROM etl_controle_cargas")
+        if df.empty:
+            return None
+        
+        return df['data_carga'].iloc[0]
+    
     def get_efficiency_metrics(self) -> pd.DataFrame:
         """Obtém métricas de eficiência"""
         if self._offline_mode:
-            # Gera dados mock de eficiência
-            now = datetime.now()
-            dates = [now - timedelta(days=i*30) for i in range(12)]
-            
-            base = 70  # Eficiência base de 70%
-            trend = np.linspace(0, 15, len(dates))  # Tendência de melhoria
-            noise = np.random.normal(0, 2, len(dates))  # Variação mensal
-            values = base + trend + noise
-            values = np.clip(values, 0, 100)  # Limita entre 0 e 100%
-            
-            return pd.DataFrame({
-                'mes': dates,
-                'valor_medio': values,
-                'variacao_anterior': np.diff(values, prepend=values[0]),
-                'ranking_eficiencia': np.random.randint(1, 100, len(dates))
-            })
+            return self._offline_query(
+                lambda store: store.get_efficiency_metrics(),
+                self._generate_mock_efficiency
+            )
         
         query = """
         SELECT 
@@ -305,34 +858,19 @@ class OracleConnection:
         ORDER BY mes DESC
         """
         
-        df = self.execute_query(query)
+        df = self.execute_query(query, ttl=EFFICIENCY_TTL)
         if df.empty:
-            return self.get_efficiency_metrics()  # Retorna dados mock
+            return self._generate_mock_efficiency()
         
         return df
     
     def get_renewable_sources(self) -> pd.DataFrame:
         """Obtém dados de fontes renováveis"""
         if self._offline_mode:
-            # Dados mock de fontes renováveis
-            now = datetime.now()
-            dates = [now - timedelta(days=i*30) for i in range(12)]
-            sources = ['Solar', 'Eólica', 'Biomassa']
-            
-            data = []
-            for dt in dates:
-                for source in sources:
-                    base = 100.0 if source == 'Solar' else (
-                        75.0 if source == 'Eólica' else 50.0
-                    )
-                    value = base * (1 + np.random.normal(0, 0.1))
-                    data.append({
-                        'source': source,
-                        'value': value,
-                        'mes': dt
-                    })
-            
-            return pd.DataFrame(data)
+            return self._offline_query(
+                lambda store: store.get_renewable_sources(),
+                self._generate_mock_renewables
+            )
         
         query = """
         SELECT 
@@ -343,63 +881,41 @@ class OracleConnection:
         ORDER BY mes DESC
         """
         
-        df = self.execute_query(query)
+        df = self.execute_query(query, ttl=RENEWABLES_TTL)
         if df.empty:
-            return self.get_renewable_sources()  # Retorna dados mock
+            return self._generate_mock_renewables()
         
         return df
     
     def save_consumption(self, data: Dict[str, Any]) -> bool:
         """Salva leitura de consumo"""
         if self._offline_mode:
+            if self.local_store is not None:
+                return self.local_store.save_consumption(data)
             logging.info("Dados salvos em modo offline (simulado)")
             return True
             
-        statement = """
-        INSERT INTO consumption_history (
-            id,
-            timestamp,
-            consumption,
-            cost,
-            source,
-            equipment
-        ) VALUES (
-            seq_consumption.NEXTVAL,
-            :timestamp,
-            :consumption,
-            :cost,
-            :source,
-            :equipment
-        )
-        """
+        if self.execute_dml(CONSUMPTION_INSERT, _bind_params(data, CONSUMPTION_COLUMNS)):
+            return True
         
-        return self.execute_dml(statement, data)
+        # Conexão caiu durante o INSERT: fica pendente na base local
+        if self._offline_mode and self.local_store is not None:
+            return self.local_store.save_consumption(data)
+        return False
     
     def save_optimization(self, data: Dict[str, Any]) -> bool:
         """Salva resultado de otimização"""
         if self._offline_mode:
+            if self.local_store is not None:
+                return self.local_store.save_optimization(data)
             logging.info("Otimização salva em modo offline (simulado)")
             return True
             
-        statement = """
-        INSERT INTO optimization_results (
-            id,
-            timestamp,
-            tipo,
-            valor_anterior,
-            valor_otimizado,
-            economia_estimada,
-            recomendacao
-        ) VALUES (
-            seq_optimization.NEXTVAL,
-            :timestamp,
-            :tipo,
-            :valor_anterior,
-            :valor_otimizado,
-            :economia_estimada,
-            :recomendacao
-        )
-        """
+        if self.execute_dml(OPTIMIZATION_INSERT, _bind_params(data, OPTIMIZATION_COLUMNS)):
+            return True
         
-        return self.execute_dml(statement, data)
+        # Conexão caiu durante o INSERT: fica pendente na base local
+        if self._offline_mode and self.local_store is not None:
+            return self.local_store.save_optimization(data)
+        return False
 
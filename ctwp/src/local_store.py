@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Armazenamento analítico local (SQLite) para o modo offline
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2023
+"""
+
+import logging
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional
+import pandas as pd
+from rollups import finish_rollup, rollup_query, select_rollup
+
+# Espelho local das tabelas de cds/scripts/create_tables.sql usadas pela aplicação
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS consumption_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT NOT NULL,
+        consumption REAL NOT NULL CHECK (consumption >= 0),
+        cost REAL CHECK (cost >= 0),
+        source TEXT NOT NULL,
+        equipment TEXT,
+        synced INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS tarifas_vigentes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        distribuidora TEXT NOT NULL,
+        componente TEXT NOT NULL,
+        unidade TEXT NOT NULL,
+        valor REAL NOT NULL CHECK (valor >= 0),
+        data_vigencia TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS metricas_eficiencia (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        mes TEXT,
+        valor_medio REAL,
+        variacao_anterior REAL,
+        ranking_eficiencia INTEGER CHECK (ranking_eficiencia BETWEEN 1 AND 100)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS fontes_renovaveis (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        componente TEXT,
+        valor_total REAL CHECK (valor_total >= 0),
+        mes TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS optimization_results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT NOT NULL,
+        tipo TEXT NOT NULL,
+        valor_anterior REAL NOT NULL,
+        valor_otimizado REAL NOT NULL,
+        economia_estimada REAL CHECK (economia_estimada >= 0),
+        recomendacao TEXT,
+        synced INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_consumption_timestamp ON consumption_history(timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_consumption_synced ON consumption_history(synced)",
+    "CREATE INDEX IF NOT EXISTS idx_tarifas_vigentes_comp ON tarifas_vigentes(componente)",
+    "CREATE INDEX IF NOT EXISTS idx_metricas_mes ON metricas_eficiencia(mes)",
+    "CREATE INDEX IF NOT EXISTS idx_renovaveis_mes ON fontes_renovaveis(mes)",
+    "CREATE INDEX IF NOT EXISTS idx_optimization_timestamp ON optimization_results(timestamp)"
+]
+
+# Formato do início do intervalo de cada rollup (strftime do SQLite)
+ROLLUP_BUCKETS = {
+    'mv_consumo_horario': '%Y-%m-%d %H:00:00',
+    'mv_consumo_diario': '%Y-%m-%d 00:00:00',
+    'mv_consumo_mensal': '%Y-%m-01 00:00:00'
+}
+
+def _rollup_schema(table: str, bucket: str) -> List[str]:
+    """Tabela de rollup e gatilhos que a mantêm a cada leitura
+
+    Alterações de leituras (UPDATE) retiram os valores antigos do intervalo
+    original e somam os novos; marcar como sincronizado não dispara o gatilho.
+    """
+    key = f"strftime('{bucket}', {{row}}.timestamp)"
+    return [
+        f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            bucket TEXT NOT NULL,
+            source TEXT NOT NULL,
+            equipment TEXT NOT NULL DEFAULT '',
+            consumo_total REAL NOT NULL,
+            custo_total REAL NOT NULL,
+            total_registros INTEGER NOT NULL,
+            PRIMARY KEY (bucket, source, equipment)
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_insert
+        AFTER INSERT ON consumption_history
+        BEGIN
+            INSERT INTO {table} VALUES (
+                {key.format(row='NEW')}, NEW.source, COALESCE(NEW.equipment, ''),
+                NEW.consumption, COALESCE(NEW.cost, 0), 1
+            )
+            ON CONFLICT (bucket, source, equipment) DO UPDATE SET
+                consumo_total = consumo_total + excluded.consumo_total,
+                custo_total = custo_total + excluded.custo_total,
+                total_registros = total_registros + 1;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_delete
+        AFTER DELETE ON consumption_history
+        BEGIN
+            UPDATE {table} SET
+                consumo_total = consumo_total - OLD.consumption,
+                custo_total = custo_total - COALESCE(OLD.cost, 0),
+                total_registros = total_registros - 1
+            WHERE bucket = {key.format(row='OLD')}
+              AND source = OLD.source
+              AND equipment = COALESCE(OLD.equipment, '');
+            DELETE FROM {table}
+            WHERE bucket = {key.format(row='OLD')}
+              AND source = OLD.source
+              AND equipment = COALESCE(OLD.equipment, '')
+              AND total_registros <= 0;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_update
+        AFTER UPDATE OF timestamp, consumption, cost, source, equipment
+        ON consumption_history
+        BEGIN
+            UPDATE {table} SET
+                consumo_total = consumo_total - OLD.consumption,
+                custo_total = custo_total - COALESCE(OLD.cost, 0),
+                total_registros = total_registros - 1
+            WHERE bucket = {key.format(row='OLD')}
+              AND source = OLD.source
+              AND equipment = COALESCE(OLD.equipment, '');
+            DELETE FROM {table}
+            WHERE bucket = {key.format(row='OLD')}
+              AND source = OLD.source
+              AND equipment = COALESCE(OLD.equipment, '')
+              AND total_registros <= 0;
+            INSERT INTO {table} VALUES (
+                {key.format(row='NEW')}, NEW.source, COALESCE(NEW.equipment, ''),
+                NEW.consumption, COALESCE(NEW.cost, 0), 1
+            )
+            ON CONFLICT (bucket, source, equipment) DO UPDATE SET
+                consumo_total = consumo_total + excluded.consumo_total,
+                custo_total = custo_total + excluded.custo_total,
+                total_registros = total_registros + 1;
+        END
+        """
+    ]
+
+# Tabelas com registros gerados offline, pendentes de envio ao Oracle
+SYNCED_TABLES = {'consumption_history', 'optimization_results'}
+
+# Fonte considerada não renovável nos agregados locais
+GRID_SOURCE = 'Rede'
+
+# Tarifas vigentes do cache Parquet: um único subgrupo/modalidade e apenas
+# componentes de energia (R$/MWh), convertidos para R$/kWh como no consumo
+TARIFF_SUBGROUP = 'B1'
+TARIFF_MODALITY = 'Convencional'
+TARIFF_BASE = 'Tarifa de Aplicação'
+ENERGY_UNIT = 'R$/MWh'
+TARIFF_UNIT = 'R$/kWh'
+
+def _to_text(value: Any) -> Optional[str]:
+    """Converte datas para texto ordenável (ISO 8601)"""
+    if value is None:
+        return None
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return str(value)
+
+class LocalStore:
+    """Base analítica local usada quando o Oracle não está acessível
+
+    Guarda leituras registradas offline (marcadas para sincronização),
+    recebe cargas de dados já processados (tarifas do ETL, snapshots do
+    Oracle) e responde às mesmas consultas do OracleConnection com
+    agregações reais em SQL.
+    """
+
+    def __init__(self, db_file: Path):
+        """Inicializa base local"""
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(exist_ok=True, parents=True)
+        self.lock = Lock()
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre conexão (uma por operação, segura entre threads)"""
+        return sqlite3.connect(str(self.db_file), timeout=10)
+
+    def _init_schema(self) -> None:
+        """Cria tabelas, índices e rollups (com carga inicial se vazios)"""
+        with self.lock, closing(self._connect()) as conn, conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+            for table, bucket in ROLLUP_BUCKETS.items():
+                for statement in _rollup_schema(table, bucket):
+                    conn.execute(statement)
+
+                if conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] == 0:
+                    conn.execute(f"""
+                        INSERT INTO {table}
+                        SELECT
+                            strftime('{bucket}', timestamp),
+                            source,
+                            COALESCE(equipment, ''),
+                            SUM(consumption),
+                            SUM(COALESCE(cost, 0)),
+                            COUNT(*)
+                        FROM consumption_history
+                        GROUP BY 1, 2, 3
+                    """)
+
+    def _query(self, query: str, params: Iterable = (), parse_dates: List[str] = None) -> pd.DataFrame:
+        """Executa consulta e retorna DataFrame"""
+        with closing(self._connect()) as conn:
+            return pd.read_sql_query(query, conn, params=tuple(params), parse_dates=parse_dates)
+
+    def save_consumption(self, data: Dict[str, Any]) -> bool:
+        """Registra leitura de consumo (pendente de sincronização)"""
+        try:
+            with self.lock, closing(self._connect()) as conn, conn:
+                conn.execute(
+                    """
+                    INSERT INTO consumption_history (
+                        timestamp, consumption, cost, source, equipment
+                    ) VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (
+                        _to_text(data.get('timestamp') or datetime.now()),
+                        data['consumption'],
+                        data.get('cost'),
+                        data['source'],
+                        data.get('equipment')
+                    )
+                )
+            return True
+        except Exception as e:
+            logging.error(f"Erro ao salvar leitura local: {str(e)}")
+            return False
+
+    def save_optimization(self, data: Dict[str, Any]) -> bool:
+        """Registra resultado de otimização (pendente de sincronização)"""
+        try:
+            with self.lock, closing(self._connect()) as conn, conn:
+                conn.execute(
+                    """
+                    INSERT INTO optimization_results (
+                        timestamp, tipo, valor_anterior, valor_otimizado,
+                        economia_estimada, recomendacao
+                    ) VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        _to_text(data.get('timestamp') or datetime.now()),
+                        data['tipo'],
+                        data['valor_anterior'],
+                        data['valor_otimizado'],
+                        data.get('economia_estimada'),
+                        data.get('recomendacao')
+                    )
+                )
+            return True
+        except Exception as e:
+            logging.error(f"Erro ao salvar otimização local: {str(e)}")
+            return False
+
+    def get_pending_consumption(self, limit: Optional[int] = None) -> pd.DataFrame:
+        """Obtém leituras ainda não enviadas ao Oracle"""
+        return self._query(
+            """
+            SELECT id, timestamp, consumption, cost, source, equipment
+            FROM consumption_history
+            WHERE synced = 0
+            ORDER BY id
+            LIMIT ?
+            """,
+            (-1 if limit is None else limit,),
+            parse_dates=['timestamp']
+        )
+
+    def get_pending_optimizations(self, limit: Optional[int] = None) -> pd.DataFrame:
+        """Obtém resultados de otimização ainda não enviados ao Oracle"""
+        return self._query(
+            """
+            SELECT
+                id, timestamp, tipo, valor_anterior, valor_otimizado,
+                economia_estimada, recomendacao
+            FROM optimization_results
+            WHERE synced = 0
+            ORDER BY id
+            LIMIT ?
+            """,
+            (-1 if limit is None else limit,),
+            parse_dates=['timestamp']
+        )
+
+    def mark_synced(self, ids: Iterable[int], table: str = 'consumption_history') -> None:
+        """Marca registros de uma tabela sincronizada como enviados"""
+        if table not in SYNCED_TABLES:
+            raise ValueError(f"Tabela sem sincronização: {table}")
+        with self.lock, closing(self._connect()) as conn, conn:
+            conn.executemany(
+                f"UPDATE {table} SET synced = 1 WHERE id = ?",
+                [(int(i),) for i in ids]
+            )
+
+    def load_table(self, table: str, df: pd.DataFrame, replace: bool = True) -> int:
+        """Carrega dados já processados (ETL, snapshot do Oracle) em uma tabela
+
+        As colunas do DataFrame devem seguir o esquema da tabela; datas são
+        gravadas como texto ISO para manter a ordenação. Dados carregados já
+        existem na origem e não ficam pendentes de sincronização.
+        """
+        if table in SYNCED_TABLES and 'synced' not in df.columns:
+            df = df.assign(synced=1)
+        columns = list(df.columns)
+        rows = [
+            tuple(_to_text(v) if isinstance(v, (datetime, pd.Timestamp)) else v for v in row)
+            for row in df.astype(object).where(df.notna(), None).itertuples(index=False)
+        ]
+
+        with self.lock, closing(self._connect()) as conn, conn:
+            if replace:
+                conn.execute(f"DELETE FROM {table}")
+            conn.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})",
+                rows
+            )
+
+        logging.info(f"{len(rows)} registros carregados na base local ({table})")
+        return len(rows)
+
+    def load_tariffs_from_parquet(
+        self,
+        directory: Path,
+        subgroup: str = TARIFF_SUBGROUP,
+        modality: str = TARIFF_MODALITY
+    ) -> int:
+        """Carrega tarifas vigentes do cache Parquet do ETL (cds/scripts)
+
+        Considera só a tarifa de aplicação do subgrupo/modalidade informados
+        e os componentes de energia (R$/MWh, gravados em R$/kWh): demanda
+        (R$/kW) e outros subgrupos não entram na média. Usa a vigência mais
+        recente de cada distribuidora/componente. Requer pyarrow; sem ele a
+        carga é ignorada.
+        """
+        try:
+            import pyarrow.dataset as ds
+        except ImportError:
+            logging.warning("pyarrow não instalado - tarifas do ETL não carregadas")
+            return 0
+
+        dataset = ds.dataset(str(directory), format='parquet', partitioning='hive')
+        df = dataset.to_table(
+            columns=[
+                'SigNomeAgente',
+                'DscComponenteTarifario',
+                'VlrComponenteTarifario',
+                'DatInicioVigencia'
+            ],
+            filter=(
+                (ds.field('DscSubGrupoTarifario') == subgroup)
+                & (ds.field('DscModalidadeTarifaria') == modality)
+                & (ds.field('DscBaseTarifaria') == TARIFF_BASE)
+                & (ds.field('DscUnidade') == ENERGY_UNIT)
+            )
+        ).to_pandas()
+        if df.empty:
+            logging.warning(f"Cache Parquet sem tarifas de energia {subgroup}/{modality}")
+            return 0
+
+        keys = ['SigNomeAgente', 'DscComponenteTarifario']
+        latest = df[df['DatInicioVigencia'] == df.groupby(keys)['DatInicioVigencia'].transform('max')]
+        tariffs = (
+            latest.groupby(keys, as_index=False)
+            .agg(valor=('VlrComponenteTarifario', 'mean'), data_vigencia=('DatInicioVigencia', 'max'))
+            .rename(columns={
+                'SigNomeAgente': 'distribuidora',
+                'DscComponenteTarifario': 'componente'
+            })
+        )
+        tariffs['valor'] = tariffs['valor'] / 1000
+        tariffs['unidade'] = TARIFF_UNIT
+        return self.load_table('tarifas_vigentes', tariffs)
+
+    def get_consumption_history(self, days: float = 30) -> pd.DataFrame:
+        """Obtém histórico de consumo dos últimos dias"""
+        return self.get_consumption_range(datetime.now() - timedelta(days=days), datetime.now())
+
+    def get_consumption_range(self, start: datetime, end: datetime) -> pd.DataFrame:
+        """Obtém histórico de consumo no intervalo [start, end)"""
+        return self._query(
+            """
+            SELECT
+                source,
+                consumption AS value,
+                timestamp,
+                cost,
+                equipment
+            FROM consumption_history
+            WHERE timestamp >= ?
+              AND timestamp < ?
+            ORDER BY timestamp
+            """,
+            (_to_text(start), _to_text(end)),
+            parse_dates=['timestamp']
+        )
+
+    def get_consumption_rollup(
+        self,
+        start: datetime,
+        end: datetime,
+        freq: str = 'h',
+        by_equipment: bool = False
+    ) -> pd.DataFrame:
+        """Obtém consumo agregado por fonte no intervalo [start, end)
+
+        Lê o rollup mais grosso que atende à frequência pedida ('h', 'D', 'MS').
+        """
+        table = select_rollup(start, end, freq)
+        df = self._query(
+            rollup_query(table, by_equipment, placeholder='?'),
+            (_to_text(start), _to_text(end)),
+            parse_dates=['timestamp']
+        )
+        return finish_rollup(df, table, freq, by_equipment)
+
+    def get_current_tariffs(self) -> pd.DataFrame:
+        """Obtém tarifas vigentes"""
+        return self._query(
+            """
+            SELECT
+                componente AS source,
+                valor AS value,
+                distribuidora,
+                unidade
+            FROM tarifas_vigentes
+            """
+        )
+
+    def get_efficiency_metrics(self) -> pd.DataFrame:
+        """Obtém métricas de eficiência
+
+        Sem métricas carregadas, calcula por mês a participação (%) das fontes
+        próprias no consumo, a variação sobre o mês anterior e o ranking.
+        """
+        df = self._query(
+            """
+            SELECT mes, valor_medio, variacao_anterior, ranking_eficiencia
+            FROM metricas_eficiencia
+            ORDER BY mes DESC
+            """,
+            parse_dates=['mes']
+        )
+        if not df.empty:
+            return df
+
+        return self._query(
+            """
+            WITH mensal AS (
+                SELECT
+                    strftime('%Y-%m-01', timestamp) AS mes,
+                    100.0 * SUM(CASE WHEN source <> ? THEN consumption ELSE 0 END)
+                        / SUM(consumption) AS valor_medio
+                FROM consumption_history
+                GROUP BY strftime('%Y-%m-01', timestamp)
+                HAVING SUM(consumption) > 0
+            )
+            SELECT
+                mes,
+                valor_medio,
+                valor_medio - LAG(valor_medio, 1, valor_medio) OVER (ORDER BY mes)
+                    AS variacao_anterior,
+                CAST(100 - ROUND(PERCENT_RANK() OVER (ORDER BY valor_medio) * 99) AS INTEGER)
+                    AS ranking_eficiencia
+            FROM mensal
+            ORDER BY mes DESC
+            """,
+            (GRID_SOURCE,),
+            parse_dates=['mes']
+        )
+
+    def get_renewable_sources(self) -> pd.DataFrame:
+        """Obtém dados de fontes renováveis
+
+        Sem dados carregados, agrega por mês o consumo das fontes próprias.
+        """
+        df = self._query(
+            """
+            SELECT componente AS source, valor_total AS value, mes
+            FROM fontes_renovaveis
+            ORDER BY mes DESC
+            """,
+            parse_dates=['mes']
+        )
+        if not df.empty:
+            return df
+
+        return self._query(
+            """
+            SELECT
+                source,
+                SUM(consumption) AS value,
+                strftime('%Y-%m-01', timestamp) AS mes
+            FROM consumption_history
+            WHERE source <> ?
+            GROUP BY source, strftime('%Y-%m-01', timestamp)
+            ORDER BY mes DESC
+            """,
+            (GRID_SOURCE,),
+            parse_dates=['mes']
+        )
@@ -25,35 +25,107 @@ logging.basicConfig(
 )
 
 # Cria diretórios necessários
-for directory in ['reports', 'temp']:
+for directory in ['reports', 'temp', 'data']:
     Path(directory).mkdir(exist_ok=True)
 
-logging.debug("Iniciando configuração do matplotlib")
-try:
-    import matplotlib
-    logging.debug("Matplotlib importado com sucesso")
-    matplotlib.use('AGG')
-    logging.debug("Backend AGG configurado")
-    matplotlib.interactive(False)
-    logging.debug("Modo interativo desativado")
-except Exception as e:
-    logging.error(f"Erro ao configurar matplotlib: {str(e)}")
-    raise
+# Base analítica local usada no modo offline
+LOCAL_STORE_FILE = Path('data') / 'local_store.sqlite3'
 
-logging.debug("Importando módulos")
-try:
+# Cache compartilhado de consultas (QUERY_CACHE=shared)
+QUERY_CACHE_FILE = Path('data') / 'query_cache.sqlite3'
+
+def show_root():
+    """Cria e exibe a janela principal antes de importar banco, serviços e interface
+    
+    Essas importações (pandas, matplotlib, oracledb) levam alguns segundos;
+    com a janela já desenhada o usuário vê o sistema iniciando.
+    """
+    import ttkbootstrap as ttk
+    
+    root = ttk.Window(
+        title='Sistema de Gerenciamento Energético',
+        themename="litera",
+        size=(1024, 768)
+    )
+    splash = ttk.Label(root, text="Iniciando sistema...", font=("Helvetica", 12, "bold"))
+    splash.pack(expand=True)
+    root.update()
+    return root, splash
+
+def setup_matplotlib():
+    """Configura o matplotlib sem interface interativa"""
+    logging.debug("Iniciando configuração do matplotlib")
+    try:
+        import matplotlib
+        logging.debug("Matplotlib importado com sucesso")
+        matplotlib.use('AGG')
+        logging.debug("Backend AGG configurado")
+        matplotlib.interactive(False)
+        logging.debug("Modo interativo desativado")
+    except Exception as e:
+        logging.error(f"Erro ao configurar matplotlib: {str(e)}")
+        raise
+
+def setup_local_store():
+    """Configura base local do modo offline
+    
+    Se TARIFF_PARQUET_DIR apontar para o cache Parquet do ETL (cds/scripts),
+    as tarifas vigentes são carregadas a partir dele.
+    """
+    from local_store import LocalStore
+    
+    try:
+        store = LocalStore(LOCAL_STORE_FILE)
+        
+        tariff_cache = os.getenv('TARIFF_PARQUET_DIR')
+        if tariff_cache and Path(tariff_cache).exists():
+            store.load_tariffs_from_parquet(Path(tariff_cache))
+        
+        logging.info("Base local inicializada")
+        return store
+    except Exception as e:
+        logging.error(f"Erro ao configurar base local: {str(e)}")
+        return None
+
+def setup_query_cache():
+    """Configura cache de consultas (em memória ou compartilhado entre processos)"""
+    from query_cache import QueryCache, MemoryCacheBackend, SQLiteCacheBackend
+    
+    if os.getenv('QUERY_CACHE', 'memory').lower() == 'shared':
+        logging.info("Cache de consultas compartilhado")
+        return QueryCache(SQLiteCacheBackend(QUERY_CACHE_FILE))
+    return QueryCache(MemoryCacheBackend())
+
+def offline_database(local_store):
+    """Conexão em modo offline respondida pela base local"""
     from database import OracleConnection
-    from services.monitoring import EnergyMonitor
-    from services.optimization import EnergyOptimizer
-    from services.reporting import ReportGenerator
-    from ui.main_window import MainWindow
-    logging.debug("Módulos importados com sucesso")
-except Exception as e:
-    logging.error(f"Erro ao importar módulos: {str(e)}")
-    raise
+    
+    if local_store is None:
+        return None
+    return OracleConnection(local_store, offline=True)
+
+def tariff_keys():
+    """Chaves de tarifa do consumidor (TARIFF_DISTRIBUIDORA); None se não configurada"""
+    from local_store import TARIFF_MODALITY, TARIFF_SUBGROUP
+    
+    distribuidora = os.getenv('TARIFF_DISTRIBUIDORA')
+    if not distribuidora:
+        return None
+    return {
+        'distribuidora': distribuidora,
+        'subgrupo': TARIFF_SUBGROUP,
+        'modalidade': TARIFF_MODALITY
+    }
 
-def setup_database():
-    """Configura conexão com banco de dados"""
+def setup_database(local_store=None, on_online=None):
+    """Configura conexão com banco de dados
+    
+    O sistema inicia em modo offline (base local) e a conexão com o Oracle
+    é feita em segundo plano, sem bloquear a abertura da interface.
+    on_online(db) é chamado na thread de conexão quando ela é estabelecida.
+    """
+    from database import OracleConnection
+    
     try:
         logging.debug("Iniciando configuração da conexão Oracle")
         
@@ -64,34 +136,45 @@ def setup_database():
         if missing_vars:
             logging.warning(f"Variáveis de ambiente ausentes: {', '.join(missing_vars)}")
             logging.info("Sistema iniciará em modo offline")
-            return None
-        
-        # Inicializa conexão
-        logging.debug(f"Inicializando cliente Oracle em: {os.getenv('ORACLE_HOME')}")
-        db = OracleConnection()
-        logging.debug("Cliente Oracle inicializado")
+            return offline_database(local_store)
         
-        # Testa conexão
-        if db.test_connection():
-            logging.info("Conexão estabelecida")
-            return db
-        else:
-            logging.warning("Teste de conexão falhou")
-            return None
+        # Inicia offline e conecta em segundo plano (espera exponencial entre tentativas)
+        db = OracleConnection(local_store, offline=True, query_cache=setup_query_cache())
+        db.connect_async(on_online=(lambda: on_online(db)) if on_online else None)
+        logging.info("Sistema iniciado em modo offline - conectando ao Oracle em segundo plano")
+        return db
             
     except Exception as e:
         logging.error(f"Erro ao configurar banco de dados: {str(e)}")
-        return None
+        return offline_database(local_store)
 
 def main():
     """Função principal"""
     try:
-        # Configura banco de dados
-        db = setup_database()
+        # Janela exibida antes das importações pesadas
+        root, splash = show_root()
+        logging.debug("Janela principal exibida")
+        
+        setup_matplotlib()
+        logging.debug("Importando módulos")
+        try:
+            from services.monitoring import EnergyMonitor
+            from services.optimization import EnergyOptimizer
+            from services.reporting import ReportGenerator
+            from tariff_index import TariffIndex
+            from ui.main_window import MainWindow
+            logging.debug("Módulos importados com sucesso")
+        except Exception as e:
+            logging.error(f"Erro ao importar módulos: {str(e)}")
+            raise
+        
+        # Configura banco de dados; o índice de tarifas é carregado ao conectar
+        tariff_index = TariffIndex()
+        db = setup_database(setup_local_store(), on_online=tariff_index.refresh)
         
         # Inicializa serviços
         logging.debug("Inicializando serviços")
-        monitor = EnergyMonitor(db)
+        monitor = EnergyMonitor(db, tariff_index, tariff_keys())
         logging.info("Monitor inicializado")
         optimizer = EnergyOptimizer(db)
         logging.info("Otimizador inicializado")
@@ -100,7 +183,8 @@ def main():
         
         # Inicializa interface
         logging.debug("Inicializando interface gráfica")
-        window = MainWindow(monitor, optimizer, reporter)
+        splash.destroy()
+        window = MainWindow(monitor, optimizer, reporter, root=root)
         logging.info("Interface inicializada")
         
     except Exception as e:
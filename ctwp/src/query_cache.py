@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Cache de resultados de consultas (read-through) do OracleConnection
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2023
+"""
+
+import hashlib
+import logging
+import pickle
+import re
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import closing
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, Dict, Optional, Set
+import pandas as pd
+
+# Limite padrão de memória do cache (bytes)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Tabelas lidas (FROM/JOIN) e escritas (INSERT/UPDATE/DELETE/MERGE) por um SQL
+READ_TABLES = re.compile(r'\b(?:FROM|JOIN)\s+([A-Za-z_][\w$#]*)', re.IGNORECASE)
+WRITE_TABLES = re.compile(
+    r'\b(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|MERGE\s+INTO)\s+([A-Za-z_][\w$#]*)',
+    re.IGNORECASE
+)
+
+def tables_read(query: str) -> Set[str]:
+    """Tabelas consultadas por um SELECT"""
+    return {table.lower() for table in READ_TABLES.findall(query)} - {'dual'}
+
+def tables_written(statement: str) -> Set[str]:
+    """Tabelas alteradas por um DML"""
+    return {table.lower() for table in WRITE_TABLES.findall(statement)}
+
+def frame_size(df: pd.DataFrame) -> int:
+    """Tamanho aproximado do DataFrame em memória (bytes)"""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+class CacheBackend(ABC):
+    """Interface dos backends do cache (em processo ou compartilhado)
+
+    Além das entradas, o backend guarda a geração de cada tabela; incrementá-la
+    torna inacessíveis todas as entradas que dependem da tabela, inclusive em
+    outros processos que usam o mesmo backend.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Retorna o DataFrame da chave, se existir e não tiver expirado"""
+
+    @abstractmethod
+    def set(self, key: str, df: pd.DataFrame, ttl: float) -> None:
+        """Armazena o DataFrame por ttl segundos"""
+
+    @abstractmethod
+    def generation(self, table: str) -> int:
+        """Geração atual da tabela"""
+
+    @abstractmethod
+    def bump(self, table: str) -> None:
+        """Incrementa a geração da tabela (invalidação)"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove todas as entradas"""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Entradas, bytes e evicções do backend"""
+
+class MemoryCacheBackend(CacheBackend):
+    """Backend em processo: LRU limitado pelo tamanho dos DataFrames"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """Inicializa backend"""
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # chave -> (DataFrame, tamanho, expira_em)
+        self.generations = {}
+        self.size = 0
+        self.evictions = 0
+        self.lock = Lock()
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Retorna cópia do DataFrame e marca como usado recentemente"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            df, size, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                self.size -= size
+                return None
+            self.entries.move_to_end(key)
+            return df.copy()
+
+    def set(self, key: str, df: pd.DataFrame, ttl: float) -> None:
+        """Armazena cópia do DataFrame, removendo as entradas menos usadas"""
+        size = frame_size(df)
+        if size > self.max_bytes:
+            return
+
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self.entries[key] = (df.copy(), size, time.monotonic() + ttl)
+            self.size += size
+
+            while self.size > self.max_bytes:
+                _, (_, evicted_size, _) = self.entries.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+
+    def generation(self, table: str) -> int:
+        """Geração atual da tabela"""
+        with self.lock:
+            return self.generations.get(table, 0)
+
+    def bump(self, table: str) -> None:
+        """Incrementa a geração da tabela"""
+        with self.lock:
+            self.generations[table] = self.generations.get(table, 0) + 1
+
+    def clear(self) -> None:
+        """Remove todas as entradas"""
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Entradas, bytes e evicções do backend"""
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions
+            }
+
+class SQLiteCacheBackend(CacheBackend):
+    """Backend compartilhado entre processos em um arquivo SQLite
+
+    Substituto local de um cache compartilhado (ex.: Redis): os DataFrames são
+    serializados com pickle e a evicção LRU usa o último acesso de cada entrada.
+    """
+
+    def __init__(self, db_file: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        """Inicializa backend"""
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(exist_ok=True, parents=True)
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self.lock = Lock()
+        with self.lock, closing(self._connect()) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache_entries(accessed_at)"
+            )
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_generations (
+                    table_name TEXT PRIMARY KEY,
+                    generation INTEGER NOT NULL
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre conexão (uma por operação, segura entre threads)"""
+        return sqlite3.connect(str(self.db_file), timeout=10)
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Retorna o DataFrame da chave e atualiza o último acesso"""
+        now = time.time()
+        with self.lock, closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+                return None
+            conn.execute(
+                "UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        return pickle.loads(row[0])
+
+    def set(self, key: str, df: pd.DataFrame, ttl: float) -> None:
+        """Armazena o DataFrame e remove as entradas menos usadas"""
+        value = pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(value) > self.max_bytes:
+            return
+
+        now = time.time()
+        with self.lock, closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now + ttl, now)
+            )
+
+            total = conn.execute(
+                "SELECT COALESCE(SUM(size_bytes), 0) FROM cache_entries"
+            ).fetchone()[0]
+            if total > self.max_bytes:
+                evicted = []
+                for old_key, size in conn.execute(
+                    "SELECT key, size_bytes FROM cache_entries ORDER BY accessed_at"
+                ):
+                    if total <= self.max_bytes:
+                        break
+                    evicted.append((old_key,))
+                    total -= size
+                conn.executemany("DELETE FROM cache_entries WHERE key = ?", evicted)
+                self.evictions += len(evicted)
+
+    def generation(self, table: str) -> int:
+        """Geração atual da tabela"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT generation FROM cache_generations WHERE table_name = ?", (table,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, table: str) -> None:
+        """Incrementa a geração da tabela"""
+        with self.lock, closing(self._connect()) as conn, conn:
+            conn.execute(
+                """
+                INSERT INTO cache_generations VALUES (?, 1)
+                ON CONFLICT(table_name) DO UPDATE SET generation = generation + 1
+                """,
+                (table,)
+            )
+
+    def clear(self) -> None:
+        """Remove todas as entradas"""
+        with self.lock, closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM cache_entries")
+
+    def stats(self) -> Dict[str, Any]:
+        """Entradas, bytes e evicções do backend"""
+        with closing(self._connect()) as conn:
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM cache_entries"
+            ).fetchone()
+        return {
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+            'evictions': self.evictions
+        }
+
+class QueryCache:
+    """Cache read-through de resultados de consultas
+
+    A chave combina o SQL normalizado, os binds e a geração de cada tabela
+    lida; um DML na tabela incrementa sua geração e invalida as consultas
+    que dependem dela.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        """Inicializa cache"""
+        self.backend = backend or MemoryCacheBackend()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.lock = Lock()
+
+    def make_key(self, query: str, params: Optional[Dict] = None) -> str:
+        """Monta chave a partir do SQL, dos binds e das gerações das tabelas"""
+        normalized = ' '.join(query.split())
+        binds = sorted((params or {}).items())
+        generations = sorted(
+            (table, self.backend.generation(table)) for table in tables_read(query)
+        )
+        payload = repr((normalized, binds, generations)).encode('utf-8')
+        return hashlib.sha256(payload).hexdigest()
+
+    def get_or_load(
+        self,
+        query: str,
+        params: Optional[Dict],
+        ttl: float,
+        loader: Callable[[], Optional[pd.DataFrame]]
+    ) -> pd.DataFrame:
+        """Retorna resultado em cache ou executa loader e armazena
+
+        loader deve retornar None quando a consulta falhar, para que erros
+        não fiquem em cache.
+        """
+        key = self.make_key(query, params)
+        try:
+            cached = self.backend.get(key)
+        except Exception as e:
+            logging.warning(f"Erro ao ler cache de consultas: {str(e)}")
+            cached = None
+
+        with self.lock:
+            if cached is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if cached is not None:
+            return cached
+
+        df = loader()
+        if df is None:
+            return pd.DataFrame()
+
+        try:
+            self.backend.set(key, df, ttl)
+        except Exception as e:
+            logging.warning(f"Erro ao gravar cache de consultas: {str(e)}")
+        return df
+
+    def invalidate_statement(self, statement: str) -> None:
+        """Invalida consultas que leem as tabelas alteradas pelo DML"""
+        for table in tables_written(statement):
+            self.invalidate_table(table)
+
+    def invalidate_table(self, table: str) -> None:
+        """Invalida consultas que leem a tabela"""
+        try:
+            self.backend.bump(table.lower())
+            with self.lock:
+                self.invalidations += 1
+            logging.debug(f"Cache de consultas invalidado: {table}")
+        except Exception as e:
+            logging.warning(f"Erro ao invalidar cache de consultas: {str(e)}")
+
+    def clear(self) -> None:
+        """Remove todas as entradas"""
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Estatísticas de uso do cache"""
+        with self.lock:
+            total = self.hits + self.misses
+            stats = {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'invalidations': self.invalidations
+            }
+        stats.update(self.backend.stats())
+        return stats
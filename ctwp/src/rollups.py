@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Rollups pré-agregados de consumption_history (hora, dia, mês)
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2023
+"""
+
+from datetime import datetime
+import pandas as pd
+
+# Rollups do mais grosso ao mais fino: (frequência pandas, tabela/MV)
+ROLLUPS = [
+    ('MS', 'mv_consumo_mensal'),
+    ('D', 'mv_consumo_diario'),
+    ('h', 'mv_consumo_horario')
+]
+
+# Ordem de granularidade (menor = mais fino)
+GRAIN_ORDER = {'h': 0, 'D': 1, 'MS': 2}
+
+ROLLUP_COLUMNS = ['timestamp', 'source', 'value', 'cost', 'readings']
+
+def is_aligned(ts: datetime, freq: str) -> bool:
+    """Indica se o instante é início de um intervalo da frequência"""
+    ts = pd.Timestamp(ts)
+    if ts.minute or ts.second or ts.microsecond:
+        return False
+    if freq == 'h':
+        return True
+    if ts.hour:
+        return False
+    return freq == 'D' or ts.day == 1
+
+def select_rollup(start: datetime, end: datetime, freq: str) -> str:
+    """Escolhe o rollup mais grosso que atende à resolução e ao intervalo
+
+    O rollup não pode ser mais grosso que a resolução pedida e os limites
+    [start, end) precisam cair em início de intervalo. Um fim no futuro é
+    aceito, pois não há leituras após o instante atual.
+    """
+    now = datetime.now()
+    for rollup_freq, table in ROLLUPS:
+        if GRAIN_ORDER[rollup_freq] > GRAIN_ORDER[freq]:
+            continue
+        if is_aligned(start, rollup_freq) and (end >= now or is_aligned(end, rollup_freq)):
+            return table
+    return ROLLUPS[-1][1]
+
+def rollup_freq(table: str) -> str:
+    """Frequência pandas de um rollup"""
+    return next(freq for freq, name in ROLLUPS if name == table)
+
+def rollup_frame(df: pd.DataFrame, freq: str, by_equipment: bool = False) -> pd.DataFrame:
+    """Agrega leituras (ou um rollup mais fino) na frequência pedida
+
+    Aceita colunas value/cost e, se existir, readings (número de leituras).
+    """
+    keys = ['source', 'equipment'] if by_equipment else ['source']
+    columns = ROLLUP_COLUMNS[:2] + (['equipment'] if by_equipment else []) + ROLLUP_COLUMNS[2:]
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+
+    df = df.assign(
+        timestamp=pd.to_datetime(df['timestamp']).dt.to_period(
+            'M' if freq == 'MS' else freq
+        ).dt.start_time,
+        readings=df['readings'] if 'readings' in df.columns else 1
+    )
+    aggregated = (
+        df.groupby(['timestamp'] + keys, as_index=False)[['value', 'cost', 'readings']]
+        .sum()
+        .sort_values('timestamp')
+        .reset_index(drop=True)
+    )
+    return aggregated[columns]
+
+def rollup_query(table: str, by_equipment: bool = False, placeholder: str = ':') -> str:
+    """SQL de leitura de um rollup no intervalo [start_ts, end_ts)
+
+    placeholder ':' gera binds nomeados (Oracle); '?' gera binds posicionais (SQLite).
+    """
+    start, end = (':start_ts', ':end_ts') if placeholder == ':' else ('?', '?')
+    keys = 'bucket, source' + (', equipment' if by_equipment else '')
+    return f"""
+        SELECT
+            bucket AS timestamp,
+            source,
+            {'equipment,' if by_equipment else ''}
+            SUM(consumo_total) AS value,
+            SUM(custo_total) AS cost,
+            SUM(total_registros) AS readings
+        FROM {table}
+        WHERE bucket >= {start}
+          AND bucket < {end}
+        GROUP BY {keys}
+        ORDER BY bucket
+    """
+
+def finish_rollup(df: pd.DataFrame, table: str, freq: str, by_equipment: bool = False) -> pd.DataFrame:
+    """Reagrega o resultado quando o rollup lido é mais fino que o pedido"""
+    if df.empty:
+        return rollup_frame(df, freq, by_equipment)
+    df = df.assign(timestamp=pd.to_datetime(df['timestamp']))
+    if rollup_freq(table) != freq:
+        return rollup_frame(df, freq, by_equipment)
+    return df
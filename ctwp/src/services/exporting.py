@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Serviço de exportação de dados de consumo em streaming
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2024
+"""
+
+import gzip
+import logging
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from threading import Event, Thread
+from typing import Callable, List, Optional
+import pandas as pd
+
+# Janela de leitura por consulta (filtro de período aplicado na fonte)
+EXPORT_WINDOW = timedelta(days=7)
+
+# Formatos suportados e extensão padrão de cada um
+EXPORT_FORMATS = {
+    'csv': '.csv',
+    'csv.gz': '.csv.gz',
+    'parquet': '.parquet'
+}
+
+def export_format(filepath: str) -> str:
+    """Deduz o formato de exportação pela extensão do arquivo"""
+    name = str(filepath).lower()
+    if name.endswith('.csv.gz') or name.endswith('.gz'):
+        return 'csv.gz'
+    if name.endswith('.parquet'):
+        return 'parquet'
+    return 'csv'
+
+class ExportCancelled(Exception):
+    """Exportação interrompida pelo usuário"""
+
+class _CsvWriter:
+    """Escreve blocos em CSV (opcionalmente gzip) com um único cabeçalho"""
+    
+    def __init__(self, filepath: Path, compress: bool = False):
+        """Abre arquivo de saída"""
+        if compress:
+            self.handle = gzip.open(filepath, 'wt', encoding='utf-8', newline='')
+        else:
+            self.handle = open(filepath, 'w', encoding='utf-8', newline='')
+        self.header = True
+    
+    def write(self, df: pd.DataFrame) -> None:
+        """Acrescenta bloco ao arquivo"""
+        df.to_csv(self.handle, index=False, header=self.header)
+        self.header = False
+    
+    def close(self) -> None:
+        """Fecha arquivo"""
+        self.handle.close()
+
+class _ParquetWriter:
+    """Escreve blocos como row groups de um arquivo Parquet (requer pyarrow)"""
+    
+    def __init__(self, filepath: Path):
+        """Prepara escritor; o schema vem do primeiro bloco"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        self.pa = pa
+        self.pq = pq
+        self.filepath = filepath
+        self.writer = None
+    
+    def write(self, df: pd.DataFrame) -> None:
+        """Acrescenta bloco como novo row group"""
+        if self.writer is None:
+            table = self.pa.Table.from_pandas(df, preserve_index=False)
+            self.writer = self.pq.ParquetWriter(str(self.filepath), table.schema, compression='snappy')
+        else:
+            table = self.pa.Table.from_pandas(
+                df, schema=self.writer.schema, preserve_index=False
+            )
+        self.writer.write_table(table)
+    
+    def close(self) -> None:
+        """Fecha arquivo (gera arquivo vazio se nenhum bloco foi escrito)"""
+        if self.writer is None:
+            self.pq.write_table(self.pa.table({}), str(self.filepath))
+        else:
+            self.writer.close()
+
+class DataExporter:
+    """Exporta histórico de consumo sem carregar o período inteiro em memória
+    
+    O período é lido em janelas (EXPORT_WINDOW) pelo read_consumption_range
+    da fonte, com o filtro de datas resolvido no banco, e cada janela é
+    gravada assim que chega. Erros de leitura interrompem a exportação.
+    """
+    
+    def __init__(self, source, window: timedelta = EXPORT_WINDOW):
+        """Inicializa exportador"""
+        self.source = source
+        self.window = window
+    
+    def _windows(self, start: datetime, end: datetime) -> List[tuple]:
+        """Divide [start, end) em janelas de leitura"""
+        windows = []
+        current = start
+        while current < end:
+            windows.append((current, min(current + self.window, end)))
+            current += self.window
+        return windows
+    
+    def export(
+        self,
+        start: datetime,
+        end: datetime,
+        filepath: str,
+        format: Optional[str] = None,
+        progress: Optional[Callable[[float, int], None]] = None,
+        cancel: Optional[Event] = None
+    ) -> str:
+        """Exporta consumo do intervalo [start, end) para o arquivo
+        
+        progress(fração, linhas) é chamado a cada janela gravada. O arquivo é
+        escrito em um temporário e só substitui o destino ao final, de modo
+        que falhas ou cancelamento não deixam exportações parciais.
+        """
+        format = format or export_format(filepath)
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Formato de exportação não suportado: {format}")
+        
+        filepath = Path(filepath)
+        partial = filepath.with_name(filepath.name + '.part')
+        writer = (
+            _ParquetWriter(partial) if format == 'parquet'
+            else _CsvWriter(partial, compress=format == 'csv.gz')
+        )
+        
+        windows = self._windows(start, end)
+        columns = None
+        rows = 0
+        try:
+            try:
+                for index, (window_start, window_end) in enumerate(windows, start=1):
+                    if cancel is not None and cancel.is_set():
+                        raise ExportCancelled("Exportação cancelada")
+                    
+                    chunk = self.source.read_consumption_range(window_start, window_end)
+                    if chunk is not None and not chunk.empty:
+                        # Colunas do primeiro bloco definem o layout do arquivo
+                        columns = columns or list(chunk.columns)
+                        writer.write(chunk.reindex(columns=columns))
+                        rows += len(chunk)
+                    
+                    if progress is not None:
+                        progress(index / len(windows), rows)
+            finally:
+                writer.close()
+            os.replace(partial, filepath)
+        
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+        
+        logging.info(f"Dados exportados ({format}, {rows} linhas): {filepath}")
+        return str(filepath)
+    
+    def export_async(
+        self,
+        start: datetime,
+        end: datetime,
+        filepath: str,
+        format: Optional[str] = None,
+        progress: Optional[Callable[[float, int], None]] = None,
+        done: Optional[Callable[[Optional[str], Optional[Exception]], None]] = None
+    ) -> Event:
+        """Executa export em thread de fundo
+        
+        done(caminho, erro) é chamado ao final. Callbacks rodam na thread de
+        exportação; a interface deve repassá-los ao loop do Tk. Retorna o
+        Event que cancela a exportação quando acionado.
+        """
+        cancel = Event()
+        
+        def run():
+            try:
+                result = self.export(start, end, filepath, format, progress, cancel)
+            except Exception as e:
+                if not isinstance(e, ExportCancelled):
+                    logging.error(f"Erro ao exportar dados: {str(e)}")
+                if done is not None:
+                    done(None, e)
+                return
+            if done is not None:
+                done(result, None)
+        
+        Thread(target=run, name='data-export', daemon=True).start()
+        return cancel
@@ -15,6 +15,10 @@ import numpy as np
 from queue import Queue
 from threading import Lock, Thread
 import time
+from rollups import rollup_frame
+
+# Componentes somados no preço da energia (vigências em R$/MWh, consumo em kWh)
+PRICING_COMPONENTS = ['TE', 'TUSD']
 
 class SensorReader:
     """Leitor de sensores"""
@@ -89,9 +93,16 @@ class SensorReader:
 class EnergyMonitor:
     """Monitora consumo e tarifas em tempo real"""
     
-    def __init__(self, db_connection):
-        """Inicializa monitor"""
+    def __init__(self, db_connection, tariff_index=None, tariff_keys: Optional[Dict[str, str]] = None):
+        """Inicializa monitor
+        
+        tariff_index: índice de vigências (TariffIndex) usado para precificar
+        leituras sem custo; tariff_keys: distribuidora, subgrupo e modalidade
+        do consumidor.
+        """
         self.db = db_connection
+        self.tariff_index = tariff_index
+        self.tariff_keys = tariff_keys
         self.current_consumption = 0
         self.current_tariff = 0
         self.history = []
@@ -147,9 +158,9 @@ class EnergyMonitor:
         
         return alerts
 
-    def get_mock_consumption_history(self, days: int = 30) -> pd.DataFrame:
+    def get_mock_consumption_history(self, days: float = 30, end: Optional[datetime] = None) -> pd.DataFrame:
         """Gera dados históricos mock"""
-        now = datetime.now()
+        now = end or datetime.now()
         data = []
         sources = ['Rede', 'Solar', 'Bateria']
         base_values = {'Rede': 70.0, 'Solar': 20.0, 'Bateria': 10.0}
@@ -276,7 +287,7 @@ class EnergyMonitor:
             return {
                 'total': float(self.current_consumption),
                 'by_source': by_source,
-                'history': history_df.to_dict('records') if not history_df.empty else [],
+                'history': history_df,
                 'details': details,
                 'alerts': alerts,
                 'sensor_data': reading
@@ -288,19 +299,83 @@ class EnergyMonitor:
             return {
                 'total': 0.0,
                 'by_source': {},
-                'history': [],
+                'history': pd.DataFrame(columns=['timestamp', 'source', 'value', 'cost']),
                 'details': [],
                 'alerts': [],
                 'sensor_data': None
             }
     
+    def get_consumption_range(self, start: datetime, end: datetime) -> pd.DataFrame:
+        """Obtém histórico de consumo no intervalo [start, end)"""
+        try:
+            if self.db is not None:
+                try:
+                    return self.db.get_consumption_range(start, end)
+                except Exception as e:
+                    logging.warning(f"Erro ao obter histórico do banco: {str(e)}")
+            
+            # Mock horário cobrindo o intervalo solicitado (sem datas futuras)
+            end = min(end, datetime.now())
+            hours = max(int((end - start).total_seconds() // 3600), 0)
+            history_df = self.get_mock_consumption_history(
+                days=hours / 24,
+                end=end - timedelta(hours=1)
+            )
+            if history_df.empty:
+                return history_df
+            
+            history_df = history_df[
+                (history_df['timestamp'] >= start) & (history_df['timestamp'] < end)
+            ]
+            return history_df.sort_values('timestamp').reset_index(drop=True)
+            
+        except Exception as e:
+            logging.error(f"Erro ao obter histórico por período: {str(e)}")
+            return pd.DataFrame(columns=['timestamp', 'source', 'value', 'cost'])
+    
+    def read_consumption_range(self, start: datetime, end: datetime) -> pd.DataFrame:
+        """Lê histórico de consumo no intervalo [start, end) propagando erros
+        
+        Usado pela exportação: com banco configurado, falhas de leitura geram
+        exceção em vez de mock. Sem banco (modo demonstração) usa o mock.
+        """
+        if self.db is not None:
+            return self.db.read_consumption_range(start, end)
+        return self.get_consumption_range(start, end)
+    
+    def get_consumption_rollup(
+        self,
+        start: datetime,
+        end: datetime,
+        freq: str = 'h'
+    ) -> pd.DataFrame:
+        """Obtém consumo agregado por fonte no intervalo [start, end)
+        
+        Usa os rollups do banco (hora, dia ou mês); sem banco, agrega o
+        histórico mock na frequência pedida.
+        """
+        try:
+            if self.db is not None:
+                try:
+                    return self.db.get_consumption_rollup(start, end, freq)
+                except Exception as e:
+                    logging.warning(f"Erro ao obter rollup do banco: {str(e)}")
+            
+            return rollup_frame(self.get_consumption_range(start, end), freq)
+            
+        except Exception as e:
+            logging.error(f"Erro ao obter consumo agregado: {str(e)}")
+            return pd.DataFrame(columns=['timestamp', 'source', 'value', 'cost', 'readings'])
+    
     def get_current_tariffs(self) -> Dict[str, Any]:
         """Obtém tarifas atuais"""
         try:
             # Obtém tarifas (reais ou mock)
             if self.db is not None:
                 try:
-                    tariffs_df = self.db.get_current_tariffs()
+                    tariffs_df = self.db.get_current_tariffs().rename(
+                        columns={'source': 'componente', 'value': 'valor'}
+                    )
                 except Exception as e:
                     logging.warning(f"Erro ao obter tarifas do banco: {str(e)}")
                     tariffs_df = self.get_mock_tariffs()
@@ -382,7 +457,9 @@ class EnergyMonitor:
             # Obtém dados (reais ou mock)
             if self.db is not None:
                 try:
-                    renewable_df = self.db.get_renewable_sources()
+                    renewable_df = self.db.get_renewable_sources().rename(
+                        columns={'source': 'componente', 'value': 'valor_total'}
+                    )
                 except Exception as e:
                     logging.warning(f"Erro ao obter dados renováveis do banco: {str(e)}")
                     renewable_df = self.get_mock_renewable_sources()
@@ -411,6 +488,21 @@ class EnergyMonitor:
                 'percentages': {}
             }
     
+    def price_readings(self, readings: pd.DataFrame) -> pd.Series:
+        """Custo (R$) de leituras em kWh pelas tarifas vigentes em cada instante
+        
+        Soma os componentes de PRICING_COMPONENTS do índice de tarifas; NaN
+        para leituras sem vigência ou sem índice configurado.
+        """
+        if self.tariff_index is None or not self.tariff_keys:
+            return pd.Series(np.nan, index=readings.index, name='cost')
+        
+        total = sum(
+            self.tariff_index.price(readings, 'consumption', componente=component, **self.tariff_keys)
+            for component in PRICING_COMPONENTS
+        )
+        return total / 1000
+    
     def save_reading(self, reading: Dict[str, Any]) -> None:
         """Salva leitura no banco"""
         try:
@@ -424,13 +516,18 @@ class EnergyMonitor:
             if 'source' not in reading:
                 raise ValueError("Fonte de energia ausente")
             
-            # Prepara dados
+            # Prepara dados (chaves das colunas de consumption_history)
             data = {
                 'timestamp': datetime.now(),
-                'valor': reading['value'],
-                'fonte': reading['source'],
-                'equipamento': reading.get('equipment', 'default')
+                'consumption': reading['value'],
+                'cost': reading.get('cost'),
+                'source': reading['source'],
+                'equipment': reading.get('equipment', 'default')
             }
+            if data['cost'] is None:
+                cost = self.price_readings(pd.DataFrame([data])).iloc[0]
+                if pd.notna(cost):
+                    data['cost'] = float(cost)
             
             # Adiciona dados do sensor se disponível
             sensor_reading = self.sensor_reader.get_last_reading()
@@ -12,8 +12,6 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.cluster import KMeans
 
 class EnergyOptimizer:
     """Otimiza consumo energético"""
@@ -21,8 +19,8 @@ class EnergyOptimizer:
     def __init__(self, db_connection):
         """Inicializa otimizador"""
         self.db = db_connection
-        self.scaler = MinMaxScaler()
-        self.kmeans = KMeans(n_clusters=3, n_init=10)  # Fixado em 3 clusters
+        self._scaler = None
+        self._kmeans = None
         self.current_mode = "balanceado"
         self.valid_modes = ['econômico', 'balanceado', 'conforto']
         self.thresholds = {
@@ -42,6 +40,22 @@ class EnergyOptimizer:
         }
         logging.info("Otimizador inicializado")
     
+    @property
+    def scaler(self):
+        """Normalizador (sklearn só é importado no primeiro uso)"""
+        if self._scaler is None:
+            from sklearn.preprocessing import MinMaxScaler
+            self._scaler = MinMaxScaler()
+        return self._scaler
+    
+    @property
+    def kmeans(self):
+        """Agrupador KMeans (sklearn só é importado no primeiro uso)"""
+        if self._kmeans is None:
+            from sklearn.cluster import KMeans
+            self._kmeans = KMeans(n_clusters=3, n_init=10)  # Fixado em 3 clusters
+        return self._kmeans
+    
     def _generate_mock_consumption(self, days: int = 7) -> pd.DataFrame:
         """Gera dados mock de consumo"""
         now = datetime.now()
@@ -336,7 +350,7 @@ class EnergyOptimizer:
             for _, row in consumption.iterrows():
                 consumption_dict['details'].append({
                     'timestamp': row.get('timestamp', datetime.now()),
-                    'consumption': row.get('consumption', 0),
+                    'consumption': row.get('consumption', row.get('value', 0)),
                     'tariff': row.get('tariff', 0),
                     'cost': row.get('cost', 0)
                 })
@@ -10,64 +10,325 @@ Autor: Gabriel Mule (RM560586)
 Data: 25/11/2024
 """
 
+import hashlib
+import io
 import logging
+import sqlite3
+import tempfile
+import time
+from contextlib import closing
+from functools import lru_cache
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import TYPE_CHECKING, Dict, List, Any, Optional
 import pandas as pd
 import numpy as np
 from pathlib import Path
+from threading import Lock
 import matplotlib.pyplot as plt
-import seaborn as sns
-from fpdf import FPDF
 import os
 
-class CustomPDF(FPDF):
-    """PDF customizado com suporte a Unicode"""
-    def __init__(self):
-        super().__init__()
-        # Usa fonte padrão
-        self.set_font('Arial', '', 12)
+# seaborn e fpdf só são importados ao gerar o primeiro relatório
+if TYPE_CHECKING:
+    from fpdf import FPDF
+
+# Acima deste número de linhas os gráficos usam dados pré-agregados
+LARGE_DATASET_ROWS = 10000
+
+# Resolução de exibição por duração do período (limite, frequência pandas)
+DISPLAY_RESOLUTIONS = [
+    (timedelta(days=2), 'h'),     # horária
+    (timedelta(days=92), 'D'),    # diária
+    (None, 'MS')                  # mensal
+]
+
+@lru_cache(maxsize=None)
+def _pdf_support() -> tuple:
+    """Carrega fpdf no primeiro uso; retorna (classe do PDF, aceita buffers)"""
+    from fpdf import FPDF, FPDF_VERSION
+    
+    class CustomPDF(FPDF):
+        """PDF customizado com suporte a Unicode"""
+        def __init__(self):
+            super().__init__()
+            # Usa fonte padrão
+            self.set_font('Arial', '', 12)
+    
+    # fpdf2 (>= 2.0) aceita buffers em memória em FPDF.image; o fpdf 1.7 só lê arquivos
+    return CustomPDF, int(FPDF_VERSION.split('.')[0]) >= 2
+
+def create_pdf() -> 'FPDF':
+    """Novo documento PDF do relatório"""
+    pdf_class, _ = _pdf_support()
+    return pdf_class()
+
+class ReportCatalog:
+    """Catálogo persistente (SQLite) dos relatórios gerados
+    
+    Indexa cada relatório por (tipo, período) com a versão dos dados usada,
+    permitindo reaproveitar PDFs e listar relatórios sem varrer o diretório.
+    """
+    
+    def __init__(self, db_file: Path, reports_dir: Path):
+        """Inicializa catálogo"""
+        self.db_file = db_file
+        self.reports_dir = reports_dir
+        self.lock = Lock()
+        self.reports_mtime = None
+        self._init_schema()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Abre conexão (uma por operação, segura entre threads)"""
+        return sqlite3.connect(str(self.db_file), timeout=10)
+    
+    def _init_schema(self) -> None:
+        """Cria tabela e importa relatórios já existentes no diretório"""
+        with self.lock, closing(self._connect()) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS reports (
+                    path TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    report_type TEXT,
+                    start_date TEXT,
+                    end_date TEXT,
+                    data_version TEXT,
+                    size_bytes INTEGER NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_reports_created ON reports(created_at)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_reports_key "
+                "ON reports(report_type, start_date, end_date)"
+            )
+            
+            self._reconcile(conn)
+    
+    def _reconcile(self, conn: sqlite3.Connection) -> None:
+        """Sincroniza catálogo com o diretório de relatórios
+        
+        Importa PDFs que não estão no catálogo (gerados antes dele ou
+        copiados depois) e remove registros cujo arquivo foi apagado.
+        """
+        self.reports_mtime = self._directory_mtime()
+        files = {str(file): file for file in self.reports_dir.glob('*.pdf')}
+        known = {row[0] for row in conn.execute("SELECT path FROM reports")}
+        
+        rows = []
+        for path in files.keys() - known:
+            file = files[path]
+            stat = file.stat()
+            parts = file.stem.split('_')
+            key = parts if len(parts) == 3 else (None, None, None)
+            rows.append((
+                path, file.name, *key, None,
+                stat.st_size, stat.st_mtime
+            ))
+        conn.executemany(
+            "INSERT OR IGNORE INTO reports VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        
+        missing = [(path,) for path in known - files.keys()]
+        conn.executemany("DELETE FROM reports WHERE path = ?", missing)
+        
+        if rows or missing:
+            logging.info(
+                f"Catálogo de relatórios: {len(rows)} importados, {len(missing)} removidos"
+            )
+    
+    def _directory_mtime(self) -> Optional[float]:
+        """Data de modificação do diretório (muda ao criar ou apagar arquivos)"""
+        try:
+            return self.reports_dir.stat().st_mtime
+        except OSError:
+            return None
+    
+    @staticmethod
+    def make_key(report_type: str, start_date: str, end_date: str) -> tuple:
+        """Monta chave do relatório"""
+        return (report_type, start_date, end_date)
+    
+    @staticmethod
+    def data_version(*frames: pd.DataFrame) -> str:
+        """Calcula hash do conteúdo dos dados usados no relatório"""
+        digest = hashlib.sha256()
+        for df in frames:
+            digest.update('|'.join(map(str, df.columns)).encode('utf-8'))
+            if not df.empty:
+                try:
+                    hashes = pd.util.hash_pandas_object(df, index=False)
+                except TypeError:
+                    # Colunas com objetos não hasheáveis (listas, dicts)
+                    hashes = pd.util.hash_pandas_object(df.astype(str), index=False)
+                digest.update(hashes.values.tobytes())
+        return digest.hexdigest()
+    
+    def get(self, key: tuple, version: str) -> Optional[str]:
+        """Retorna caminho do relatório se ainda válido"""
+        with self.lock, closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                """
+                SELECT path FROM reports
+                WHERE report_type = ? AND start_date = ? AND end_date = ?
+                  AND data_version = ?
+                ORDER BY created_at DESC
+                LIMIT 1
+                """,
+                (*key, version)
+            ).fetchone()
+            if row is None:
+                return None
+            if not Path(row[0]).exists():
+                conn.execute("DELETE FROM reports WHERE path = ?", (row[0],))
+                return None
+            return row[0]
+    
+    def put(self, key: tuple, version: str, path: str) -> None:
+        """Registra relatório gerado"""
+        try:
+            size = os.path.getsize(path)
+            with self.lock, closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (path, Path(path).name, *key, version, size, time.time())
+                )
+        except Exception as e:
+            logging.warning(f"Erro ao registrar relatório no catálogo: {str(e)}")
+    
+    def count(self) -> int:
+        """Retorna número de relatórios catalogados"""
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+    
+    def list(self, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Lista relatórios do mais recente para o mais antigo
+        
+        O catálogo é sincronizado com o diretório quando ele muda, e
+        registros cujo arquivo não existe mais são removidos.
+        """
+        with self.lock, closing(self._connect()) as conn, conn:
+            if self._directory_mtime() != self.reports_mtime:
+                self._reconcile(conn)
+            while True:
+                rows = conn.execute(
+                    """
+                    SELECT name, path, created_at, size_bytes FROM reports
+                    ORDER BY created_at DESC
+                    LIMIT ? OFFSET ?
+                    """,
+                    (-1 if limit is None else limit, offset)
+                ).fetchall()
+                missing = [(path,) for _, path, _, _ in rows if not Path(path).exists()]
+                if not missing:
+                    break
+                # Remove arquivos apagados e relê a página
+                conn.executemany("DELETE FROM reports WHERE path = ?", missing)
+        return [
+            {
+                'name': name,
+                'path': path,
+                'date': datetime.fromtimestamp(created_at).strftime('%d/%m/%Y %H:%M:%S'),
+                'size': f"{size / 1024:.1f} KB"
+            }
+            for name, path, created_at, size in rows
+        ]
+
 
 class ReportGenerator:
     """Gera relatórios de consumo e eficiência"""
     
-    def __init__(self, monitor):
+    def __init__(self, monitor, large_dataset_rows: int = LARGE_DATASET_ROWS):
         """Inicializa gerador"""
         self.monitor = monitor
+        self.large_dataset_rows = large_dataset_rows
         self.output_dir = Path("reports")
         self.temp_dir = Path("temp")
         # Cria diretórios se não existirem
         self.output_dir.mkdir(exist_ok=True, parents=True)
         self.temp_dir.mkdir(exist_ok=True, parents=True)
+        self.catalog = ReportCatalog(self.output_dir / '.catalog.sqlite3', self.output_dir)
         logging.info("Gerador de relatórios inicializado")
     
-    def get_generated_reports(self) -> List[Dict[str, Any]]:
-        """Retorna lista de relatórios gerados"""
-        reports = []
-        if self.output_dir.exists():
-            for file in self.output_dir.glob('*.pdf'):
-                reports.append({
-                    'name': file.name,
-                    'path': str(file),
-                    'date': datetime.fromtimestamp(file.stat().st_mtime).strftime('%d/%m/%Y %H:%M:%S'),
-                    'size': f"{file.stat().st_size / 1024:.1f} KB"
-                })
-        return sorted(reports, key=lambda x: x['date'], reverse=True)
+    def get_generated_reports(
+        self,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Retorna página de relatórios gerados (mais recentes primeiro)"""
+        return self.catalog.list(offset=offset, limit=limit)
+    
+    def count_generated_reports(self) -> int:
+        """Retorna total de relatórios gerados"""
+        return self.catalog.count()
 
+    def _get_cached_report(
+        self,
+        report_type: str,
+        start_date: str,
+        end_date: str,
+        *frames: pd.DataFrame
+    ) -> tuple:
+        """Retorna (chave, versão, caminho em cache ou None)"""
+        key = ReportCatalog.make_key(report_type, start_date, end_date)
+        version = ReportCatalog.data_version(*frames)
+        path = self.catalog.get(key, version)
+        if path:
+            logging.info(f"Relatório reaproveitado do cache: {path}")
+        return key, version, path
+    
+    def _is_large(self, data: pd.DataFrame) -> bool:
+        """Indica se o volume de dados exige o modo de base grande"""
+        return len(data) > self.large_dataset_rows
+    
+    def _errorbar(self, data: pd.DataFrame):
+        """Desativa intervalo de confiança por bootstrap em bases grandes"""
+        return None if self._is_large(data) else ('ci', 95)
+    
+    @staticmethod
+    def _display_freq(span: timedelta) -> str:
+        """Resolução de exibição para a duração do período"""
+        return next(
+            freq for limit, freq in DISPLAY_RESOLUTIONS
+            if limit is None or span <= limit
+        )
+    
+    def _aggregate_for_display(self, data: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+        """Pré-agrega dados na resolução de exibição do relatório
+        
+        Em bases pequenas retorna os dados originais. Em bases grandes faz
+        um único groupby por hora, dia ou mês conforme a duração do período,
+        com a média do intervalo: a mesma estatística que o lineplot desenha
+        sobre os dados originais, para o gráfico não mudar de escala no limite.
+        """
+        if data.empty or not self._is_large(data):
+            return data
+        
+        freq = self._display_freq(data['timestamp'].max() - data['timestamp'].min())
+        
+        aggregated = (
+            data.groupby(pd.Grouper(key='timestamp', freq=freq))[columns]
+            .mean()
+            .dropna(how='all')
+            .reset_index()
+        )
+        logging.debug(
+            f"Dados pré-agregados ({freq}): {len(data)} -> {len(aggregated)} linhas"
+        )
+        return aggregated
+    
     def _get_consumption_data(self, start_date: str, end_date: str) -> pd.DataFrame:
         """Obtém dados de consumo"""
-        data = self.monitor.get_current_consumption()
-        if data and 'history' in data and data['history']:
-            df = pd.DataFrame(data['history'])
-            
-            # Converte datas
+        # Período inclusivo em dias vira intervalo semiaberto [start, end + 1 dia)
+        start = datetime.strptime(start_date, '%Y%m%d')
+        end = datetime.strptime(end_date, '%Y%m%d') + timedelta(days=1)
+        
+        # Lê o rollup (hora, dia ou mês) na resolução de exibição do período
+        df = self.monitor.get_consumption_rollup(start, end, self._display_freq(end - start))
+        if df is not None and not df.empty:
+            df = df.copy()
             df['timestamp'] = pd.to_datetime(df['timestamp'])
-            start = pd.to_datetime(start_date, format='%Y%m%d')
-            end = pd.to_datetime(end_date, format='%Y%m%d')
-            
-            # Filtra pelo range de datas
-            df = df[(df['timestamp'].dt.date >= start.date()) & 
-                   (df['timestamp'].dt.date <= end.date())]
             
             # Renomeia colunas para manter compatibilidade
             if 'value' in df.columns:
@@ -121,8 +382,15 @@ class ReportGenerator:
             if consumption.empty:
                 raise ValueError("Sem dados de consumo disponíveis")
             
+            # Reaproveita relatório se os dados do período não mudaram
+            cache_key, data_version, cached = self._get_cached_report(
+                'consumo', start_date, end_date, consumption
+            )
+            if cached:
+                return cached
+            
             # Cria relatório
-            report = CustomPDF()
+            report = create_pdf()
             report.add_page()
             
             # Cabeçalho
@@ -147,13 +415,15 @@ class ReportGenerator:
             report.cell(0, 10, f'Custo Total: R$ {total_cost:.2f}', ln=True)
             
             # Gráficos
-            self._add_consumption_chart(report, consumption)
-            self._add_cost_chart(report, consumption)
+            chart_data = self._aggregate_for_display(consumption, ['consumption', 'cost'])
+            self._add_consumption_chart(report, chart_data)
+            self._add_cost_chart(report, chart_data)
             
             # Salva relatório
             filename = f"consumo_{start_date}_{end_date}.pdf"
             filepath = self.output_dir / filename
             report.output(str(filepath))
+            self.catalog.put(cache_key, data_version, str(filepath))
             
             logging.info(f"Relatório de consumo gerado: {filepath}")
             return str(filepath)
@@ -172,8 +442,15 @@ class ReportGenerator:
             if metrics.empty:
                 raise ValueError("Sem dados de eficiência disponíveis")
             
+            # Reaproveita relatório se os dados do período não mudaram
+            cache_key, data_version, cached = self._get_cached_report(
+                'eficiencia', start_date, end_date, metrics, renewable
+            )
+            if cached:
+                return cached
+            
             # Cria relatório
-            report = CustomPDF()
+            report = create_pdf()
             report.add_page()
             
             # Cabeçalho
@@ -221,6 +498,7 @@ class ReportGenerator:
             filename = f"eficiencia_{start_date}_{end_date}.pdf"
             filepath = self.output_dir / filename
             report.output(str(filepath))
+            self.catalog.put(cache_key, data_version, str(filepath))
             
             logging.info(f"Relatório de eficiência gerado: {filepath}")
             return str(filepath)
@@ -237,8 +515,15 @@ class ReportGenerator:
             if consumption.empty:
                 raise ValueError("Sem dados de consumo disponíveis")
             
+            # Reaproveita relatório se os dados do período não mudaram
+            cache_key, data_version, cached = self._get_cached_report(
+                'economia', start_date, end_date, consumption
+            )
+            if cached:
+                return cached
+            
             # Cria relatório
-            report = CustomPDF()
+            report = create_pdf()
             report.add_page()
             
             # Cabeçalho
@@ -266,7 +551,8 @@ class ReportGenerator:
             report.cell(0, 10, f'Percentual: {percentage:.1f}%', ln=True)
             
             # Gráficos
-            self._add_savings_chart(report, consumption)
+            chart_data = self._aggregate_for_display(consumption, ['consumption'])
+            self._add_savings_chart(report, chart_data)
             
             # Detalhamento
             report.add_page()
@@ -288,6 +574,7 @@ class ReportGenerator:
             filename = f"economia_{start_date}_{end_date}.pdf"
             filepath = self.output_dir / filename
             report.output(str(filepath))
+            self.catalog.put(cache_key, data_version, str(filepath))
             
             logging.info(f"Relatório de economia gerado: {filepath}")
             return str(filepath)
@@ -304,8 +591,15 @@ class ReportGenerator:
             if renewable.empty:
                 raise ValueError("Sem dados de fontes renováveis disponíveis")
             
+            # Reaproveita relatório se os dados do período não mudaram
+            cache_key, data_version, cached = self._get_cached_report(
+                'renovaveis', start_date, end_date, renewable
+            )
+            if cached:
+                return cached
+            
             # Cria relatório
-            report = CustomPDF()
+            report = create_pdf()
             report.add_page()
             
             # Cabeçalho
@@ -344,6 +638,7 @@ class ReportGenerator:
             filename = f"renovaveis_{start_date}_{end_date}.pdf"
             filepath = self.output_dir / filename
             report.output(str(filepath))
+            self.catalog.put(cache_key, data_version, str(filepath))
             
             logging.info(f"Relatório de renováveis gerado: {filepath}")
             return str(filepath)
@@ -352,86 +647,90 @@ class ReportGenerator:
             logging.error(f"Erro ao gerar relatório de renováveis: {str(e)}")
             raise
     
-    def _add_consumption_chart(self, report: FPDF, data: pd.DataFrame) -> None:
+    def _embed_chart(self, report: 'FPDF', fig, bbox_inches: Optional[str] = None) -> None:
+        """Renderiza figura em memória e adiciona ao relatório"""
+        buf = io.BytesIO()
+        try:
+            fig.savefig(buf, format='png', bbox_inches=bbox_inches)
+        finally:
+            plt.close(fig)
+        
+        _, supports_buffer_images = _pdf_support()
+        if supports_buffer_images:
+            buf.seek(0)
+            report.image(buf, x=10, w=190)
+            return
+        
+        # fpdf 1.7 exige arquivo: usa nome único por gráfico para permitir
+        # gerações concorrentes sem sobrescrever imagens de outro relatório
+        fd, temp_name = tempfile.mkstemp(prefix='chart_', suffix='.png', dir=self.temp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                temp_file.write(buf.getvalue())
+            report.image(temp_name, x=10, w=190)
+        finally:
+            os.unlink(temp_name)
+    
+    def _add_consumption_chart(self, report: 'FPDF', data: pd.DataFrame) -> None:
         """Adiciona gráfico de consumo"""
-        plt.figure(figsize=(10, 5))
+        import seaborn as sns
+        fig = plt.figure(figsize=(10, 5))
         if not data.empty and 'consumption' in data.columns:
-            sns.lineplot(data=data, x='timestamp', y='consumption')
+            sns.lineplot(data=data, x='timestamp', y='consumption', errorbar=self._errorbar(data))
         plt.title('Consumo ao Longo do Dia')
         plt.xlabel('Hora')
         plt.ylabel('Consumo (kWh)')
         
-        # Salva temporariamente
-        temp_file = self.temp_dir / 'temp_consumption.png'
-        plt.savefig(temp_file)
-        plt.close()
-        
         # Adiciona ao relatório
-        report.image(str(temp_file), x=10, w=190)
-        temp_file.unlink()
+        self._embed_chart(report, fig)
     
-    def _add_cost_chart(self, report: FPDF, data: pd.DataFrame) -> None:
+    def _add_cost_chart(self, report: 'FPDF', data: pd.DataFrame) -> None:
         """Adiciona gráfico de custo"""
-        plt.figure(figsize=(10, 5))
+        import seaborn as sns
+        fig = plt.figure(figsize=(10, 5))
         if not data.empty and 'cost' in data.columns:
-            sns.lineplot(data=data, x='timestamp', y='cost')
+            sns.lineplot(data=data, x='timestamp', y='cost', errorbar=self._errorbar(data))
         plt.title('Custo ao Longo do Dia')
         plt.xlabel('Hora')
         plt.ylabel('Custo (R$)')
         
-        # Salva temporariamente
-        temp_file = self.temp_dir / 'temp_cost.png'
-        plt.savefig(temp_file)
-        plt.close()
-        
         # Adiciona ao relatório
-        report.image(str(temp_file), x=10, w=190)
-        temp_file.unlink()
+        self._embed_chart(report, fig)
     
-    def _add_efficiency_chart(self, report: FPDF, data: pd.DataFrame) -> None:
+    def _add_efficiency_chart(self, report: 'FPDF', data: pd.DataFrame) -> None:
         """Adiciona gráfico de eficiência"""
-        plt.figure(figsize=(10, 5))
+        import seaborn as sns
+        fig = plt.figure(figsize=(10, 5))
         
         if not data.empty and 'valor_medio' in data.columns:
-            sns.lineplot(data=data, x=data.index, y='valor_medio')
+            sns.lineplot(data=data, x=data.index, y='valor_medio', errorbar=self._errorbar(data))
         
         plt.title('Evolucao da Eficiencia')
         plt.xlabel('Periodo')
         plt.ylabel('Eficiencia (%)')
         
-        # Salva temporariamente
-        temp_file = self.temp_dir / 'temp_efficiency.png'
-        plt.savefig(temp_file)
-        plt.close()
-        
         # Adiciona ao relatório
-        report.image(str(temp_file), x=10, w=190)
-        temp_file.unlink()
+        self._embed_chart(report, fig)
     
-    def _add_renewable_chart(self, report: FPDF, data: pd.DataFrame) -> None:
+    def _add_renewable_chart(self, report: 'FPDF', data: pd.DataFrame) -> None:
         """Adiciona gráfico de fontes renováveis"""
-        plt.figure(figsize=(10, 5))
+        import seaborn as sns
+        fig = plt.figure(figsize=(10, 5))
         
         if not data.empty and 'valor_total' in data.columns:
-            sns.barplot(data=data, x='componente', y='valor_total')
+            sns.barplot(data=data, x='componente', y='valor_total', errorbar=self._errorbar(data))
         
         plt.title('Geracao por Fonte Renovavel')
         plt.xlabel('Fonte')
         plt.ylabel('Geracao (kWh)')
         plt.xticks(rotation=45)
         
-        # Salva temporariamente
-        temp_file = self.temp_dir / 'temp_renewable.png'
-        plt.savefig(temp_file, bbox_inches='tight')
-        plt.close()
-        
         # Adiciona ao relatório
-        report.image(str(temp_file), x=10, w=190)
-        temp_file.unlink()
+        self._embed_chart(report, fig, bbox_inches='tight')
     
-    def _add_savings_chart(self, report: FPDF, data: pd.DataFrame) -> None:
+    def _add_savings_chart(self, report: 'FPDF', data: pd.DataFrame) -> None:
         """Adiciona gráfico de economia"""
-        plt.figure(figsize=(10, 5))
+        fig = plt.figure(figsize=(10, 5))
         
         if not data.empty and 'consumption' in data.columns:
             plt.plot(data['timestamp'], data['consumption'], label='Real')
@@ -442,18 +741,12 @@ class ReportGenerator:
         plt.ylabel('Consumo (kWh)')
         plt.legend()
         
-        # Salva temporariamente
-        temp_file = self.temp_dir / 'temp_savings.png'
-        plt.savefig(temp_file)
-        plt.close()
-        
         # Adiciona ao relatório
-        report.image(str(temp_file), x=10, w=190)
-        temp_file.unlink()
+        self._embed_chart(report, fig)
     
-    def _add_renewable_distribution_chart(self, report: FPDF, data: pd.DataFrame) -> None:
+    def _add_renewable_distribution_chart(self, report: 'FPDF', data: pd.DataFrame) -> None:
         """Adiciona gráfico de distribuição de renováveis"""
-        plt.figure(figsize=(10, 5))
+        fig = plt.figure(figsize=(10, 5))
         
         if not data.empty and 'valor_total' in data.columns:
             sources = data.groupby('componente')['valor_total'].sum()
@@ -461,32 +754,27 @@ class ReportGenerator:
         
         plt.title('Distribuicao de Fontes Renovaveis')
         
-        # Salva temporariamente
-        temp_file = self.temp_dir / 'temp_renewable_dist.png'
-        plt.savefig(temp_file)
-        plt.close()
-        
         # Adiciona ao relatório
-        report.image(str(temp_file), x=10, w=190)
-        temp_file.unlink()
+        self._embed_chart(report, fig)
     
-    def _add_renewable_trend_chart(self, report: FPDF, data: pd.DataFrame) -> None:
+    def _add_renewable_trend_chart(self, report: 'FPDF', data: pd.DataFrame) -> None:
         """Adiciona gráfico de tendência de renováveis"""
-        plt.figure(figsize=(10, 5))
+        import seaborn as sns
+        fig = plt.figure(figsize=(10, 5))
         
         if not data.empty and 'valor_total' in data.columns:
-            sns.lineplot(data=data, x=data.index, y='valor_total', hue='componente')
+            sns.lineplot(
+                data=data,
+                x=data.index,
+                y='valor_total',
+                hue='componente',
+                errorbar=self._errorbar(data)
+            )
         
         plt.title('Tendencia de Geracao Renovavel')
         plt.xlabel('Periodo')
         plt.ylabel('Geracao (kWh)')
         plt.xticks(rotation=45)
         
-        # Salva temporariamente
-        temp_file = self.temp_dir / 'temp_renewable_trend.png'
-        plt.savefig(temp_file, bbox_inches='tight')
-        plt.close()
-        
         # Adiciona ao relatório
-        report.image(str(temp_file), x=10, w=190)
-        temp_file.unlink()
+        self._embed_chart(report, fig, bbox_inches='tight')
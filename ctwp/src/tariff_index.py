@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Índice de vigências tarifárias para precificação por instante
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2023
+"""
+
+import logging
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Iterable, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+# Chave de cada grupo de vigências (nomes das dimensões de tarifas)
+KEY_COLUMNS = ['distribuidora', 'componente', 'subgrupo', 'modalidade']
+
+VIGENCIA_COLUMNS = KEY_COLUMNS + ['inicio', 'fim', 'valor']
+
+# Colunas do cache Parquet do ETL (cds/scripts) -> colunas do índice
+PARQUET_COLUMNS = {
+    'SigNomeAgente': 'distribuidora',
+    'DscComponenteTarifario': 'componente',
+    'DscSubGrupoTarifario': 'subgrupo',
+    'DscModalidadeTarifaria': 'modalidade',
+    'DatInicioVigencia': 'inicio',
+    'DatFimVigencia': 'fim',
+    'VlrComponenteTarifario': 'valor'
+}
+
+# Acima desta fração de grupos alterados, o refresh recarrega o índice inteiro
+FULL_RELOAD_RATIO = 0.5
+
+Group = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+def _to_ns(values: Any) -> np.ndarray:
+    """Converte datas para inteiros em nanossegundos (datetime64[ns])"""
+    return pd.to_datetime(pd.Series(values)).to_numpy(dtype='datetime64[ns]').view('int64')
+
+def build_groups(vigencias: pd.DataFrame) -> Dict[tuple, Group]:
+    """Monta arrays ordenados (inícios, fins, valores) por grupo de chave
+
+    data_fim_vigencia é inclusiva (DATE): o fim do intervalo vira o início
+    do dia seguinte, e o intervalo fica semiaberto [inicio, fim + 1 dia).
+    """
+    if vigencias.empty:
+        return {}
+
+    df = vigencias[VIGENCIA_COLUMNS].dropna(subset=['inicio', 'fim', 'valor'])
+    df = df.assign(
+        inicio=pd.to_datetime(df['inicio']).dt.normalize(),
+        fim=pd.to_datetime(df['fim']).dt.normalize() + pd.Timedelta(days=1)
+    ).sort_values(KEY_COLUMNS + ['inicio', 'fim'])
+
+    starts = df['inicio'].to_numpy(dtype='datetime64[ns]').view('int64')
+    ends = df['fim'].to_numpy(dtype='datetime64[ns]').view('int64')
+    values = df['valor'].to_numpy(dtype='float64')
+
+    groups = {}
+    overlaps = 0
+    for key, positions in df.groupby(KEY_COLUMNS, sort=False).indices.items():
+        group_starts = starts[positions]
+        group_ends = ends[positions]
+        overlaps += int(np.count_nonzero(group_starts[1:] < group_ends[:-1]))
+        groups[key] = (group_starts, group_ends, values[positions])
+
+    if overlaps:
+        # Ex.: classes ou postos diferentes na mesma chave; vale o início mais recente
+        logging.warning(f"{overlaps} vigências sobrepostas no índice de tarifas")
+    return groups
+
+class TariffIndex:
+    """Índice em memória das vigências de tarifas
+
+    Cada chave (distribuidora, componente, subgrupo, modalidade) guarda os
+    intervalos de vigência ordenados pelo início; a tarifa de um instante é
+    encontrada com np.searchsorted, vetorizado sobre todas as leituras do grupo.
+    """
+
+    def __init__(self, vigencias: Optional[pd.DataFrame] = None):
+        """Inicializa índice"""
+        self.groups = {}
+        self.signatures = {}
+        self.load_mark = None
+        self.lock = Lock()
+        if vigencias is not None:
+            self.build(vigencias)
+
+    def __len__(self) -> int:
+        """Quantidade de vigências indexadas"""
+        with self.lock:
+            return sum(len(starts) for starts, _, _ in self.groups.values())
+
+    def build(self, vigencias: pd.DataFrame) -> None:
+        """Reconstrói o índice a partir de um DataFrame com VIGENCIA_COLUMNS"""
+        groups = build_groups(vigencias)
+        with self.lock:
+            self.groups = groups
+        logging.info(f"Índice de tarifas: {len(groups)} grupos, {len(vigencias)} vigências")
+
+    def update(self, vigencias: pd.DataFrame, keys: Iterable[tuple]) -> None:
+        """Substitui os grupos das chaves informadas pelas vigências recebidas
+
+        Chaves sem vigências no DataFrame são removidas do índice.
+        """
+        groups = build_groups(vigencias)
+        with self.lock:
+            for key in keys:
+                self.groups.pop(tuple(key), None)
+            self.groups.update(groups)
+
+    def load(self, db) -> bool:
+        """Carrega todas as vigências da tabela tarifas
+
+        Se alguma consulta falhar o índice fica como estava e retorna False.
+        """
+        load_mark = db.get_tariff_load_mark()
+        signatures = self._signatures(db)
+        vigencias = db.get_tariff_vigencias() if signatures is not None else None
+        if vigencias is None:
+            logging.warning("Vigências de tarifas indisponíveis - índice mantido")
+            return False
+
+        self.build(vigencias)
+        self.signatures = signatures
+        self.load_mark = load_mark
+        return True
+
+    def load_parquet(self, directory: Path) -> None:
+        """Carrega vigências do cache Parquet do ETL (requer pyarrow)"""
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(str(directory), format='parquet', partitioning='hive')
+        df = dataset.to_table(columns=list(PARQUET_COLUMNS)).to_pandas()
+        self.build(df.rename(columns=PARQUET_COLUMNS).drop_duplicates())
+
+    def refresh(self, db) -> int:
+        """Atualiza incrementalmente os grupos alterados por novas cargas do ETL
+
+        A marca d'água (última carga em etl_controle_cargas) evita trabalho
+        quando nada mudou; caso contrário, compara a assinatura de cada grupo
+        no banco e recarrega apenas os grupos novos, alterados ou removidos.
+        Retorna a quantidade de grupos atualizados. Se uma consulta falhar,
+        índice, assinaturas e marca d'água ficam como estavam, e a próxima
+        chamada tenta de novo.
+        """
+        load_mark = db.get_tariff_load_mark()
+        if self.load_mark is not None and load_mark == self.load_mark:
+            return 0
+
+        signatures = self._signatures(db)
+        if signatures is None:
+            logging.warning("Assinaturas de tarifas indisponíveis - índice mantido")
+            return 0
+
+        changed = [
+            key for key, signature in signatures.items()
+            if self.signatures.get(key) != signature
+        ]
+        removed = [key for key in self.signatures if key not in signatures]
+
+        if len(changed) > FULL_RELOAD_RATIO * max(len(signatures), 1):
+            vigencias = db.get_tariff_vigencias()
+            if vigencias is None:
+                logging.warning("Vigências de tarifas indisponíveis - índice mantido")
+                return 0
+            self.build(vigencias)
+        elif changed or removed:
+            vigencias = db.get_tariff_vigencias(changed) if changed else pd.DataFrame(columns=VIGENCIA_COLUMNS)
+            if vigencias is None:
+                logging.warning("Vigências de tarifas indisponíveis - índice mantido")
+                return 0
+            self.update(vigencias, changed + removed)
+
+        self.signatures = signatures
+        self.load_mark = load_mark
+        logging.info(
+            f"Índice de tarifas atualizado: {len(changed)} grupos alterados, "
+            f"{len(removed)} removidos"
+        )
+        return len(changed) + len(removed)
+
+    @staticmethod
+    def _signatures(db) -> Optional[Dict[tuple, tuple]]:
+        """Assinatura (quantidade, hash) de cada grupo no banco (None se indisponível)"""
+        df = db.get_tariff_signatures()
+        if df is None:
+            return None
+        if df.empty:
+            return {}
+        keys = df[KEY_COLUMNS].itertuples(index=False, name=None)
+        values = df[['total', 'assinatura']].itertuples(index=False, name=None)
+        return dict(zip(keys, values))
+
+    def lookup(self, readings: pd.DataFrame, **keys: Any) -> np.ndarray:
+        """Tarifa vigente no instante de cada leitura (NaN sem vigência)
+
+        readings precisa da coluna timestamp; as colunas de KEY_COLUMNS podem
+        vir no DataFrame ou como valores fixos em keys (ex.: componente='TE').
+        """
+        missing = [column for column in KEY_COLUMNS if column not in readings and column not in keys]
+        if missing:
+            raise ValueError(f"Chaves de tarifa ausentes: {', '.join(missing)}")
+
+        result = np.full(len(readings), np.nan)
+        if readings.empty:
+            return result
+
+        timestamps = _to_ns(readings['timestamp'].to_numpy())
+        varying = [column for column in KEY_COLUMNS if column not in keys]
+
+        if varying:
+            positions_by_key = readings.reset_index(drop=True).groupby(varying, sort=False).indices
+        else:
+            positions_by_key = {(): np.arange(len(readings))}
+
+        with self.lock:
+            for values, positions in positions_by_key.items():
+                values = values if isinstance(values, tuple) else (values,)
+                combined = dict(keys, **dict(zip(varying, values)))
+                group = self.groups.get(tuple(combined[column] for column in KEY_COLUMNS))
+                if group is None:
+                    continue
+
+                starts, ends, tariffs = group
+                times = timestamps[positions]
+                candidates = np.searchsorted(starts, times, side='right') - 1
+                valid = candidates >= 0
+                candidates = np.where(valid, candidates, 0)
+                covered = valid & (times < ends[candidates])
+                result[positions] = np.where(covered, tariffs[candidates], np.nan)
+
+        return result
+
+    def price(self, readings: pd.DataFrame, value_column: str = 'consumption', **keys: Any) -> pd.Series:
+        """Custo de cada leitura: quantidade x tarifa vigente no instante
+
+        O resultado fica na unidade da tarifa (ex.: R$/MWh exige consumo em MWh).
+        """
+        tariffs = self.lookup(readings, **keys)
+        return pd.Series(
+            readings[value_column].to_numpy(dtype='float64') * tariffs,
+            index=readings.index,
+            name='cost'
+        )
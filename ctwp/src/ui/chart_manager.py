@@ -137,7 +137,7 @@ class ChartManager:
                     data['month_year'] = data['timestamp'].dt.strftime('%Y-%m')
                     
                     # Agrupa dados por mês e fonte
-                    grouped_data = data.groupby(['month_year', 'source'])['value'].mean().reset_index()
+                    grouped_data = data.groupby(['month_year', 'source'], observed=True)['value'].mean().reset_index()
                     
                     # Pivota dados para ter fontes como colunas
                     pivot_data = grouped_data.pivot(
@@ -622,7 +622,7 @@ class ChartManager:
                 })
             
             # Agrupa dados por fonte
-            plot_data = data.groupby('source')['value'].sum().reset_index()
+            plot_data = data.groupby('source', observed=True)['value'].sum().reset_index()
             total = plot_data['value'].sum() if not plot_data.empty else 0
             
             # Calcula porcentagens
@@ -8,10 +8,160 @@ Data: 25/11/2024
 """
 
 import logging
-from typing import Dict, List, Any, Optional
+import time
+from typing import Callable, Dict, List, Any, Optional
 from datetime import datetime, timedelta
+from threading import Event
 import pandas as pd
 import numpy as np
+from services.exporting import EXPORT_FORMATS, DataExporter, export_format
+
+# Colunas e tipos do histórico de consumo em cache
+HISTORY_DTYPES = {
+    'source': 'category',
+    'value': 'float64',
+    'cost': 'float64'
+}
+
+# Janelas de período do combo de monitoramento (None = todo o histórico)
+PERIOD_WINDOWS = {
+    "última_hora": timedelta(hours=1),
+    "último_dia": timedelta(days=1),
+    "última_semana": timedelta(weeks=1),
+    "último_mês": timedelta(days=30),
+    "últimos_3_meses": timedelta(days=90),
+    "últimos_6_meses": timedelta(days=180),
+    "último_ano": timedelta(days=365),
+    "todos": None
+}
+
+# Validade (segundos) de cada entrada do cache; None = só por dependência
+CACHE_TTLS = {
+    'consumption': 60,          # leituras (mesmo ciclo do timer da interface)
+    'history': None,            # derivado de consumption
+    'tariffs': 15 * 60,         # tarifas vigentes
+    'recommendations': 5 * 60
+}
+
+# Entradas que dependem de outras; 'mode' é o modo do otimizador (sem dados)
+CACHE_DEPENDENCIES = {
+    'history': {'consumption'},
+    'recommendations': {'consumption', 'tariffs', 'mode'}
+}
+
+class _Partition:
+    """Fatia ordenada por tempo do histórico, com somas acumuladas"""
+    
+    def __init__(self, frame: pd.DataFrame):
+        """Prepara índice de tempo e somas acumuladas de value/cost"""
+        self.frame = frame
+        self.times = frame['timestamp'].to_numpy(dtype='datetime64[ns]')
+        value = frame['value'].to_numpy(dtype='float64') if 'value' in frame else np.zeros(len(frame))
+        cost = frame['cost'].to_numpy(dtype='float64') if 'cost' in frame else np.zeros(len(frame))
+        # Prefixos com zero inicial: soma de [i, n) = total - prefixo[i]
+        self.value_sum = np.concatenate(([0.0], np.nancumsum(value)))
+        self.value_sq = np.concatenate(([0.0], np.nancumsum(value ** 2)))
+        self.cost_sum = np.concatenate(([0.0], np.nancumsum(cost)))
+    
+    def position(self, start: Optional[datetime]) -> int:
+        """Primeira posição com timestamp >= start"""
+        if start is None:
+            return 0
+        return int(np.searchsorted(self.times, np.datetime64(start, 'ns'), side='left'))
+    
+    def summary(self, position: int) -> Dict[str, float]:
+        """Agregados das leituras a partir da posição (O(1))"""
+        count = len(self.times) - position
+        value = self.value_sum[-1] - self.value_sum[position]
+        squares = self.value_sq[-1] - self.value_sq[position]
+        mean = value / count if count else 0.0
+        variance = (squares - count * mean ** 2) / (count - 1) if count > 1 else 0.0
+        return {
+            'count': count,
+            'value': float(value),
+            'cost': float(self.cost_sum[-1] - self.cost_sum[position]),
+            'mean': float(mean),
+            'std': float(np.sqrt(max(variance, 0.0)))
+        }
+
+class HistoryFrame:
+    """Histórico de consumo em cache colunar tipado
+    
+    Mantém um único DataFrame ordenado por timestamp (datetime64), com source
+    categórica e valores float64, particionado por fonte. As janelas de
+    PERIOD_WINDOWS e seus agregados são resolvidos por busca binária na
+    construção (ancorados no instante da atualização), de modo que trocar
+    período ou fonte só devolve uma fatia já calculada.
+    """
+    
+    def __init__(self, history: Any, now: Optional[datetime] = None):
+        """Converte histórico (DataFrame ou lista de dicts) uma única vez"""
+        df = history if isinstance(history, pd.DataFrame) else pd.DataFrame(history)
+        if df.empty:
+            df = pd.DataFrame(columns=['timestamp', *HISTORY_DTYPES])
+        
+        df = df.assign(timestamp=pd.to_datetime(df['timestamp'])).astype(
+            {column: dtype for column, dtype in HISTORY_DTYPES.items() if column in df.columns}
+        )
+        self.frame = df.sort_values('timestamp', kind='stable').reset_index(drop=True)
+        self.now = now or datetime.now()
+        
+        # Partições por fonte (ordem temporal preservada) e a partição total
+        self.partitions = {None: _Partition(self.frame)}
+        if 'source' in self.frame and not self.frame.empty:
+            for source, positions in self.frame.groupby('source', observed=True).indices.items():
+                self.partitions[source] = _Partition(
+                    self.frame.iloc[positions].reset_index(drop=True)
+                )
+        
+        # Início de cada janela de período em cada partição
+        self.windows = {
+            (period, source): partition.position(
+                self.now - delta if delta is not None else None
+            )
+            for period, delta in PERIOD_WINDOWS.items()
+            for source, partition in self.partitions.items()
+        }
+        
+        # Agregados de cada (período, fonte) pelas somas acumuladas
+        self.summaries = {
+            (period, source): self.partitions[source].summary(position)
+            for (period, source), position in self.windows.items()
+        }
+    
+    def __len__(self) -> int:
+        """Quantidade de leituras"""
+        return len(self.frame)
+    
+    @property
+    def sources(self) -> List[str]:
+        """Fontes presentes no histórico"""
+        return [source for source in self.partitions if source is not None]
+    
+    def window(self, period: str, source: Optional[str] = None) -> pd.DataFrame:
+        """Leituras do período (chave de PERIOD_WINDOWS) e da fonte"""
+        partition = self.partitions.get(source)
+        if partition is None:
+            return self.frame.iloc[0:0]
+        return partition.frame.iloc[self.windows[(self._period(period), source)]:]
+    
+    def summary(self, period: str, source: Optional[str] = None) -> Dict[str, float]:
+        """Agregados (count, value, cost, mean, std) do período e da fonte"""
+        summary = self.summaries.get((self._period(period), source))
+        if summary is None:
+            # Fonte sem leituras
+            return self.partitions[None].summary(len(self.frame))
+        return summary
+    
+    def summary_by_source(self, period: str = "todos") -> pd.DataFrame:
+        """Agregados do período por fonte"""
+        rows = [dict(source=source, **self.summary(period, source)) for source in self.sources]
+        return pd.DataFrame(rows, columns=['source', 'count', 'value', 'cost', 'mean', 'std'])
+    
+    @staticmethod
+    def _period(period: str) -> str:
+        """Normaliza período desconhecido para último_ano (comportamento anterior)"""
+        return period if period in PERIOD_WINDOWS else "último_ano"
 
 class DataManager:
     """Gerencia dados da interface"""
@@ -23,14 +173,58 @@ class DataManager:
             self.monitor = monitor
             self.optimizer = optimizer
             self.reporter = reporter
+            self.exporter = DataExporter(monitor)
             self.cache = {}
+            self.cache_times = {}
             logging.info("Gerenciador de dados inicializado")
         except Exception as e:
             logging.error(f"Erro ao inicializar DataManager: {str(e)}")
             raise
     
-    def get_consumption_data(self, days: int = 30) -> Dict[str, Any]:
+    def _dependents(self, key: str) -> set:
+        """Entradas que dependem, direta ou indiretamente, da chave"""
+        dependents = set()
+        pending = [key]
+        while pending:
+            current = pending.pop()
+            for entry, requires in CACHE_DEPENDENCIES.items():
+                if current in requires and entry not in dependents:
+                    dependents.add(entry)
+                    pending.append(entry)
+        return dependents
+    
+    def _is_fresh(self, key: str) -> bool:
+        """Indica se a entrada existe e não expirou"""
+        if key not in self.cache:
+            return False
+        ttl = CACHE_TTLS.get(key)
+        return ttl is None or time.monotonic() - self.cache_times[key] < ttl
+    
+    def _cached(self, key: str, loader: Callable[[], Any], force_update: bool = False) -> Any:
+        """Retorna entrada do cache ou recarrega (invalidando dependentes)"""
+        if not force_update and self._is_fresh(key):
+            return self.cache[key]
+        
+        value = loader()
+        self.invalidate(key)
+        self.cache[key] = value
+        self.cache_times[key] = time.monotonic()
+        return value
+    
+    def invalidate(self, key: str) -> None:
+        """Remove a entrada e as que dependem dela"""
+        keys = {key} | self._dependents(key)
+        for entry in keys:
+            self.cache.pop(entry, None)
+            self.cache_times.pop(entry, None)
+        logging.debug(f"Cache invalidado: {', '.join(sorted(keys))}")
+    
+    def get_consumption_data(self, force_update: bool = False) -> Dict[str, Any]:
         """Obtém dados de consumo"""
+        return self._cached('consumption', self._load_consumption_data, force_update)
+    
+    def _load_consumption_data(self) -> Dict[str, Any]:
+        """Carrega dados de consumo do monitor"""
         logging.debug("Obtendo dados de consumo")
         try:
             # Obtém dados do monitor
@@ -40,7 +234,7 @@ class DataManager:
                 data = {
                     'total': 0.0,
                     'by_source': {},
-                    'history': [],
+                    'history': pd.DataFrame(),
                     'details': [],
                     'alerts': [],
                     'sensor_data': None
@@ -52,8 +246,12 @@ class DataManager:
             logging.error(f"Erro ao obter dados de consumo: {str(e)}")
             raise
     
-    def get_tariff_data(self) -> Dict[str, Any]:
+    def get_tariff_data(self, force_update: bool = False) -> Dict[str, Any]:
         """Obtém dados de tarifas"""
+        return self._cached('tariffs', self._load_tariff_data, force_update)
+    
+    def _load_tariff_data(self) -> Dict[str, Any]:
+        """Carrega dados de tarifas do monitor"""
         logging.debug("Obtendo dados de tarifas")
         try:
             # Obtém dados do monitor
@@ -72,8 +270,12 @@ class DataManager:
             logging.error(f"Erro ao obter dados de tarifas: {str(e)}")
             raise
     
-    def get_recommendations(self) -> Dict[str, Any]:
+    def get_recommendations(self, force_update: bool = False) -> Dict[str, Any]:
         """Obtém recomendações"""
+        return self._cached('recommendations', self._load_recommendations, force_update)
+    
+    def _load_recommendations(self) -> Dict[str, Any]:
+        """Carrega recomendações do otimizador"""
         logging.debug("Obtendo recomendações")
         try:
             # Obtém dados do otimizador
@@ -92,19 +294,18 @@ class DataManager:
             logging.error(f"Erro ao obter recomendações: {str(e)}")
             raise
     
-    def update_data(self) -> bool:
-        """Atualiza todos os dados"""
+    def set_mode(self, mode: str) -> None:
+        """Altera modo do otimizador e invalida o que depende dele"""
+        self.optimizer.set_mode(mode)
+        self.invalidate('mode')
+    
+    def update_data(self, force_update: bool = False) -> bool:
+        """Atualiza dados expirados (ou todos, com force_update)"""
         logging.debug("Atualizando dados")
         try:
-            # Atualiza dados de consumo
-            self.cache['consumption'] = self.get_consumption_data()
-            
-            # Atualiza dados de tarifas
-            self.cache['tariffs'] = self.get_tariff_data()
-            
-            # Atualiza recomendações
-            self.cache['recommendations'] = self.get_recommendations()
-            
+            self.get_consumption_data(force_update=force_update)
+            self.get_tariff_data(force_update=force_update)
+            self.get_recommendations(force_update=force_update)
             return True
             
         except Exception as e:
@@ -113,45 +314,24 @@ class DataManager:
     
     def get_cached_data(self, key: str) -> Optional[Dict[str, Any]]:
         """Obtém dados do cache"""
-        return self.cache.get(key)
+        return self.cache.get(key) if self._is_fresh(key) else None
     
     def clear_cache(self):
         """Limpa cache de dados"""
         self.cache.clear()
+        self.cache_times.clear()
+    
+    def get_history(self) -> HistoryFrame:
+        """Obtém histórico colunar do cache (convertido uma vez por atualização)"""
+        # Consumo expirado é recarregado antes e invalida o histórico derivado
+        data = self.get_consumption_data()
+        return self._cached('history', lambda: HistoryFrame(data['history']))
     
     def format_for_consumption_plot(self, period: str) -> pd.DataFrame:
         """Formata dados para gráfico de consumo"""
         try:
-            # Obtém dados do cache ou atualiza
-            data = self.cache.get('consumption')
-            if data is None:
-                data = self.get_consumption_data()
-                self.cache['consumption'] = data
-            
-            # Converte histórico para DataFrame
-            df = pd.DataFrame(data['history'])
-            
-            # Filtra por período se necessário
-            if period != "todos" and not df.empty:
-                now = datetime.now()
-                if period == "última_hora":
-                    start = now - timedelta(hours=1)
-                elif period == "último_dia":
-                    start = now - timedelta(days=1)
-                elif period == "última_semana":
-                    start = now - timedelta(weeks=1)
-                elif period == "último_mês":
-                    start = now - timedelta(days=30)
-                elif period == "últimos_3_meses":
-                    start = now - timedelta(days=90)
-                elif period == "últimos_6_meses":
-                    start = now - timedelta(days=180)
-                else:  # último_ano
-                    start = now - timedelta(days=365)
-                
-                df = df[df['timestamp'] >= start]
-            
-            return df
+            # Janela de período pré-calculada (fatia do histórico ordenado)
+            return self.get_history().window(period)
             
         except Exception as e:
             logging.error(f"Erro ao formatar dados para gráfico: {str(e)}")
@@ -161,10 +341,7 @@ class DataManager:
         """Formata dados para gráfico de economia"""
         try:
             # Obtém dados do cache ou atualiza
-            data = self.cache.get('recommendations')
-            if data is None:
-                data = self.get_recommendations()
-                self.cache['recommendations'] = data
+            data = self.get_recommendations()
             
             # Extrai dados de antes e depois
             before = []
@@ -183,18 +360,11 @@ class DataManager:
     def format_for_efficiency_plot(self) -> pd.DataFrame:
         """Formata dados para gráfico de eficiência"""
         try:
-            # Obtém dados do cache ou atualiza
-            data = self.cache.get('consumption')
-            if data is None:
-                data = self.get_consumption_data()
-                self.cache['consumption'] = data
+            summary = self.get_history().summary_by_source()
             
-            # Converte histórico para DataFrame
-            df = pd.DataFrame(data['history'])
-            
-            # Calcula eficiência por fonte
-            if not df.empty:
-                efficiency = df.groupby('source')['value'].agg(['mean', 'std']).reset_index()
+            # Eficiência por fonte a partir dos agregados pré-calculados
+            if not summary.empty:
+                efficiency = summary[['source', 'mean', 'std']].copy()
                 efficiency.columns = ['source', 'efficiency', 'variation']
             else:
                 efficiency = pd.DataFrame(columns=['source', 'efficiency', 'variation'])
@@ -208,18 +378,11 @@ class DataManager:
     def format_for_comparison_plot(self) -> pd.DataFrame:
         """Formata dados para gráfico de comparação"""
         try:
-            # Obtém dados do cache ou atualiza
-            data = self.cache.get('consumption')
-            if data is None:
-                data = self.get_consumption_data()
-                self.cache['consumption'] = data
-            
-            # Converte histórico para DataFrame
-            df = pd.DataFrame(data['history'])
+            summary = self.get_history().summary_by_source()
             
             # Calcula proporção de fontes renováveis
-            if not df.empty:
-                total = df.groupby('source')['value'].sum().reset_index()
+            if not summary.empty:
+                total = summary[['source', 'value']].copy()
                 total['percentage'] = total['value'] / total['value'].sum() * 100
             else:
                 total = pd.DataFrame(columns=['source', 'value', 'percentage'])
@@ -233,49 +396,53 @@ class DataManager:
     def get_historical_data(self, period: str = "último_dia", source: Optional[str] = None) -> pd.DataFrame:
         """Obtém dados históricos filtrados"""
         try:
-            # Obtém dados formatados
-            data = self.format_for_consumption_plot(period)
-            
-            # Filtra por fonte se necessário
-            if source is not None and not data.empty:
-                data = data[data['source'] == source]
-            
-            return data
+            # Partição da fonte já recortada pela janela do período
+            return self.get_history().window(period, source)
             
         except Exception as e:
             logging.error(f"Erro ao obter dados históricos: {str(e)}")
             return pd.DataFrame()
     
-    def export_data(self, start: str, end: str, format: str = "csv") -> str:
-        """Exporta dados para arquivo"""
+    def export_data(
+        self,
+        start: str,
+        end: str,
+        format: Optional[str] = None,
+        filepath: Optional[str] = None,
+        progress: Optional[Callable[[float, int], None]] = None
+    ) -> str:
+        """Exporta dados para arquivo (CSV, CSV gzip ou Parquet) em streaming
+        
+        Datas no formato AAAA-MM-DD, com o dia final incluído.
+        """
         try:
-            # Obtém dados do cache ou atualiza
-            data = self.cache.get('consumption')
-            if data is None:
-                data = self.get_consumption_data()
-                self.cache['consumption'] = data
+            start_date, end_date = self._export_period(start, end)
+            format = format or (export_format(filepath) if filepath else "csv")
+            filepath = filepath or f"consumption_{start}_{end}{EXPORT_FORMATS.get(format, '')}"
             
-            # Converte histórico para DataFrame
-            df = pd.DataFrame(data['history'])
-            
-            # Filtra por período
-            if not df.empty:
-                start_date = datetime.strptime(start, "%Y-%m-%d")
-                end_date = datetime.strptime(end, "%Y-%m-%d")
-                mask = (df['timestamp'] >= start_date) & (df['timestamp'] <= end_date)
-                filtered = df.loc[mask]
-            else:
-                filtered = df
-            
-            # Exporta para arquivo
-            filename = f"consumption_{start}_{end}.{format}"
-            if format == "csv":
-                filtered.to_csv(filename, index=False)
-            else:
-                filtered.to_excel(filename, index=False)
-            
-            return filename
+            return self.exporter.export(start_date, end_date, filepath, format, progress)
             
         except Exception as e:
             logging.error(f"Erro ao exportar dados: {str(e)}")
             raise
+    
+    def export_data_async(
+        self,
+        start: str,
+        end: str,
+        filepath: str,
+        progress: Optional[Callable[[float, int], None]] = None,
+        done: Optional[Callable[[Optional[str], Optional[Exception]], None]] = None
+    ) -> Event:
+        """Exporta dados em segundo plano; retorna Event de cancelamento"""
+        start_date, end_date = self._export_period(start, end)
+        return self.exporter.export_async(
+            start_date, end_date, filepath, progress=progress, done=done
+        )
+    
+    @staticmethod
+    def _export_period(start: str, end: str) -> tuple:
+        """Converte período inclusivo em intervalo semiaberto [start, end + 1 dia)"""
+        start_date = datetime.strptime(start, "%Y-%m-%d")
+        end_date = datetime.strptime(end, "%Y-%m-%d") + timedelta(days=1)
+        return start_date, end_date
@@ -10,6 +10,7 @@ Data: 25/11/2024
 import logging
 from datetime import datetime
 from typing import Dict, Any
+from queue import Queue
 import os
 
 # Adicionando logs para debug
@@ -31,15 +32,36 @@ from tkinter import messagebox, filedialog
 import pandas as pd
 from .data_manager import DataManager
 from .chart_manager import ChartManager
+from .virtual_list import VirtualTreeview
+from services.exporting import ExportCancelled
 
 logging.debug("Módulos importados")
 
+# Número máximo de relatórios exibidos na lista (mais recentes primeiro)
+REPORTS_PAGE_SIZE = 200
+
+# Intervalo de atualização do progresso da exportação (ms)
+EXPORT_POLL_MS = 200
+
+# Espera após a última mudança de filtro antes de atualizar (ms)
+FILTER_DEBOUNCE_MS = 300
+
+# Atraso da primeira carga de dados, para a janela ser desenhada antes (ms)
+STARTUP_LOAD_DELAY_MS = 100
+
+# Intervalo de verificação da conexão feita em segundo plano (ms)
+CONNECTION_POLL_MS = 1000
+
 
 class MainWindow:
     """Janela principal do sistema"""
     
-    def __init__(self, monitor, optimizer, reporter):
-        """Inicializa janela"""
+    def __init__(self, monitor, optimizer, reporter, root=None):
+        """Inicializa janela
+        
+        root: janela já exibida por main.py antes das importações pesadas;
+        se omitida, a janela é criada aqui.
+        """
         # Adicionando logs para debug
         logging.debug("Iniciando MainWindow")
         
@@ -49,11 +71,13 @@ class MainWindow:
             matplotlib.interactive(False)
             logging.debug("Matplotlib reconfigurado")
             
-            self.root = ttk.Window(
-                title='Sistema de Gerenciamento Energético',
-                themename="litera",
-                size=(1024, 768)
-            )
+            if root is None:
+                root = ttk.Window(
+                    title='Sistema de Gerenciamento Energético',
+                    themename="litera",
+                    size=(1024, 768)
+                )
+            self.root = root
             logging.debug("Janela principal criada")
             
             # Gerenciadores
@@ -72,6 +96,11 @@ class MainWindow:
             }
             logging.debug("Referências de imagens inicializadas")
             
+            # Atualização de filtros pendente (debounce) e geração mais recente
+            self._filter_job = None
+            self._filter_scope = set()
+            self._filter_generation = 0
+            
             # Interface
             self.notebook = ttk.Notebook(self.root)
             self.notebook.pack(fill='both', expand=True, padx=5, pady=5)
@@ -92,6 +121,22 @@ class MainWindow:
                 logging.error(f"Erro ao criar abas: {str(e)}", exc_info=True)
                 raise
             
+            # Gráficos por aba; desenhados só quando a aba está visível
+            self._chart_tabs = {
+                'consumption': self.dashboard,
+                'source': self.monitoring,
+                'optimization': self.optimization,
+                'report': self.reports
+            }
+            self._chart_renderers = {
+                'consumption': self.render_consumption_chart,
+                'source': self.render_source_chart,
+                'optimization': self.render_optimization_chart,
+                'report': self.render_report_chart
+            }
+            self._dirty_charts = set()
+            self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+            
             # Menu
             self.create_menu()
 
@@ -106,6 +151,15 @@ class MainWindow:
             self.loading_label.pack(side='bottom', fill='x', pady=5)
             self.loading_label.pack_forget()  # Inicialmente oculto
             
+            # Cancelamento da exportação em andamento (visível só durante a exportação)
+            self.export_cancel = None
+            self.export_cancel_button = ttk.Button(
+                self.root,
+                text="Cancelar exportação",
+                style="danger.TButton",
+                command=self.on_cancel_export
+            )
+            
             # Status bar
             self.statusbar = ttk.Label(self.root, text="Sistema iniciado", relief='sunken')
             self.statusbar.pack(side='bottom', fill='x')
@@ -113,14 +167,13 @@ class MainWindow:
             # Timer para atualização
             self.root.after(60000, self.on_timer)  # 1 minuto
             
-            # Dados iniciais
-            logging.debug("Atualizando dados iniciais")
-            try:
-                self.update_data()
-                logging.debug("Dados iniciais atualizados")
-            except Exception as e:
-                logging.error(f"Erro ao atualizar dados iniciais: {str(e)}", exc_info=True)
-                raise
+            # Acompanha a conexão com o banco (modo offline -> online)
+            self._db_online = self._database_online()
+            self.root.after(CONNECTION_POLL_MS, self._poll_connection)
+            
+            # Dados iniciais: carregados depois que a janela é exibida
+            logging.debug("Agendando dados iniciais")
+            self.root.after(STARTUP_LOAD_DELAY_MS, self.update_data)
             
             logging.info("Interface inicializada")
             
@@ -262,7 +315,7 @@ class MainWindow:
         )
         self.period_combo.set("Último Dia")  # Valor padrão
         self.period_combo.pack(side='left', padx=5)
-        self.period_combo.bind('<<ComboboxSelected>>', self.on_filter_change)
+        self.period_combo.bind('<<ComboboxSelected>>', self.on_period_change)
         
         ttk.Label(controls_frame, text="Fonte:").pack(side='left', padx=5)
         self.source_combo = ttk.Combobox(
@@ -272,7 +325,7 @@ class MainWindow:
         )
         self.source_combo.set("Todas")  # Valor padrão
         self.source_combo.pack(side='left', padx=5)
-        self.source_combo.bind('<<ComboboxSelected>>', self.on_filter_change)
+        self.source_combo.bind('<<ComboboxSelected>>', self.on_source_change)
         
         # Gráfico
         chart_frame = ttk.LabelFrame(frame, text="Consumo por Fonte", padding=10)
@@ -281,28 +334,24 @@ class MainWindow:
         self.source_label = ttk.Label(chart_frame)
         self.source_label.pack(fill='both', expand=True)
         
-        # Tabela de dados
-        columns = ('data', 'fonte', 'consumo', 'custo')
-        self.monitoring_list = ttk.Treeview(
+        # Tabela de dados (virtualizada: só as linhas visíveis viram itens)
+        self.monitoring_list = VirtualTreeview(
             frame,
-            columns=columns,
-            show='headings'
-        )
-        
-        self.monitoring_list.heading('data', text='Data')
-        self.monitoring_list.heading('fonte', text='Fonte')
-        self.monitoring_list.heading('consumo', text='Consumo')
-        self.monitoring_list.heading('custo', text='Custo')
-        
-        scrollbar = ttk.Scrollbar(
-            frame,
-            orient='vertical',
-            command=self.monitoring_list.yview
+            columns=('data', 'fonte', 'consumo', 'custo'),
+            headings=('Data', 'Fonte', 'Consumo', 'Custo'),
+            fields={
+                'data': 'timestamp',
+                'fonte': 'source',
+                'consumo': 'value',
+                'custo': 'cost'
+            },
+            formatters={
+                'data': lambda value: pd.Timestamp(value).strftime('%H:%M:%S'),
+                'consumo': lambda value: f"{value:.2f} kWh",
+                'custo': lambda value: f"R$ {value:.2f}" if value != 'N/A' else value
+            }
         )
-        self.monitoring_list.configure(yscrollcommand=scrollbar.set)
-        
         self.monitoring_list.pack(fill='both', expand=True, padx=5, pady=5)
-        scrollbar.pack(side='right', fill='y')
         
         return frame
 
@@ -471,15 +520,15 @@ class MainWindow:
         
         return frame
 
-    def update_data(self):
-        """Atualiza dados"""
+    def update_data(self, force_update: bool = False):
+        """Atualiza dados (só as entradas expiradas do cache, ou todas com force_update)"""
         try:
             self.show_loading("Atualizando dados do sistema...")
             
             # Obtém dados
-            consumption = self.data_manager.get_consumption_data()
-            tariffs = self.data_manager.get_tariff_data()
-            recommendations = self.data_manager.get_recommendations()
+            consumption = self.data_manager.get_consumption_data(force_update=force_update)
+            tariffs = self.data_manager.get_tariff_data(force_update=force_update)
+            recommendations = self.data_manager.get_recommendations(force_update=force_update)
             
             # Atualiza valores
             self.consumption_value.config(text=f"{consumption['total']:.2f} kWh")
@@ -514,57 +563,86 @@ class MainWindow:
         tariffs: Dict[str, Any],
         recommendations: Dict[str, Any]
     ):
-        """Atualiza gráficos"""
+        """Marca todos os gráficos como desatualizados
+        
+        Só o gráfico da aba visível é desenhado agora; os demais são
+        desenhados quando a aba for selecionada (on_tab_changed).
+        """
+        self._dirty_charts.update(self._chart_renderers)
+        self.render_visible_charts()
+    
+    def render_visible_charts(self):
+        """Desenha os gráficos desatualizados da aba selecionada"""
         try:
-            # Gráfico de consumo histórico (dashboard)
-            consumption_data = self.data_manager.format_for_consumption_plot("último_dia")
-            if not consumption_data.empty:
-                self.chart_manager.plot_consumption(
-                    consumption_data,
-                    title="Consumo Total"
-                )
-                self._images['consumption'] = self.chart_manager.get_image()
-                self.consumption_label.config(image=self._images['consumption'])
-            
-            # Gráfico de fontes (monitoramento)
-            source = self.source_combo.get()
-            period = self.period_combo.get().lower().replace(' ', '_')
-            source_data = self.data_manager.format_for_consumption_plot(period)
-            
-            if not source_data.empty:
-                if source != "Todas":
-                    source_data = source_data[source_data['source'] == source]
-                
-                # Usa plot_consumption para gráfico de fontes também
-                self.chart_manager.plot_consumption(
-                    source_data,
-                    title=f"Consumo por Fonte {'Total' if source == 'Todas' else source}"
-                )
-                self._images['source'] = self.chart_manager.get_image()
-                self.source_label.config(image=self._images['source'])
-            
-            # Gráfico de otimização
-            before, after = self.data_manager.format_for_savings_plot()
-            self.chart_manager.plot_savings(before, after)
-            self._images['optimization'] = self.chart_manager.get_image()
-            self.optimization_label.config(image=self._images['optimization'])
-            
-            # Gráfico de relatório (baseado no tipo selecionado)
-            report_type = self.report_combo.get()
-            if report_type == "Análise de Eficiência":
-                efficiency_data = self.data_manager.format_for_efficiency_plot()
-                self.chart_manager.plot_efficiency(efficiency_data)
-                self._images['report'] = self.chart_manager.get_image()
-                self.report_label.config(image=self._images['report'])
-            elif report_type == "Fontes Renováveis":
-                comparison_data = self.data_manager.format_for_comparison_plot()
-                self.chart_manager.plot_comparison(comparison_data)
-                self._images['report'] = self.chart_manager.get_image()
-                self.report_label.config(image=self._images['report'])
-            
+            selected = self.notebook.select()
+            for chart in list(self._dirty_charts):
+                if str(self._chart_tabs[chart]) != str(selected):
+                    continue
+                self._chart_renderers[chart]()
+                self._dirty_charts.discard(chart)
         except Exception as e:
             logging.error(f"Erro ao atualizar gráficos: {str(e)}")
             raise
+    
+    def on_tab_changed(self, event):
+        """Manipula troca de aba"""
+        try:
+            self.render_visible_charts()
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao atualizar gráficos: {str(e)}")
+    
+    def render_consumption_chart(self):
+        """Gráfico de consumo histórico (dashboard)"""
+        consumption_data = self.data_manager.format_for_consumption_plot("último_dia")
+        if not consumption_data.empty:
+            self.chart_manager.plot_consumption(
+                consumption_data,
+                title="Consumo Total"
+            )
+            self._images['consumption'] = self.chart_manager.get_image()
+            self.consumption_label.config(image=self._images['consumption'])
+    
+    def render_source_chart(self):
+        """Gráfico de fontes (monitoramento)"""
+        source = self.source_combo.get()
+        period = self.period_combo.get().lower().replace(' ', '_')
+        source_data = self.data_manager.get_historical_data(
+            period=period,
+            source=None if source == "Todas" else source
+        )
+        
+        if not source_data.empty:
+            # Usa plot_consumption para gráfico de fontes também
+            self.chart_manager.plot_consumption(
+                source_data,
+                title=f"Consumo por Fonte {'Total' if source == 'Todas' else source}"
+            )
+            self._images['source'] = self.chart_manager.get_image()
+            self.source_label.config(image=self._images['source'])
+    
+    def render_optimization_chart(self):
+        """Gráfico de otimização"""
+        before, after = self.data_manager.format_for_savings_plot()
+        self.chart_manager.plot_savings(before, after)
+        self._images['optimization'] = self.chart_manager.get_image()
+        self.optimization_label.config(image=self._images['optimization'])
+    
+    def render_report_chart(self):
+        """Gráfico de relatório (baseado no tipo selecionado)"""
+        report_type = self.report_combo.get()
+        if report_type == "Análise de Eficiência":
+            efficiency_data = self.data_manager.format_for_efficiency_plot()
+            self.chart_manager.plot_efficiency(efficiency_data)
+            self._images['report'] = self.chart_manager.get_image()
+            self.report_label.config(image=self._images['report'])
+        elif report_type == "Fontes Renováveis":
+            comparison_data = self.data_manager.format_for_comparison_plot()
+            self.chart_manager.plot_comparison(comparison_data)
+            self._images['report'] = self.chart_manager.get_image()
+            self.report_label.config(image=self._images['report'])
+        else:
+            # Limpa visualização para outros tipos
+            self.report_label.config(image='')
 
     def update_lists(
         self,
@@ -589,20 +667,8 @@ class MainWindow:
                 )
             
             # Lista de monitoramento
-            for item in self.monitoring_list.get_children():
-                self.monitoring_list.delete(item)
-                
-            for detail in consumption['details']:
-                self.monitoring_list.insert(
-                    '',
-                    'end',
-                    values=(
-                        detail['timestamp'].strftime('%H:%M:%S'),
-                        detail['source'],
-                        f"{detail['consumption']:.2f} kWh",
-                        f"R$ {detail['cost']:.2f}"
-                    )
-                )
+            details = pd.DataFrame(consumption['details'])
+            self.monitoring_list.set_data(details.rename(columns={'consumption': 'value'}))
             
             # Lista de resultados
             for item in self.results_list.get_children():
@@ -631,8 +697,10 @@ class MainWindow:
             for item in self.reports_list.get_children():
                 self.reports_list.delete(item)
             
-            # Obtém lista de relatórios
-            reports = self.data_manager.reporter.get_generated_reports()
+            # Obtém página mais recente do catálogo de relatórios
+            reports = self.data_manager.reporter.get_generated_reports(
+                limit=REPORTS_PAGE_SIZE
+            )
             
             if reports:
                 # Adiciona relatórios à lista
@@ -663,139 +731,123 @@ class MainWindow:
         self.update_data()
         self.root.after(60000, self.on_timer)  # Agenda próxima atualização
 
+    def _database_online(self) -> bool:
+        """Indica se a conexão compartilhada pelos serviços está online"""
+        db = getattr(self.data_manager.monitor, 'db', None)
+        return bool(db is not None and getattr(db, 'online', False))
+    
+    def _poll_connection(self):
+        """Recarrega os dados quando a conexão em segundo plano fica pronta"""
+        online = self._database_online()
+        if online != self._db_online:
+            self._db_online = online
+            if online:
+                logging.info("Banco de dados conectado - recarregando dados")
+                self.update_data(force_update=True)
+        self.root.after(CONNECTION_POLL_MS, self._poll_connection)
+    
     def on_period_change(self, event):
         """Manipula mudança de período"""
-        try:
-            self.show_loading("Atualizando período de análise...")
-            
-            # Força atualização dos dados
-            self.data_manager.clear_cache()
-            
-            # Atualiza todos os dados
-            consumption = self.data_manager.get_consumption_data(force_update=True)
-            tariffs = self.data_manager.get_tariff_data(force_update=True)
-            recommendations = self.data_manager.get_recommendations(force_update=True)
-            
-            # Atualiza interface
-            self.update_charts(consumption, tariffs, recommendations)
-            self.update_lists(consumption, recommendations)
-            
-            # Atualiza status
-            self.statusbar.config(
-                text=f"Última atualização: {datetime.now().strftime('%H:%M:%S')}"
-            )
-            
-        except Exception as e:
-            logging.error(f"Erro ao mudar período: {str(e)}")
-            messagebox.showerror("Erro", f"Erro ao mudar período: {str(e)}")
-        finally:
-            self.hide_loading()
+        self.schedule_filter_update('period')
 
     def on_source_change(self, event):
         """Manipula mudança de fonte"""
-        try:
-            self.show_loading("Atualizando fonte de energia...")
-            
-            # Obtém fonte selecionada
-            source = self.source_combo.get()
-            if source == "Todas":
-                source = None
-            
-            # Força atualização dos dados
-            self.data_manager.clear_cache()
-            
-            # Obtém dados históricos filtrados por fonte
-            period = self.period_combo.get().lower().replace(' ', '_')
-            data = self.data_manager.get_historical_data(period=period, source=source)
-            
-            # Atualiza gráfico de fontes
-            if not data.empty:
-                self.chart_manager.plot_consumption(
-                    data,
-                    title=f"Consumo por Fonte {'Total' if source is None else source}"
-                )
-                self._images['source'] = self.chart_manager.get_image()
-                self.source_label.config(image=self._images['source'])
-            
-            # Atualiza lista de monitoramento
-            for item in self.monitoring_list.get_children():
-                self.monitoring_list.delete(item)
-                
-            for _, row in data.iterrows():
-                self.monitoring_list.insert(
-                    '',
-                    'end',
-                    values=(
-                        row.get('timestamp', '').strftime('%H:%M:%S') if 'timestamp' in row else '',
-                        row.get('source', source or 'Total'),
-                        f"{row.get('value', 0):.2f} kWh",
-                        f"R$ {row.get('cost', 0):.2f}" if 'cost' in row else 'N/A'
-                    )
-                )
-            
-            # Atualiza status
-            self.statusbar.config(
-                text=f"Última atualização: {datetime.now().strftime('%H:%M:%S')}"
-            )
-            
-        except Exception as e:
-            logging.error(f"Erro ao mudar fonte: {str(e)}")
-            messagebox.showerror("Erro", f"Erro ao mudar fonte: {str(e)}")
-        finally:
-            self.hide_loading()
+        self.schedule_filter_update('source')
 
-    def on_filter_change(self, event):
-        """Manipula mudança de filtros"""
+    def schedule_filter_update(self, scope: str):
+        """Agenda atualização de filtros com debounce
+        
+        Mudanças seguidas reiniciam a espera e são agrupadas: apenas a mais
+        recente é executada, com a união dos escopos ('period' recarrega
+        todos os gráficos, 'source' apenas o monitoramento). Cada mudança
+        incrementa a geração; uma execução que ficou obsoleta antes de
+        consultar os dados (show_loading processa eventos do Tk) é descartada.
+        A consulta e o desenho rodam no loop principal e não são interrompidos.
+        """
+        self._filter_scope.add(scope)
+        self._filter_generation += 1
+        if self._filter_job is not None:
+            self.root.after_cancel(self._filter_job)
+        self._filter_job = self.root.after(
+            FILTER_DEBOUNCE_MS, self._run_filter_update, self._filter_generation
+        )
+    
+    def _is_stale(self, generation: int) -> bool:
+        """Indica se uma mudança mais nova substituiu esta atualização"""
+        return generation != self._filter_generation
+    
+    def _run_filter_update(self, generation: int):
+        """Executa a atualização agendada se ainda for a mais recente"""
+        self._filter_job = None
+        if self._is_stale(generation):
+            return
+        
+        scope = set(self._filter_scope)
         try:
-            self.show_loading("Atualizando dados...")
-            
-            # Obtém valores dos filtros
-            period = self.period_combo.get().lower().replace(' ', '_')
-            source = self.source_combo.get()
-            if source == "Todas":
-                source = None
-            
-            # Força atualização dos dados
-            self.data_manager.clear_cache()
-            
-            # Obtém dados históricos filtrados
-            data = self.data_manager.get_historical_data(period=period, source=source)
-            
-            # Atualiza gráfico de fontes
-            if not data.empty:
-                self.chart_manager.plot_consumption(
-                    data,
-                    title=f"Consumo por Fonte {'Total' if source is None else source}"
-                )
-                self._images['source'] = self.chart_manager.get_image()
-                self.source_label.config(image=self._images['source'])
+            if 'period' in scope:
+                self.show_loading("Atualizando período de análise...")
+            else:
+                self.show_loading("Atualizando dados...")
             
-            # Atualiza lista de monitoramento
-            for item in self.monitoring_list.get_children():
-                self.monitoring_list.delete(item)
-                
-            for _, row in data.iterrows():
-                self.monitoring_list.insert(
-                    '',
-                    'end',
-                    values=(
-                        row.get('timestamp', '').strftime('%H:%M:%S') if 'timestamp' in row else '',
-                        row.get('source', source or 'Total'),
-                        f"{row.get('value', 0):.2f} kWh",
-                        f"R$ {row.get('cost', 0):.2f}" if 'cost' in row else 'N/A'
-                    )
-                )
+            # show_loading processa eventos pendentes; confere se ainda vale
+            if self._is_stale(generation):
+                return
             
-            # Atualiza status
-            self.statusbar.config(
-                text=f"Última atualização: {datetime.now().strftime('%H:%M:%S')}"
-            )
+            if 'period' in scope:
+                self._refresh_period()
+            else:
+                self._refresh_source()
             
         except Exception as e:
             logging.error(f"Erro ao atualizar filtros: {str(e)}")
             messagebox.showerror("Erro", f"Erro ao atualizar filtros: {str(e)}")
         finally:
-            self.hide_loading()
+            # Execução obsoleta deixa escopo e loading para a mais recente
+            if not self._is_stale(generation):
+                self._filter_scope.clear()
+                self.hide_loading()
+    
+    def _refresh_period(self):
+        """Recarrega todos os gráficos e listas para o período selecionado"""
+        # Período só recorta o histórico em cache; nada é invalidado
+        consumption = self.data_manager.get_consumption_data()
+        tariffs = self.data_manager.get_tariff_data()
+        recommendations = self.data_manager.get_recommendations()
+        
+        # Atualiza interface
+        self.update_charts(consumption, tariffs, recommendations)
+        self.update_lists(consumption, recommendations)
+        
+        # Atualiza status
+        self.statusbar.config(
+            text=f"Última atualização: {datetime.now().strftime('%H:%M:%S')}"
+        )
+    
+    def _refresh_source(self):
+        """Atualiza gráfico e lista de monitoramento para período e fonte"""
+        # Obtém valores dos filtros
+        period = self.period_combo.get().lower().replace(' ', '_')
+        source = self.source_combo.get()
+        if source == "Todas":
+            source = None
+        
+        # Obtém dados históricos filtrados
+        data = self.data_manager.get_historical_data(period=period, source=source)
+        
+        # Atualiza gráfico de fontes (se a aba de monitoramento estiver visível)
+        self._dirty_charts.add('source')
+        self.render_visible_charts()
+        
+        # Atualiza lista de monitoramento (mais recentes primeiro)
+        self.monitoring_list.set_data(
+            data.iloc[::-1],
+            defaults={'fonte': source or 'Total', 'consumo': 0.0, 'custo': 'N/A'}
+        )
+        
+        # Atualiza status
+        self.statusbar.config(
+            text=f"Última atualização: {datetime.now().strftime('%H:%M:%S')}"
+        )
     
     def on_mode_change(self, event):
         """Manipula mudança de modo"""
@@ -803,7 +855,7 @@ class MainWindow:
             self.show_loading("Alterando modo de operação...")
             
             mode = self.mode_combo.get().lower()
-            self.data_manager.optimizer.set_mode(mode)
+            self.data_manager.set_mode(mode)
             self.update_data()
             
         except Exception as e:
@@ -816,20 +868,8 @@ class MainWindow:
     def on_report_type_change(self, event):
         """Manipula mudança de tipo de relatório"""
         try:
-            report_type = self.report_combo.get()
-            if report_type == "Análise de Eficiência":
-                efficiency_data = self.data_manager.format_for_efficiency_plot()
-                self.chart_manager.plot_efficiency(efficiency_data)
-                self._images['report'] = self.chart_manager.get_image()
-                self.report_label.config(image=self._images['report'])
-            elif report_type == "Fontes Renováveis":
-                comparison_data = self.data_manager.format_for_comparison_plot()
-                self.chart_manager.plot_comparison(comparison_data)
-                self._images['report'] = self.chart_manager.get_image()
-                self.report_label.config(image=self._images['report'])
-            else:
-                # Limpa visualização para outros tipos
-                self.report_label.config(image='')
+            self.render_report_chart()
+            self._dirty_charts.discard('report')
                 
         except Exception as e:
             logging.error(f"Erro ao mudar tipo de relatório: {str(e)}")
@@ -872,45 +912,93 @@ class MainWindow:
             self.hide_loading()
     
     def on_export(self):
-        """Manipula exportação de dados"""
+        """Manipula exportação de dados (em segundo plano, com progresso)"""
         try:
+            if self.export_cancel is not None:
+                messagebox.showwarning("Aviso", "Já existe uma exportação em andamento")
+                return
+            
             filetypes = (
                 ('CSV files', '*.csv'),
-                ('Excel files', '*.xlsx')
+                ('CSV gzip files', '*.csv.gz'),
+                ('Parquet files', '*.parquet')
             )
             
             filepath = filedialog.asksaveasfilename(
                 title='Exportar dados',
-                filetypes=filetypes
+                filetypes=filetypes,
+                defaultextension='.csv'
             )
             
             if not filepath:
                 return
             
+            try:
+                start = datetime.strptime(self.start_date.entry.get(), "%d/%m/%Y").strftime("%Y-%m-%d")
+                end = datetime.strptime(self.end_date.entry.get(), "%d/%m/%Y").strftime("%Y-%m-%d")
+            except ValueError:
+                messagebox.showerror("Erro", "Data inválida. Use o formato DD/MM/AAAA")
+                return
+            
             self.show_loading("Exportando dados...")
-                
-            format = "csv" if filepath.endswith(".csv") else "xlsx"
-            start = self.start_date.entry.get()
-            end = self.end_date.entry.get()
+            self.export_cancel_button.pack(side='bottom', pady=5)
             
-            filepath = self.data_manager.export_data(
+            # Callbacks chegam da thread de exportação; o Tk só é tocado no loop principal
+            events = Queue()
+            self.export_cancel = self.data_manager.export_data_async(
                 start,
                 end,
-                format=format
+                filepath,
+                progress=lambda fraction, rows: events.put(('progress', fraction, rows)),
+                done=lambda result, error: events.put(('done', result, error))
             )
-            
-            messagebox.showinfo("Sucesso", f"Dados exportados: {filepath}")
+            self.root.after(EXPORT_POLL_MS, self._poll_export, events)
             
         except Exception as e:
             logging.error(f"Erro ao exportar dados: {str(e)}")
             messagebox.showerror("Erro", f"Erro ao exportar dados: {str(e)}")
-        finally:
-            self.hide_loading()
+            self._finish_export()
+    
+    def on_cancel_export(self):
+        """Solicita o cancelamento da exportação em andamento"""
+        if self.export_cancel is not None:
+            self.export_cancel.set()
+            self.export_cancel_button.config(state='disabled')
+            self.loading_label.config(text="Cancelando exportação...")
+    
+    def _finish_export(self):
+        """Esconde progresso e botão de cancelar da exportação"""
+        self.export_cancel = None
+        self.export_cancel_button.config(state='normal')
+        self.export_cancel_button.pack_forget()
+        self.hide_loading()
+    
+    def _poll_export(self, events: Queue):
+        """Atualiza progresso da exportação e trata o término"""
+        while not events.empty():
+            kind, first, second = events.get_nowait()
+            if kind == 'progress':
+                if self.export_cancel is not None and self.export_cancel.is_set():
+                    continue
+                self.loading_label.config(
+                    text=f"Exportando dados... {first:.0%} ({second} linhas)"
+                )
+                continue
+            
+            self._finish_export()
+            if isinstance(second, ExportCancelled):
+                messagebox.showinfo("Exportação", "Exportação cancelada")
+            elif second is not None:
+                messagebox.showerror("Erro", f"Erro ao exportar dados: {str(second)}")
+            else:
+                messagebox.showinfo("Sucesso", f"Dados exportados: {first}")
+            return
+        
+        self.root.after(EXPORT_POLL_MS, self._poll_export, events)
 
     def on_refresh(self):
         """Manipula atualização manual"""
-        self.data_manager.clear_cache()
-        self.update_data()
+        self.update_data(force_update=True)
     
     def on_dark_mode(self):
         """Manipula modo escuro"""
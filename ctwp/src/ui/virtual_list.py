@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Lista virtualizada (Treeview) para grandes volumes de linhas
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2024
+"""
+
+import logging
+from typing import Any, Callable, Dict, Optional, Sequence
+import numpy as np
+import pandas as pd
+import ttkbootstrap as ttk
+
+# Altura padrão de linha do Treeview (pixels) quando o tema não informa
+DEFAULT_ROW_HEIGHT = 20
+
+class VirtualTreeview:
+    """Treeview que materializa apenas as linhas visíveis
+    
+    Os dados ficam em um buffer colunar (um array por coluna); o Treeview
+    mantém um conjunto fixo de itens, do tamanho da área visível, que são
+    reaproveitados ao rolar. Cada item só é reescrito quando o texto muda,
+    então atualizações periódicas não reconstroem a lista.
+    """
+    
+    def __init__(
+        self,
+        master,
+        columns: Sequence[str],
+        headings: Sequence[str],
+        formatters: Dict[str, Callable[[Any], str]],
+        fields: Dict[str, str]
+    ):
+        """Cria Treeview e barra de rolagem
+        
+        columns/headings: colunas exibidas e seus títulos.
+        fields: coluna exibida -> coluna do DataFrame de origem.
+        formatters: coluna exibida -> função que formata um valor.
+        """
+        self.columns = list(columns)
+        self.fields = fields
+        self.formatters = formatters
+        self.buffer = {}
+        self.length = 0
+        self.offset = 0
+        self.items = []
+        self.rendered = []
+        
+        self.tree = ttk.Treeview(master, columns=self.columns, show='headings')
+        for column, heading in zip(self.columns, headings):
+            self.tree.heading(column, text=heading)
+        
+        self.scrollbar = ttk.Scrollbar(master, orient='vertical', command=self.yview)
+        
+        # Rolagem é virtual: eventos do mouse movem o deslocamento no buffer
+        self.tree.bind('<Configure>', self._on_configure)
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda event: self._scroll(-3))
+        self.tree.bind('<Button-5>', lambda event: self._scroll(3))
+        
+        style_height = ttk.Style().lookup('Treeview', 'rowheight')
+        self.row_height = int(style_height) if style_height else DEFAULT_ROW_HEIGHT
+        self.visible_rows = 1
+    
+    def pack(self, **kwargs) -> None:
+        """Posiciona Treeview e barra de rolagem"""
+        self.tree.pack(**kwargs)
+        self.scrollbar.pack(side='right', fill='y')
+    
+    def set_data(self, data: Optional[pd.DataFrame], defaults: Optional[Dict[str, Any]] = None) -> None:
+        """Substitui o buffer colunar e redesenha as linhas visíveis
+        
+        Colunas ausentes no DataFrame usam o valor de defaults (ou vazio).
+        A posição de rolagem é mantida, limitada ao novo tamanho.
+        """
+        defaults = defaults or {}
+        data = data if data is not None else pd.DataFrame()
+        self.length = len(data)
+        self.buffer = {
+            column: (
+                data[field].to_numpy() if field in data.columns
+                else np.full(self.length, defaults.get(column, ''), dtype=object)
+            )
+            for column, field in self.fields.items()
+        }
+        self._clamp()
+        self._render()
+    
+    def yview(self, *args) -> None:
+        """Comando da barra de rolagem ('moveto' fração / 'scroll' n unidades|páginas)"""
+        if not args:
+            return
+        if args[0] == 'moveto':
+            self.offset = int(float(args[1]) * self.length)
+        elif args[0] == 'scroll':
+            step = self.visible_rows if args[2] == 'pages' else 1
+            self.offset += int(args[1]) * step
+        self._clamp()
+        self._render()
+    
+    def _scroll(self, units: int) -> str:
+        """Rola algumas linhas (roda do mouse)"""
+        self.yview('scroll', units, 'units')
+        return 'break'
+    
+    def _on_mousewheel(self, event) -> str:
+        """Converte delta da roda do mouse em linhas"""
+        units = -int(event.delta / 120) if abs(event.delta) >= 120 else -int(np.sign(event.delta))
+        return self._scroll(units * 3)
+    
+    def _on_configure(self, event) -> None:
+        """Ajusta quantidade de linhas visíveis ao tamanho do widget"""
+        # Uma linha da altura é ocupada pelo cabeçalho
+        visible_rows = max(event.height // self.row_height - 1, 1)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self._clamp()
+            self._render()
+    
+    def _clamp(self) -> None:
+        """Mantém o deslocamento dentro do buffer"""
+        self.offset = min(max(self.offset, 0), max(self.length - self.visible_rows, 0))
+    
+    def _row(self, index: int) -> tuple:
+        """Formata uma linha do buffer"""
+        values = []
+        for column in self.columns:
+            value = self.buffer[column][index]
+            formatter = self.formatters.get(column)
+            try:
+                values.append(formatter(value) if formatter else str(value))
+            except Exception:
+                values.append(str(value))
+        return tuple(values)
+    
+    def _render(self) -> None:
+        """Materializa as linhas visíveis, reescrevendo só os itens alterados"""
+        try:
+            count = min(self.visible_rows, self.length - self.offset)
+            rows = [self._row(self.offset + i) for i in range(count)]
+            
+            # Ajusta o conjunto de itens ao número de linhas visíveis
+            while len(self.items) < count:
+                self.items.append(self.tree.insert('', 'end', values=()))
+                self.rendered.append(None)
+            while len(self.items) > count:
+                self.tree.delete(self.items.pop())
+                self.rendered.pop()
+            
+            for position, values in enumerate(rows):
+                if self.rendered[position] != values:
+                    self.tree.item(self.items[position], values=values)
+                    self.rendered[position] = values
+            
+            if self.length:
+                self.scrollbar.set(
+                    self.offset / self.length,
+                    (self.offset + count) / self.length
+                )
+            else:
+                self.scrollbar.set(0.0, 1.0)
+        
+        except Exception as e:
+            logging.error(f"Erro ao desenhar lista virtual: {str(e)}")
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Configuração comum dos testes
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2024
+"""
+
+import sys
+from pathlib import Path
+
+# Módulos do sistema são importados a partir de src (como em main.py)
+SRC_DIR = Path(__file__).resolve().parent.parent / 'src'
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
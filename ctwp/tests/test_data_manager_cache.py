@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes das validades e dependências do cache do DataManager
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2024
+"""
+
+import unittest
+from unittest import mock
+import pandas as pd
+from ui import data_manager
+from ui.data_manager import CACHE_TTLS, DataManager
+
+class FakeMonitor:
+    """Monitor que conta as consultas"""
+    
+    def __init__(self):
+        self.calls = {'consumption': 0, 'tariffs': 0}
+    
+    def get_current_consumption(self):
+        self.calls['consumption'] += 1
+        return {'total': 0.0, 'history': pd.DataFrame()}
+    
+    def get_current_tariffs(self):
+        self.calls['tariffs'] += 1
+        return {'current': 0.5, 'by_component': [], 'history': []}
+
+class FakeOptimizer:
+    """Otimizador que conta as recomendações geradas"""
+    
+    def __init__(self):
+        self.calls = 0
+        self.mode = None
+    
+    def get_recommendations(self):
+        self.calls += 1
+        return {'items': [], 'savings': 0.0, 'results': []}
+    
+    def set_mode(self, mode):
+        self.mode = mode
+
+class TestDataManagerCache(unittest.TestCase):
+    """Testes de _cached, invalidate e _dependents"""
+    
+    def setUp(self):
+        """Gerenciador com relógio controlado"""
+        self.now = 1000.0
+        patcher = mock.patch.object(data_manager, 'time', mock.Mock(monotonic=lambda: self.now))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        self.monitor = FakeMonitor()
+        self.optimizer = FakeOptimizer()
+        self.manager = DataManager(self.monitor, self.optimizer, reporter=None)
+    
+    def test_fresh_entry_is_reused(self):
+        """Dentro da validade a entrada vem do cache"""
+        self.manager.get_tariff_data()
+        self.now += CACHE_TTLS['tariffs'] - 1
+        self.manager.get_tariff_data()
+        self.assertEqual(self.monitor.calls['tariffs'], 1)
+    
+    def test_stale_entry_is_refetched(self):
+        """Entrada expirada é consultada de novo"""
+        self.manager.get_tariff_data()
+        self.now += CACHE_TTLS['tariffs']
+        self.assertIsNone(self.manager.get_cached_data('tariffs'))
+        self.manager.get_tariff_data()
+        self.assertEqual(self.monitor.calls['tariffs'], 2)
+    
+    def test_dependents(self):
+        """Dependências diretas e indiretas"""
+        self.assertEqual(self.manager._dependents('consumption'), {'history', 'recommendations'})
+        self.assertEqual(self.manager._dependents('mode'), {'recommendations'})
+        self.assertEqual(self.manager._dependents('recommendations'), set())
+    
+    def test_invalidating_parent_drops_dependents(self):
+        """Invalidar consumo remove histórico e recomendações, mas não tarifas"""
+        self.manager.update_data()
+        self.manager.get_history()
+        self.manager.invalidate('consumption')
+        
+        self.assertNotIn('history', self.manager.cache)
+        self.assertNotIn('recommendations', self.manager.cache)
+        self.assertIn('tariffs', self.manager.cache)
+        
+        self.manager.get_recommendations()
+        self.assertEqual(self.optimizer.calls, 2)
+        self.assertEqual(self.monitor.calls['tariffs'], 1)
+    
+    def test_reloading_parent_drops_dependents(self):
+        """Consumo expirado recarregado invalida as recomendações"""
+        self.manager.update_data()
+        self.now += CACHE_TTLS['consumption']
+        self.manager.get_consumption_data()
+        self.manager.get_recommendations()
+        self.assertEqual(self.monitor.calls['consumption'], 2)
+        self.assertEqual(self.optimizer.calls, 2)
+    
+    def test_mode_change_drops_recommendations(self):
+        """Trocar o modo do otimizador só invalida as recomendações"""
+        self.manager.update_data()
+        self.manager.set_mode('economia')
+        self.assertEqual(self.optimizer.mode, 'economia')
+        self.assertNotIn('recommendations', self.manager.cache)
+        self.assertIn('consumption', self.manager.cache)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes da conexão Oracle em segundo plano
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2024
+"""
+
+import time
+import unittest
+from threading import Event
+from unittest import mock
+import database
+from database import OracleConnection
+
+class FakeCursor:
+    """Cursor que falha com o erro da conexão"""
+    
+    def __init__(self, connection):
+        self.connection = connection
+    
+    def execute(self, statement, params=None):
+        if self.connection.error is not None:
+            raise self.connection.error
+        self.description = [('VALOR',)]
+    
+    def fetchall(self):
+        return [(1,)]
+    
+    def close(self):
+        pass
+
+class FakeConnection:
+    """Conexão Oracle simulada"""
+    
+    def __init__(self, error=None, healthy=True):
+        self.error = error
+        self.healthy = healthy
+    
+    def cursor(self):
+        return FakeCursor(self)
+    
+    def is_healthy(self):
+        return self.healthy
+    
+    def commit(self):
+        pass
+    
+    def rollback(self):
+        if self.error is not None:
+            raise self.error
+    
+    def close(self):
+        pass
+
+class TestReconnect(unittest.TestCase):
+    """Testes da reconexão após queda da conexão"""
+    
+    def setUp(self):
+        """Conexão online com credenciais e esperas curtas"""
+        patcher = mock.patch.object(database, 'CONNECT_RETRY_INITIAL', 0.01)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        self.db = OracleConnection(offline=True)
+        self.db.user, self.db.password, self.db.dsn = 'user', 'secret', 'localhost/XE'
+        self.db.oracle_client_path = None
+        self.online = Event()
+        self.calls = 0
+    
+    def on_online(self):
+        """Conta as ativações do modo online"""
+        self.calls += 1
+        self.online.set()
+    
+    def _go_online(self):
+        """Conecta em segundo plano com uma conexão simulada"""
+        with mock.patch.object(database.oracledb, 'connect', return_value=FakeConnection()):
+            self.db.connect_async(on_online=self.on_online)
+            self.assertTrue(self.online.wait(5))
+        self.assertTrue(self.db.online)
+        self.online.clear()
+    
+    def _check_reconnect(self):
+        """Modo offline com reconexão agendada; reconecta com o mesmo on_online"""
+        self.assertFalse(self.db.online)
+        self.assertIsNone(self.db.connection)
+        self.assertIsNotNone(self.db._connect_stop)
+        
+        self.gate.set()
+        self.assertTrue(self.online.wait(5))
+        self.assertTrue(self.db.online)
+        self.assertEqual(self.calls, 2)
+    
+    def _blocked_connect(self, **kwargs):
+        """oracledb.connect que só conecta depois de liberado"""
+        self.assertTrue(self.gate.wait(5))
+        return FakeConnection()
+    
+    def test_query_error_restarts_background_connection(self):
+        """Queda da conexão em uma consulta volta ao modo offline e reconecta"""
+        self._go_online()
+        self.gate = Event()
+        self.db.connection.error = database.oracledb.DatabaseError(
+            'DPI-1080: connection was closed by ORA-3113'
+        )
+        
+        with mock.patch.object(database.oracledb, 'connect', side_effect=self._blocked_connect):
+            self.assertTrue(self.db.execute_query("SELECT 1 AS valor FROM DUAL").empty)
+            self._check_reconnect()
+    
+    def test_dml_error_restarts_background_connection(self):
+        """Queda da conexão em um DML volta ao modo offline e reconecta"""
+        self._go_online()
+        self.gate = Event()
+        self.db.connection.error = database.oracledb.DatabaseError(
+            'ORA-03113: end-of-file on communication channel'
+        )
+        
+        with mock.patch.object(database.oracledb, 'connect', side_effect=self._blocked_connect):
+            self.assertFalse(self.db.execute_dml("DELETE FROM consumption_history WHERE 1 = 0"))
+            self._check_reconnect()
+    
+    def test_unhealthy_connection_restarts_background_connection(self):
+        """Conexão não saudável é descartada antes da consulta"""
+        self._go_online()
+        self.gate = Event()
+        self.db.connection.healthy = False
+        
+        with mock.patch.object(database.oracledb, 'connect', side_effect=self._blocked_connect):
+            self.assertFalse(self.db.connect())
+            self._check_reconnect()
+    
+    def test_other_errors_keep_connection(self):
+        """Erro de SQL não derruba a conexão"""
+        self._go_online()
+        self.db.connection.error = database.oracledb.DatabaseError('ORA-00942: table or view does not exist')
+        
+        self.assertTrue(self.db.execute_query("SELECT * FROM inexistente").empty)
+        self.assertTrue(self.db.online)
+        self.assertIsNotNone(self.db.connection)
+        self.assertIsNone(self.db._connect_stop)
+    
+    def test_single_background_connection(self):
+        """Nova chamada durante as tentativas reaproveita o mesmo Event"""
+        with mock.patch.object(database.oracledb, 'connect', side_effect=RuntimeError('ORA-12541')):
+            stop = self.db.connect_async()
+            self.assertIs(self.db.connect_async(on_online=self.on_online), stop)
+            stop.set()
+            # Espera a thread de conexão encerrar antes de desfazer o mock
+            for _ in range(500):
+                if self.db._connect_stop is None:
+                    break
+                time.sleep(0.01)
+            self.assertIsNone(self.db._connect_stop)
+        self.assertEqual(self.db._on_online, self.on_online)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes da exportação de dados de consumo
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2024
+"""
+
+import gzip
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from threading import Event
+from unittest import mock
+import pandas as pd
+from database import OracleConnection
+from local_store import LocalStore
+from services.exporting import DataExporter, ExportCancelled
+
+START = datetime(2024, 1, 1)
+END = datetime(2024, 1, 22)
+
+class FakeSource:
+    """Fonte com uma leitura por dia; falha após fail_at janelas lidas"""
+    
+    def __init__(self, fail_at=None):
+        self.fail_at = fail_at
+        self.calls = 0
+    
+    def read_consumption_range(self, start, end):
+        self.calls += 1
+        if self.fail_at is not None and self.calls > self.fail_at:
+            raise ConnectionError('ORA-03113')
+        timestamps = pd.date_range(start, end, freq='D', inclusive='left')
+        return pd.DataFrame({
+            'source': 'Rede',
+            'value': [float(day.day) for day in timestamps],
+            'timestamp': timestamps,
+            'cost': 0.5
+        })
+
+class TestDataExporter(unittest.TestCase):
+    """Testes do DataExporter"""
+    
+    def setUp(self):
+        """Diretório de saída temporário"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+    
+    def tearDown(self):
+        """Remove diretório temporário"""
+        self.tmp.cleanup()
+    
+    def _files(self):
+        """Arquivos presentes no diretório de saída"""
+        return sorted(path.name for path in self.dir.iterdir())
+    
+    def test_formats(self):
+        """CSV, CSV gzip e Parquet trazem todas as janelas com um único cabeçalho"""
+        exporter = DataExporter(FakeSource())
+        csv = exporter.export(START, END, str(self.dir / 'dados.csv'))
+        gz = exporter.export(START, END, str(self.dir / 'dados.csv.gz'))
+        parquet = exporter.export(START, END, str(self.dir / 'dados.parquet'))
+        
+        self.assertEqual(len(pd.read_csv(csv)), 21)
+        with gzip.open(gz, 'rt', encoding='utf-8') as handle:
+            self.assertEqual(len(pd.read_csv(handle)), 21)
+        self.assertEqual(pd.read_parquet(parquet)['value'].tolist(), [float(day) for day in range(1, 22)])
+        self.assertEqual(self._files(), ['dados.csv', 'dados.csv.gz', 'dados.parquet'])
+    
+    def test_read_error_aborts(self):
+        """Erro de leitura no meio do período não deixa arquivo parcial nem troca o destino"""
+        target = self.dir / 'dados.csv'
+        target.write_text('anterior')
+        progress = []
+        
+        with self.assertRaises(ConnectionError):
+            DataExporter(FakeSource(fail_at=1)).export(
+                START, END, str(target), progress=lambda fraction, rows: progress.append(rows)
+            )
+        self.assertEqual(progress, [7])
+        self.assertEqual(self._files(), ['dados.csv'])
+        self.assertEqual(target.read_text(), 'anterior')
+    
+    def test_cancel(self):
+        """Cancelamento entre janelas interrompe e remove o temporário"""
+        cancel = Event()
+        source = FakeSource()
+        
+        with self.assertRaises(ExportCancelled):
+            DataExporter(source).export(
+                START, END, str(self.dir / 'dados.parquet'),
+                progress=lambda fraction, rows: cancel.set(),
+                cancel=cancel
+            )
+        self.assertEqual(source.calls, 1)
+        self.assertEqual(self._files(), [])
+    
+    def test_async_reports_error(self):
+        """export_async entrega o erro da leitura ao callback done"""
+        finished = Event()
+        results = []
+        
+        def done(result, error):
+            results.append((result, error))
+            finished.set()
+        
+        DataExporter(FakeSource(fail_at=0)).export_async(
+            START, END, str(self.dir / 'dados.csv'), done=done
+        )
+        self.assertTrue(finished.wait(5))
+        self.assertIsNone(results[0][0])
+        self.assertIsInstance(results[0][1], ConnectionError)
+        self.assertEqual(self._files(), [])
+
+class TestReadConsumptionRange(unittest.TestCase):
+    """Testes da leitura sem dados substitutos usada pela exportação"""
+    
+    def setUp(self):
+        """Base local temporária com uma leitura"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = LocalStore(Path(self.tmp.name) / 'local.sqlite3')
+        self.store.save_consumption({
+            'timestamp': START,
+            'consumption': 10.0,
+            'cost': 5.0,
+            'source': 'Rede'
+        })
+    
+    def tearDown(self):
+        """Remove base temporária"""
+        self.tmp.cleanup()
+    
+    def test_query_error_raises(self):
+        """Erro na consulta ao Oracle vira exceção, não DataFrame vazio"""
+        db = OracleConnection(self.store, offline=True)
+        db._offline_mode = False
+        with mock.patch.object(db, '_fetch_query', return_value=None):
+            with self.assertRaises(ConnectionError):
+                db.read_consumption_range(START, END)
+    
+    def test_offline_reads_local_store(self):
+        """Offline lê a base local, sem mock, mesmo fora do período gravado"""
+        db = OracleConnection(self.store, offline=True)
+        self.assertEqual(db.read_consumption_range(START, END)['value'].tolist(), [10.0])
+        self.assertTrue(db.read_consumption_range(END, END + timedelta(days=7)).empty)
+    
+    def test_offline_without_store_raises(self):
+        """Offline sem base local não gera dados mock"""
+        db = OracleConnection(None, offline=True)
+        with self.assertRaises(ConnectionError):
+            db.read_consumption_range(START, END)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do histórico de consumo em cache colunar
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2024
+"""
+
+import unittest
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from ui.data_manager import PERIOD_WINDOWS, DataManager, HistoryFrame
+
+NOW = datetime(2024, 6, 1, 12)
+
+def history(hours=24 * 40, sources=('Rede', 'Solar')):
+    """Leituras horárias por fonte terminando em NOW, fora de ordem"""
+    rows = [
+        {
+            'timestamp': (NOW - timedelta(hours=hour)).strftime('%Y-%m-%d %H:%M:%S'),
+            'source': source,
+            'value': float(hour % 17) + index,
+            'cost': float(hour % 5) / 2
+        }
+        for hour in range(hours)
+        for index, source in enumerate(sources)
+    ]
+    return pd.DataFrame(rows)
+
+class FakeMonitor:
+    """Monitor que conta as leituras de consumo"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def get_current_consumption(self):
+        self.calls += 1
+        return {'total': 0.0, 'history': history(hours=48)}
+
+class TestHistoryFrame(unittest.TestCase):
+    """Testes da conversão do histórico"""
+    
+    def test_typed_and_sorted(self):
+        """Timestamp datetime64, fonte categórica, valores float64 e ordem temporal"""
+        frame = HistoryFrame(history(), now=NOW).frame
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(frame['timestamp']))
+        self.assertIsInstance(frame['source'].dtype, pd.CategoricalDtype)
+        self.assertEqual(frame['value'].dtype, np.float64)
+        self.assertEqual(frame['cost'].dtype, np.float64)
+        self.assertTrue(frame['timestamp'].is_monotonic_increasing)
+    
+    def test_list_of_dicts(self):
+        """Lista de dicts (formato do monitor) é aceita"""
+        records = history(hours=3).to_dict('records')
+        history_frame = HistoryFrame(records, now=NOW)
+        self.assertEqual(len(history_frame), 6)
+        self.assertEqual(sorted(history_frame.sources), ['Rede', 'Solar'])
+    
+    def test_empty(self):
+        """Histórico vazio gera janelas vazias"""
+        history_frame = HistoryFrame(pd.DataFrame(), now=NOW)
+        self.assertEqual(len(history_frame), 0)
+        self.assertTrue(history_frame.window('todos').empty)
+        self.assertEqual(history_frame.sources, [])
+
+class TestWindows(unittest.TestCase):
+    """Testes das janelas e agregados pré-calculados"""
+    
+    def setUp(self):
+        """Histórico de 40 dias em duas fontes"""
+        self.history = HistoryFrame(history(), now=NOW)
+        self.readings = history().astype({'timestamp': 'datetime64[ns]'})
+    
+    def _expected(self, period, source=None):
+        """Leituras do período filtradas diretamente no DataFrame"""
+        df = self.readings
+        delta = PERIOD_WINDOWS[period]
+        if delta is not None:
+            df = df[df['timestamp'] >= NOW - delta]
+        if source is not None:
+            df = df[df['source'] == source]
+        return df
+    
+    def test_windows_match_filter(self):
+        """Cada período e fonte devolve as mesmas leituras que o filtro direto"""
+        for period in PERIOD_WINDOWS:
+            for source in [None, 'Rede', 'Solar']:
+                window = self.history.window(period, source)
+                expected = self._expected(period, source)
+                self.assertEqual(len(window), len(expected), (period, source))
+                self.assertAlmostEqual(window['value'].sum(), expected['value'].sum())
+                self.assertTrue(window['timestamp'].is_monotonic_increasing)
+    
+    def test_summaries_match_aggregation(self):
+        """Somas, média e desvio padrão iguais aos do pandas"""
+        for period in ['último_dia', 'última_semana', 'todos']:
+            for source in [None, 'Solar']:
+                summary = self.history.summary(period, source)
+                expected = self._expected(period, source)
+                self.assertEqual(summary['count'], len(expected))
+                self.assertAlmostEqual(summary['value'], expected['value'].sum())
+                self.assertAlmostEqual(summary['cost'], expected['cost'].sum())
+                self.assertAlmostEqual(summary['mean'], expected['value'].mean())
+                self.assertAlmostEqual(summary['std'], expected['value'].std(), places=6)
+    
+    def test_summary_by_source(self):
+        """Uma linha por fonte"""
+        by_source = self.history.summary_by_source('último_dia').set_index('source')
+        self.assertEqual(by_source['count'].tolist(), [25, 25])
+    
+    def test_unknown_period_and_source(self):
+        """Período desconhecido vira último_ano; fonte sem leituras fica vazia"""
+        self.assertEqual(len(self.history.window('qualquer')), len(self.history.window('último_ano')))
+        self.assertTrue(self.history.window('todos', 'Eólica').empty)
+        self.assertEqual(self.history.summary('todos', 'Eólica')['count'], 0)
+
+class TestHistoryCache(unittest.TestCase):
+    """Testes do histórico no cache do DataManager"""
+    
+    def test_converted_once_per_update(self):
+        """Filtros reutilizam o mesmo HistoryFrame até o consumo ser recarregado"""
+        monitor = FakeMonitor()
+        manager = DataManager(monitor, optimizer=None, reporter=None)
+        history_frame = manager.get_history()
+        
+        self.assertIs(manager.get_history(), history_frame)
+        self.assertEqual(len(manager.get_historical_data('todos', 'Solar')), 48)
+        self.assertEqual(monitor.calls, 1)
+        
+        manager.get_consumption_data(force_update=True)
+        self.assertIsNot(manager.get_history(), history_frame)
+        self.assertEqual(monitor.calls, 2)
+
+if __name__ == '__main__':
+    unittest.main()
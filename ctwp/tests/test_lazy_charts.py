@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do desenho dos gráficos por aba
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2024
+"""
+
+import sys
+import types
+import unittest
+from unittest import mock
+
+# A janela só precisa do ttkbootstrap ao criar widgets; os testes montam a instância sem Tk
+with mock.patch.dict(sys.modules, {'ttkbootstrap': types.SimpleNamespace()}):
+    from ui.main_window import MainWindow
+
+class FakeNotebook:
+    """Notebook que devolve o nome da aba selecionada"""
+    
+    def __init__(self, selected):
+        self.selected = selected
+    
+    def select(self):
+        return self.selected
+
+class TestLazyCharts(unittest.TestCase):
+    """Testes de render_visible_charts e on_tab_changed"""
+    
+    def setUp(self):
+        """Janela com quatro abas e renderizadores que registram as chamadas"""
+        self.rendered = []
+        self.window = object.__new__(MainWindow)
+        self.window.notebook = FakeNotebook('.dashboard')
+        self.window._chart_tabs = {
+            'consumption': '.dashboard',
+            'source': '.monitoring',
+            'optimization': '.optimization',
+            'report': '.reports'
+        }
+        self.window._chart_renderers = {
+            chart: (lambda chart=chart: self.rendered.append(chart))
+            for chart in self.window._chart_tabs
+        }
+        self.window._dirty_charts = set()
+    
+    def _select(self, tab):
+        """Troca a aba e dispara <<NotebookTabChanged>>"""
+        self.window.notebook.selected = tab
+        self.window.on_tab_changed(None)
+    
+    def test_only_visible_tab_is_rendered(self):
+        """update_charts desenha só a aba visível e marca as demais"""
+        self.window.update_charts({}, {}, {})
+        self.assertEqual(self.rendered, ['consumption'])
+        self.assertEqual(self.window._dirty_charts, {'source', 'optimization', 'report'})
+    
+    def test_dirty_tab_renders_on_tab_change(self):
+        """Aba desatualizada é desenhada uma vez ao ser selecionada"""
+        self.window.update_charts({}, {}, {})
+        self._select('.monitoring')
+        self.assertEqual(self.rendered, ['consumption', 'source'])
+        
+        self._select('.dashboard')
+        self._select('.monitoring')
+        self.assertEqual(self.rendered, ['consumption', 'source'])
+        self.assertNotIn('source', self.window._dirty_charts)
+    
+    def test_clean_tab_is_not_redrawn(self):
+        """Trocar para aba sem dados novos não redesenha"""
+        self._select('.reports')
+        self.assertEqual(self.rendered, [])
+
+if __name__ == '__main__':
+    unittest.main()
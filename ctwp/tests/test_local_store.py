@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes da base local do modo offline
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2024
+"""
+
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from database import OracleConnection
+from local_store import LocalStore
+
+class FakeCursor:
+    """Cursor que registra os lotes enviados"""
+    
+    def __init__(self, connection):
+        self.connection = connection
+    
+    def executemany(self, statement, rows):
+        if self.connection.fail:
+            raise RuntimeError('ORA-03113')
+        self.connection.batches.append(rows)
+    
+    def close(self):
+        pass
+
+class FakeConnection:
+    """Conexão Oracle simulada"""
+    
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batches = []
+        self.commits = 0
+    
+    def cursor(self):
+        return FakeCursor(self)
+    
+    def commit(self):
+        self.commits += 1
+    
+    def rollback(self):
+        pass
+    
+    def is_healthy(self):
+        return not self.fail
+    
+    def close(self):
+        pass
+
+class TestOfflineSync(unittest.TestCase):
+    """Testes da sincronização das leituras gravadas offline"""
+    
+    def setUp(self):
+        """Base local temporária com leituras registradas offline"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = LocalStore(Path(self.tmp.name) / 'local.sqlite3')
+        self.db = OracleConnection(self.store, offline=True)
+        for hour, value in enumerate([10.0, 20.0, 30.0]):
+            self.assertTrue(self.db.save_consumption({
+                'timestamp': datetime(2024, 1, 1, hour),
+                'consumption': value,
+                'source': 'Rede',
+                'voltage': 220.0
+            }))
+    
+    def tearDown(self):
+        """Remove base temporária"""
+        self.tmp.cleanup()
+    
+    def _online(self, connection):
+        """Simula a conexão estabelecida"""
+        self.db.connection = connection
+        self.db._offline_mode = False
+    
+    def test_sends_pending_in_batches(self):
+        """Leituras pendentes são enviadas em lotes e marcadas como sincronizadas"""
+        connection = FakeConnection()
+        self._online(connection)
+        
+        self.assertEqual(self.db.sync_pending(batch_size=2), 3)
+        self.assertEqual([len(batch) for batch in connection.batches], [2, 1])
+        self.assertEqual(connection.commits, 2)
+        self.assertEqual(
+            set(connection.batches[0][0]),
+            {'timestamp', 'consumption', 'cost', 'source', 'equipment'}
+        )
+        self.assertIsNone(connection.batches[0][0]['cost'])
+        self.assertTrue(self.store.get_pending_consumption().empty)
+    
+    def test_failure_keeps_pending(self):
+        """Queda da conexão mantém as leituras pendentes e volta ao modo offline"""
+        self._online(FakeConnection(fail=True))
+        
+        with mock.patch.object(self.db, 'connect_async') as connect_async:
+            self.assertEqual(self.db.sync_pending(), 0)
+        self.assertEqual(len(self.store.get_pending_consumption()), 3)
+        self.assertFalse(self.db.online)
+        connect_async.assert_called_once_with()
+    
+    def test_offline_does_not_sync(self):
+        """Em modo offline nada é enviado"""
+        self.assertEqual(self.db.sync_pending(), 0)
+        self.assertEqual(len(self.store.get_pending_consumption()), 3)
+
+class TestParquetTariffs(unittest.TestCase):
+    """Testes da carga de tarifas vigentes do cache Parquet"""
+    
+    def setUp(self):
+        """Base local e cache Parquet temporários"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = LocalStore(Path(self.tmp.name) / 'local.sqlite3')
+        self.cache_dir = Path(self.tmp.name) / 'parquet'
+    
+    def tearDown(self):
+        """Remove diretório temporário"""
+        self.tmp.cleanup()
+    
+    def test_energy_rows_of_one_subgroup(self):
+        """Só entram componentes de energia do subgrupo/modalidade, em R$/kWh"""
+        rows = [
+            # subgrupo, modalidade, unidade, início, valor
+            ('B1', 'Convencional', 'R$/MWh', '2023-01-01', 250.0),
+            ('B1', 'Convencional', 'R$/MWh', '2024-01-01', 300.0),
+            ('B1', 'Convencional', 'R$/kW', '2024-01-01', 40.0),
+            ('A4', 'Azul', 'R$/MWh', '2024-01-01', 900.0),
+            ('B1', 'Branca', 'R$/MWh', '2024-01-01', 500.0)
+        ]
+        df = pd.DataFrame({
+            'SigNomeAgente': 'ENEL',
+            'DscComponenteTarifario': 'TE',
+            'DscSubGrupoTarifario': [row[0] for row in rows],
+            'DscModalidadeTarifaria': [row[1] for row in rows],
+            'DscBaseTarifaria': 'Tarifa de Aplicação',
+            'DscUnidade': [row[2] for row in rows],
+            'DatInicioVigencia': pd.to_datetime([row[3] for row in rows]),
+            'VlrComponenteTarifario': [row[4] for row in rows],
+            'ano': 2024
+        })
+        pq.write_to_dataset(
+            pa.Table.from_pandas(df, preserve_index=False),
+            str(self.cache_dir),
+            partition_cols=['ano']
+        )
+        
+        self.assertEqual(self.store.load_tariffs_from_parquet(self.cache_dir), 1)
+        tariffs = self.store.get_current_tariffs()
+        self.assertEqual(tariffs['unidade'].tolist(), ['R$/kWh'])
+        self.assertAlmostEqual(tariffs['value'].iloc[0], 0.3)
+
+if __name__ == '__main__':
+    unittest.main()
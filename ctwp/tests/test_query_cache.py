@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do cache de resultados de consultas
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2024
+"""
+
+import tempfile
+import time
+import unittest
+from pathlib import Path
+import pandas as pd
+from query_cache import (
+    CacheBackend,
+    MemoryCacheBackend,
+    QueryCache,
+    SQLiteCacheBackend,
+    frame_size,
+    tables_read,
+    tables_written
+)
+
+QUERY = """
+SELECT c.componente, c.valor
+FROM tarifas_vigentes c
+JOIN distribuidoras d ON d.id = c.id_distribuidora
+WHERE d.sigla = :sigla
+"""
+
+def frame(rows=3):
+    """DataFrame de resultado"""
+    return pd.DataFrame({'componente': ['TE'] * rows, 'valor': [float(i) for i in range(rows)]})
+
+class Loader:
+    """Loader que conta as consultas ao banco"""
+    
+    def __init__(self, result=None):
+        self.result = frame() if result is None else result
+        self.calls = 0
+    
+    def __call__(self):
+        self.calls += 1
+        return self.result
+
+class TestTables(unittest.TestCase):
+    """Testes da extração de tabelas do SQL"""
+    
+    def test_tables_read(self):
+        """FROM e JOIN, ignorando DUAL"""
+        self.assertEqual(tables_read(QUERY), {'tarifas_vigentes', 'distribuidoras'})
+        self.assertEqual(tables_read("SELECT SYSDATE FROM DUAL"), set())
+    
+    def test_tables_written(self):
+        """INSERT, UPDATE, DELETE e MERGE"""
+        self.assertEqual(tables_written("INSERT INTO Consumption_History VALUES (1)"), {'consumption_history'})
+        self.assertEqual(tables_written("UPDATE tarifas SET valor = 1"), {'tarifas'})
+        self.assertEqual(tables_written("DELETE FROM tarifas WHERE 1 = 0"), {'tarifas'})
+        self.assertEqual(tables_written("MERGE INTO tarifas t USING dual ON (1 = 1)"), {'tarifas'})
+
+class TestQueryCache(unittest.TestCase):
+    """Testes do read-through e da invalidação"""
+    
+    def setUp(self):
+        """Cache em memória"""
+        self.cache = QueryCache()
+        self.loader = Loader()
+    
+    def _get(self, sigla='ENEL', ttl=60):
+        """Consulta pelo cache"""
+        return self.cache.get_or_load(QUERY, {'sigla': sigla}, ttl, self.loader)
+    
+    def test_hit_and_binds(self):
+        """Mesma consulta vem do cache; binds diferentes são outra entrada"""
+        self._get()
+        cached = self._get()
+        self.assertEqual(self.loader.calls, 1)
+        pd.testing.assert_frame_equal(cached, frame())
+        
+        self._get('CPFL')
+        self.assertEqual(self.loader.calls, 2)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+    
+    def test_whitespace_is_normalized(self):
+        """Formatação do SQL não muda a chave"""
+        self.assertEqual(
+            self.cache.make_key(QUERY, {'sigla': 'ENEL'}),
+            self.cache.make_key(' '.join(QUERY.split()), {'sigla': 'ENEL'})
+        )
+    
+    def test_result_is_a_copy(self):
+        """Alterar o DataFrame retornado não altera o cache"""
+        self._get()['valor'] = 0.0
+        self.assertEqual(self._get()['valor'].tolist(), [0.0, 1.0, 2.0])
+    
+    def test_errors_are_not_cached(self):
+        """loader com erro (None) retorna vazio e não fica em cache"""
+        failing = Loader()
+        failing.result = None
+        self.assertTrue(self.cache.get_or_load(QUERY, None, 60, failing).empty)
+        self.cache.get_or_load(QUERY, None, 60, failing)
+        self.assertEqual(failing.calls, 2)
+    
+    def test_dml_invalidates_dependent_queries(self):
+        """DML em tabela lida invalida; em outra tabela não"""
+        self._get()
+        self.cache.invalidate_statement("INSERT INTO consumption_history VALUES (1)")
+        self._get()
+        self.assertEqual(self.loader.calls, 1)
+        
+        self.cache.invalidate_statement("UPDATE distribuidoras SET sigla = 'X'")
+        self._get()
+        self.assertEqual(self.loader.calls, 2)
+    
+    def test_ttl(self):
+        """Entrada expirada é recarregada"""
+        self._get(ttl=0.01)
+        time.sleep(0.02)
+        self._get(ttl=0.01)
+        self.assertEqual(self.loader.calls, 2)
+
+class TestBackendInterface(unittest.TestCase):
+    """Testes da interface dos backends"""
+    
+    def test_incomplete_backend_fails_on_creation(self):
+        """Backend sem todos os métodos não pode ser instanciado"""
+        class GetOnlyBackend(CacheBackend):
+            def get(self, key):
+                return None
+        
+        with self.assertRaises(TypeError):
+            GetOnlyBackend()
+        with self.assertRaises(TypeError):
+            CacheBackend()
+
+class TestMemoryBackend(unittest.TestCase):
+    """Testes do LRU limitado por bytes"""
+    
+    def test_evicts_least_recently_used(self):
+        """Acima do limite sai a entrada usada há mais tempo"""
+        df = frame()
+        backend = MemoryCacheBackend(max_bytes=2 * frame_size(df))
+        backend.set('a', df, 60)
+        backend.set('b', df, 60)
+        backend.get('a')
+        backend.set('c', df, 60)
+        
+        self.assertIsNotNone(backend.get('a'))
+        self.assertIsNone(backend.get('b'))
+        self.assertEqual(backend.stats()['evictions'], 1)
+        self.assertLessEqual(backend.stats()['bytes'], backend.max_bytes)
+    
+    def test_oversized_frame_is_skipped(self):
+        """DataFrame maior que o limite não é armazenado"""
+        backend = MemoryCacheBackend(max_bytes=10)
+        backend.set('a', frame(), 60)
+        self.assertEqual(backend.stats()['entries'], 0)
+
+class TestSQLiteBackend(unittest.TestCase):
+    """Testes do backend compartilhado"""
+    
+    def setUp(self):
+        """Arquivo de cache temporário"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_file = Path(self.tmp.name) / 'cache.sqlite3'
+    
+    def tearDown(self):
+        """Remove diretório temporário"""
+        self.tmp.cleanup()
+    
+    def test_shared_between_instances(self):
+        """Entradas e invalidações valem para outra instância no mesmo arquivo"""
+        first = QueryCache(SQLiteCacheBackend(self.db_file))
+        second = QueryCache(SQLiteCacheBackend(self.db_file))
+        loader = Loader()
+        
+        first.get_or_load(QUERY, None, 60, loader)
+        pd.testing.assert_frame_equal(second.get_or_load(QUERY, None, 60, loader), frame())
+        self.assertEqual(loader.calls, 1)
+        
+        second.invalidate_table('tarifas_vigentes')
+        first.get_or_load(QUERY, None, 60, loader)
+        self.assertEqual(loader.calls, 2)
+    
+    def test_evicts_by_last_access(self):
+        """Acima do limite saem as entradas acessadas há mais tempo"""
+        backend = SQLiteCacheBackend(self.db_file, max_bytes=10 ** 9)
+        for key in ['a', 'b', 'c']:
+            backend.set(key, frame(), 60)
+            time.sleep(0.01)
+        backend.get('a')
+        
+        backend.max_bytes = 2 * backend.stats()['bytes'] // 3
+        backend.set('a', frame(), 60)
+        self.assertIsNone(backend.get('b'))
+        self.assertIsNotNone(backend.get('c'))
+        self.assertIsNotNone(backend.get('a'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes da pré-agregação de gráficos de relatórios
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2024
+"""
+
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from services.reporting import ReportGenerator
+
+def _readings(hours: int) -> pd.DataFrame:
+    """Leituras horárias de três fontes"""
+    timestamps = pd.date_range('2024-01-01', periods=hours, freq='h')
+    return pd.DataFrame({
+        'timestamp': np.repeat(timestamps, 3),
+        'source': np.tile(['Rede', 'Solar', 'Bateria'], hours),
+        'consumption': np.tile([300.0, 100.0, 50.0], hours),
+        'cost': np.tile([150.0, 50.0, 25.0], hours)
+    })
+
+class TestAggregateForDisplay(unittest.TestCase):
+    """Testes de ReportGenerator._aggregate_for_display"""
+    
+    def setUp(self):
+        """Gerador em diretório temporário com limite baixo de base grande"""
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        self.reporter = ReportGenerator(None, large_dataset_rows=100)
+    
+    def tearDown(self):
+        """Restaura diretório de trabalho"""
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+    
+    def test_small_dataset_unchanged(self):
+        """Bases pequenas são plotadas sem agregação"""
+        data = _readings(10)
+        self.assertIs(self.reporter._aggregate_for_display(data, ['consumption']), data)
+    
+    def test_large_dataset_keeps_scale(self):
+        """Acima do limite o valor por intervalo é a mesma média do lineplot"""
+        small = _readings(10)
+        large = _readings(40)
+        small_level = small.groupby('timestamp')['consumption'].mean().mean()
+        
+        aggregated = self.reporter._aggregate_for_display(large, ['consumption', 'cost'])
+        
+        self.assertEqual(len(aggregated), 40)
+        np.testing.assert_allclose(aggregated['consumption'], small_level)
+        np.testing.assert_allclose(aggregated['cost'], small_level / 2)
+    
+    def test_daily_resolution(self):
+        """Períodos longos são agregados por dia"""
+        aggregated = self.reporter._aggregate_for_display(_readings(24 * 5), ['consumption'])
+        self.assertEqual(len(aggregated), 5)
+        np.testing.assert_allclose(aggregated['consumption'], 150.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do catálogo de relatórios
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2024
+"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from services.reporting import ReportCatalog
+
+class TestReportCatalog(unittest.TestCase):
+    """Testes de ReportCatalog"""
+    
+    def setUp(self):
+        """Diretório de relatórios temporário"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.reports_dir = Path(self.tmp.name)
+        self.db_file = self.reports_dir / '.catalog.sqlite3'
+    
+    def tearDown(self):
+        """Remove diretório temporário"""
+        self.tmp.cleanup()
+    
+    def _pdf(self, name: str) -> Path:
+        """Cria PDF vazio no diretório de relatórios"""
+        path = self.reports_dir / name
+        path.write_bytes(b'%PDF-1.4')
+        return path
+    
+    def _bump_directory(self):
+        """Garante mudança do mtime do diretório (resolução do sistema de arquivos)"""
+        stat = self.reports_dir.stat()
+        os.utime(self.reports_dir, (stat.st_atime, stat.st_mtime + 10))
+    
+    def _names(self, catalog: ReportCatalog) -> set:
+        """Nomes listados pelo catálogo"""
+        return {report['name'] for report in catalog.list()}
+    
+    def test_imports_existing_pdfs(self):
+        """PDFs anteriores ao catálogo são importados na abertura"""
+        self._pdf('consumo_20240101_20240131.pdf')
+        catalog = ReportCatalog(self.db_file, self.reports_dir)
+        self.assertEqual(self._names(catalog), {'consumo_20240101_20240131.pdf'})
+    
+    def test_imports_pdfs_added_later(self):
+        """PDFs copiados depois da abertura aparecem na listagem"""
+        self._pdf('consumo_20240101_20240131.pdf')
+        catalog = ReportCatalog(self.db_file, self.reports_dir)
+        catalog.list()
+        
+        self._pdf('economia_20240201_20240229.pdf')
+        self._bump_directory()
+        self.assertEqual(
+            self._names(catalog),
+            {'consumo_20240101_20240131.pdf', 'economia_20240201_20240229.pdf'}
+        )
+        
+        # Catálogo reaberto também reconcilia com o diretório
+        self._pdf('renovaveis_20240301_20240331.pdf')
+        reopened = ReportCatalog(self.db_file, self.reports_dir)
+        self.assertEqual(reopened.count(), 3)
+    
+    def test_prunes_deleted_files(self):
+        """Arquivos apagados deixam de ser listados"""
+        first = self._pdf('consumo_20240101_20240131.pdf')
+        self._pdf('economia_20240201_20240229.pdf')
+        catalog = ReportCatalog(self.db_file, self.reports_dir)
+        
+        first.unlink()
+        self.assertEqual(self._names(catalog), {'economia_20240201_20240229.pdf'})
+        self.assertEqual(catalog.count(), 1)
+    
+    def test_get_uses_data_version(self):
+        """Relatório é reaproveitado só com a mesma versão dos dados"""
+        catalog = ReportCatalog(self.db_file, self.reports_dir)
+        path = self._pdf('consumo_20240101_20240131.pdf')
+        key = ReportCatalog.make_key('consumo', '20240101', '20240131')
+        catalog.put(key, 'v1', str(path))
+        
+        self.assertEqual(catalog.get(key, 'v1'), str(path))
+        self.assertIsNone(catalog.get(key, 'v2'))
+
+if __name__ == '__main__':
+    unittest.main()
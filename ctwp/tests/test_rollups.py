@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes dos rollups de consumo
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2024
+"""
+
+import sqlite3
+import tempfile
+import unittest
+from contextlib import closing
+from datetime import datetime, timedelta
+from pathlib import Path
+import pandas as pd
+from local_store import LocalStore
+from rollups import finish_rollup, is_aligned, rollup_frame, select_rollup
+
+class TestRollupSelection(unittest.TestCase):
+    """Testes da escolha e reagregação de rollups"""
+    
+    def test_is_aligned(self):
+        """Início de hora, dia e mês"""
+        self.assertTrue(is_aligned(datetime(2024, 3, 1), 'MS'))
+        self.assertFalse(is_aligned(datetime(2024, 3, 2), 'MS'))
+        self.assertTrue(is_aligned(datetime(2024, 3, 2), 'D'))
+        self.assertFalse(is_aligned(datetime(2024, 3, 2, 5), 'D'))
+        self.assertFalse(is_aligned(datetime(2024, 3, 2, 5, 30), 'h'))
+    
+    def test_select_coarsest_rollup(self):
+        """Usa o rollup mais grosso que respeita resolução e limites"""
+        self.assertEqual(
+            select_rollup(datetime(2024, 1, 1), datetime(2024, 3, 1), 'MS'),
+            'mv_consumo_mensal'
+        )
+        self.assertEqual(
+            select_rollup(datetime(2024, 1, 1), datetime(2024, 3, 1), 'D'),
+            'mv_consumo_diario'
+        )
+        self.assertEqual(
+            select_rollup(datetime(2024, 1, 15), datetime(2024, 3, 1), 'MS'),
+            'mv_consumo_diario'
+        )
+        self.assertEqual(
+            select_rollup(datetime(2024, 1, 1, 6), datetime(2024, 1, 2), 'MS'),
+            'mv_consumo_horario'
+        )
+    
+    def test_future_end_is_accepted(self):
+        """Fim no futuro não impede o rollup mensal"""
+        start = datetime(2024, 1, 1)
+        end = datetime.now() + timedelta(minutes=7)
+        self.assertEqual(select_rollup(start, end, 'MS'), 'mv_consumo_mensal')
+    
+    def test_finish_rollup_reaggregates_finer_table(self):
+        """Rollup diário lido para frequência mensal é reagregado"""
+        daily = pd.DataFrame({
+            'timestamp': ['2024-01-01 00:00:00', '2024-01-02 00:00:00', '2024-02-01 00:00:00'],
+            'source': ['Rede'] * 3,
+            'value': [1.0, 2.0, 4.0],
+            'cost': [0.5, 1.0, 2.0],
+            'readings': [1, 2, 4]
+        })
+        monthly = finish_rollup(daily, 'mv_consumo_diario', 'MS')
+        self.assertEqual(monthly['value'].tolist(), [3.0, 4.0])
+        self.assertEqual(monthly['readings'].tolist(), [3, 4])
+
+class TestLocalRollups(unittest.TestCase):
+    """Testes dos gatilhos que mantêm os rollups da base local"""
+    
+    def setUp(self):
+        """Base local temporária"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = LocalStore(Path(self.tmp.name) / 'local.sqlite3')
+        for hour, value in enumerate([10.0, 20.0, 30.0]):
+            self.store.save_consumption({
+                'timestamp': datetime(2024, 1, 1, hour),
+                'consumption': value,
+                'cost': value / 2,
+                'source': 'Rede'
+            })
+    
+    def tearDown(self):
+        """Remove base temporária"""
+        self.tmp.cleanup()
+    
+    def _execute(self, statement: str, params=()):
+        """Executa DML direto na base local"""
+        with closing(sqlite3.connect(str(self.store.db_file))) as conn, conn:
+            conn.execute(statement, params)
+    
+    def _assert_matches_history(self):
+        """Rollups iguais à agregação das leituras em todas as frequências"""
+        start, end = datetime(2023, 12, 1), datetime(2024, 3, 1)
+        raw = self.store.get_consumption_range(start, end)
+        for freq in ['h', 'D', 'MS']:
+            expected = rollup_frame(raw, freq).reset_index(drop=True)
+            actual = self.store.get_consumption_rollup(start, end, freq).reset_index(drop=True)
+            self.assertEqual(actual['timestamp'].tolist(), expected['timestamp'].tolist(), freq)
+            self.assertEqual(actual['value'].tolist(), expected['value'].tolist(), freq)
+            self.assertEqual(actual['cost'].tolist(), expected['cost'].tolist(), freq)
+            self.assertEqual(actual['readings'].tolist(), expected['readings'].tolist(), freq)
+    
+    def test_insert(self):
+        """Leituras inseridas entram nos rollups"""
+        self._assert_matches_history()
+    
+    def test_update_value(self):
+        """Correção de valor troca o valor antigo pelo novo"""
+        self._execute("UPDATE consumption_history SET consumption = 15, cost = 7 WHERE consumption = 10")
+        self._assert_matches_history()
+    
+    def test_update_moves_bucket(self):
+        """Alteração de horário e fonte move a leitura de intervalo"""
+        self._execute(
+            "UPDATE consumption_history SET timestamp = ?, source = 'Solar' WHERE consumption = 20",
+            ('2024-02-03 04:00:00',)
+        )
+        self._assert_matches_history()
+    
+    def test_delete_and_mark_synced(self):
+        """Exclusão retira a leitura; marcar sincronizado não altera rollups"""
+        self._execute("DELETE FROM consumption_history WHERE consumption = 30")
+        self.store.mark_synced(self.store.get_pending_consumption()['id'])
+        self._assert_matches_history()
+
+if __name__ == '__main__':
+    unittest.main()
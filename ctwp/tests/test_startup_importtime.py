@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes dos módulos carregados na inicialização
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2024
+"""
+
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / 'src'
+
+# Módulos importados por main() depois de exibir a janela
+CORE_MODULES = [
+    'database',
+    'services.monitoring',
+    'services.optimization',
+    'services.reporting',
+    'services.exporting'
+]
+UI_MODULES = ['ui.main_window']
+
+# Importados por main() só depois que a janela é exibida
+DEFERRED_MODULES = ['database', 'services', 'ui', 'pandas', 'matplotlib', 'oracledb']
+
+# Bibliotecas que só devem ser importadas no primeiro uso
+LAZY_MODULES = ['sklearn', 'seaborn', 'fpdf']
+
+def imported_modules(modules):
+    """Importa os módulos em um processo novo; retorna os pacotes de nível superior em sys.modules"""
+    code = (
+        f"import json, sys\n"
+        f"import {', '.join(modules)}\n"
+        f"print(json.dumps(sorted({{name.split('.')[0] for name in sys.modules}})))"
+    )
+    # main.py cria diretórios e log no diretório atual
+    with tempfile.TemporaryDirectory() as cwd:
+        result = subprocess.run(
+            [sys.executable, '-c', code],
+            cwd=cwd,
+            env={**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [str(SRC_DIR), os.getenv('PYTHONPATH')]))},
+            capture_output=True,
+            text=True,
+            check=True
+        )
+    return set(json.loads(result.stdout.splitlines()[-1]))
+
+class TestStartupImports(unittest.TestCase):
+    """Testes das importações adiadas"""
+    
+    def _check_lazy(self, modules):
+        """Bibliotecas pesadas ausentes de sys.modules"""
+        imported = imported_modules(modules)
+        for lazy in LAZY_MODULES:
+            self.assertNotIn(lazy, imported, f"{lazy} importado na inicialização")
+    
+    def test_main_defers_imports(self):
+        """Importar main.py não carrega banco, serviços nem interface"""
+        imported = imported_modules(['main'])
+        for deferred in DEFERRED_MODULES + LAZY_MODULES:
+            self.assertNotIn(deferred, imported, f"{deferred} importado antes da janela")
+    
+    def test_core_modules(self):
+        """Banco e serviços não carregam scikit-learn, seaborn nem fpdf"""
+        self._check_lazy(CORE_MODULES)
+    
+    @unittest.skipUnless(importlib.util.find_spec('ttkbootstrap'), "ttkbootstrap não instalado")
+    def test_ui_modules(self):
+        """Interface não carrega scikit-learn, seaborn nem fpdf"""
+        self._check_lazy(CORE_MODULES + UI_MODULES)
+
+if __name__ == '__main__':
+    unittest.main()
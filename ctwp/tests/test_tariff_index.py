@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do índice de vigências tarifárias
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2024
+"""
+
+import unittest
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from tariff_index import KEY_COLUMNS, TariffIndex
+
+KEY = ('ENEL', 'TE', 'B1', 'Convencional')
+
+def vigencias(rows, key=KEY):
+    """Vigências (início, fim, valor) de uma chave"""
+    return pd.DataFrame(
+        [key + (pd.Timestamp(inicio), pd.Timestamp(fim), valor) for inicio, fim, valor in rows],
+        columns=KEY_COLUMNS + ['inicio', 'fim', 'valor']
+    )
+
+def signatures(groups):
+    """Assinaturas no formato de get_tariff_signatures"""
+    return pd.DataFrame(
+        [key + (total, signature) for key, (total, signature) in groups.items()],
+        columns=KEY_COLUMNS + ['total', 'assinatura']
+    )
+
+class FakeDatabase:
+    """Banco com vigências em memória; None simula consulta com erro"""
+    
+    def __init__(self, data, groups, load_mark=datetime(2024, 1, 1)):
+        self.data = data
+        self.groups = groups
+        self.load_mark = load_mark
+        self.fail_signatures = False
+        self.fail_vigencias = False
+        self.requested_keys = []
+    
+    def get_tariff_load_mark(self):
+        return self.load_mark
+    
+    def get_tariff_signatures(self):
+        return None if self.fail_signatures else signatures(self.groups)
+    
+    def get_tariff_vigencias(self, keys=None):
+        if self.fail_vigencias:
+            return None
+        self.requested_keys.append(keys)
+        if keys is None:
+            return self.data
+        selected = self.data[KEY_COLUMNS].apply(tuple, axis=1).isin(keys)
+        return self.data[selected]
+
+class TestLookup(unittest.TestCase):
+    """Testes de lookup e price"""
+    
+    def setUp(self):
+        """Índice com duas vigências consecutivas"""
+        self.index = TariffIndex(vigencias([
+            ('2024-01-01', '2024-06-30', 100.0),
+            ('2024-07-01', '2024-12-31', 200.0)
+        ]))
+    
+    def test_interval_bounds(self):
+        """Fim de vigência é inclusivo (dia inteiro) e fora dos intervalos é NaN"""
+        readings = pd.DataFrame({'timestamp': pd.to_datetime([
+            '2023-12-31 23:00', '2024-01-01 00:00', '2024-06-30 23:59',
+            '2024-07-01 00:00', '2025-01-01 00:00'
+        ])})
+        tariffs = self.index.lookup(readings, **dict(zip(KEY_COLUMNS, KEY)))
+        np.testing.assert_array_equal(tariffs, [np.nan, 100.0, 100.0, 200.0, np.nan])
+    
+    def test_keys_from_columns(self):
+        """Chaves podem vir como colunas; chave desconhecida resulta em NaN"""
+        readings = pd.DataFrame({
+            'timestamp': pd.to_datetime(['2024-03-01', '2024-03-01']),
+            'distribuidora': ['ENEL', 'CPFL']
+        })
+        tariffs = self.index.lookup(readings, componente='TE', subgrupo='B1', modalidade='Convencional')
+        np.testing.assert_array_equal(tariffs, [100.0, np.nan])
+    
+    def test_missing_keys(self):
+        """Chave ausente em colunas e argumentos é erro"""
+        with self.assertRaises(ValueError):
+            self.index.lookup(pd.DataFrame({'timestamp': []}), componente='TE')
+    
+    def test_price(self):
+        """Custo é quantidade x tarifa do instante"""
+        readings = pd.DataFrame({
+            'timestamp': pd.to_datetime(['2024-02-01', '2024-08-01']),
+            'consumption': [2.0, 3.0]
+        })
+        cost = self.index.price(readings, **dict(zip(KEY_COLUMNS, KEY)))
+        self.assertEqual(cost.tolist(), [200.0, 600.0])
+
+class TestRefresh(unittest.TestCase):
+    """Testes da atualização incremental"""
+    
+    def setUp(self):
+        """Banco com duas chaves carregadas no índice"""
+        other = ('ENEL', 'TUSD', 'B1', 'Convencional')
+        self.data = pd.concat([
+            vigencias([('2024-01-01', '2024-12-31', 100.0)]),
+            vigencias([('2024-01-01', '2024-12-31', 50.0)], key=other)
+        ], ignore_index=True)
+        self.db = FakeDatabase(self.data, {KEY: (1, 111), other: (1, 222)})
+        self.index = TariffIndex()
+        self.assertTrue(self.index.load(self.db))
+        self.assertEqual(len(self.index), 2)
+    
+    def test_same_load_mark_skips(self):
+        """Sem nova carga do ETL nada é consultado"""
+        self.db.fail_signatures = True
+        self.assertEqual(self.index.refresh(self.db), 0)
+    
+    def test_reloads_only_changed_group(self):
+        """Grupo com assinatura diferente é recarregado sozinho"""
+        self.db.load_mark = datetime(2024, 2, 1)
+        self.db.data = pd.concat([
+            self.data,
+            vigencias([('2025-01-01', '2025-12-31', 120.0)])
+        ], ignore_index=True)
+        self.db.groups = {**self.db.groups, KEY: (2, 333)}
+        
+        self.assertEqual(self.index.refresh(self.db), 1)
+        self.assertEqual(self.db.requested_keys[-1], [KEY])
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.load_mark, datetime(2024, 2, 1))
+    
+    def test_failed_signatures_keep_state(self):
+        """Erro nas assinaturas não é tratado como ausência de vigências"""
+        self.db.load_mark = datetime(2024, 2, 1)
+        self.db.fail_signatures = True
+        
+        self.assertEqual(self.index.refresh(self.db), 0)
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(self.index.load_mark, datetime(2024, 1, 1))
+    
+    def test_failed_vigencias_keep_state(self):
+        """Erro nas vigências mantém assinaturas e marca d'água para nova tentativa"""
+        self.db.load_mark = datetime(2024, 2, 1)
+        self.db.groups = {**self.db.groups, KEY: (2, 333)}
+        self.db.fail_vigencias = True
+        
+        self.assertEqual(self.index.refresh(self.db), 0)
+        self.assertEqual(self.index.signatures[KEY], (1, 111))
+        self.assertEqual(self.index.load_mark, datetime(2024, 1, 1))
+        
+        self.db.fail_vigencias = False
+        self.assertEqual(self.index.refresh(self.db), 1)
+    
+    def test_failed_load_keeps_empty_index(self):
+        """load com erro não grava assinaturas"""
+        index = TariffIndex()
+        self.db.fail_vigencias = True
+        self.assertFalse(index.load(self.db))
+        self.assertEqual(index.signatures, {})
+        self.assertIsNone(index.load_mark)
+
+if __name__ == '__main__':
+    unittest.main()
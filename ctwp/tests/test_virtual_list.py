@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do buffer da lista virtualizada
+Autor: Gabriel Mule (RM560586)
+Data: 25/11/2024
+"""
+
+import sys
+import types
+import unittest
+from unittest import mock
+import pandas as pd
+
+class FakeTreeview:
+    """Treeview em memória que conta as escritas de itens"""
+    
+    def __init__(self, master, columns, show):
+        self.values = {}
+        self.order = []
+        self.writes = 0
+        self.next_id = 0
+    
+    def heading(self, column, text):
+        pass
+    
+    def bind(self, sequence, callback):
+        pass
+    
+    def insert(self, parent, index, values):
+        self.next_id += 1
+        item = f'I{self.next_id}'
+        self.values[item] = values
+        self.order.append(item)
+        return item
+    
+    def item(self, item, values):
+        self.values[item] = values
+        self.writes += 1
+    
+    def delete(self, item):
+        del self.values[item]
+        self.order.remove(item)
+    
+    def rows(self):
+        """Valores exibidos, em ordem"""
+        return [self.values[item] for item in self.order]
+
+class FakeScrollbar:
+    """Barra de rolagem que guarda a última posição"""
+    
+    def __init__(self, master, orient, command):
+        self.position = None
+    
+    def set(self, first, last):
+        self.position = (first, last)
+
+class FakeStyle:
+    """Estilo sem altura de linha definida"""
+    
+    def lookup(self, style, option):
+        return ''
+
+fake_ttk = types.SimpleNamespace(Treeview=FakeTreeview, Scrollbar=FakeScrollbar, Style=FakeStyle)
+
+# A lista só usa Treeview, Scrollbar e Style; dispensa display e ttkbootstrap
+with mock.patch.dict(sys.modules, {'ttkbootstrap': fake_ttk}):
+    from ui import virtual_list
+    from ui.virtual_list import VirtualTreeview
+
+def readings(count):
+    """Leituras numeradas"""
+    return pd.DataFrame({'source': 'Rede', 'value': [float(i) for i in range(count)]})
+
+class TestVirtualTreeview(unittest.TestCase):
+    """Testes da materialização das linhas visíveis"""
+    
+    def setUp(self):
+        """Lista com 5 linhas visíveis"""
+        patcher = mock.patch.object(virtual_list, 'ttk', fake_ttk)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        self.list = VirtualTreeview(
+            None,
+            columns=['fonte', 'consumo', 'custo'],
+            headings=['Fonte', 'Consumo', 'Custo'],
+            formatters={'consumo': lambda value: f"{value:.1f}"},
+            fields={'fonte': 'source', 'consumo': 'value', 'custo': 'cost'}
+        )
+        self.list._on_configure(types.SimpleNamespace(height=6 * self.list.row_height))
+        self.tree = self.list.tree
+    
+    def test_only_visible_rows(self):
+        """Só as linhas visíveis viram itens; coluna ausente usa o padrão"""
+        self.list.set_data(readings(10_000), defaults={'custo': 'N/A'})
+        self.assertEqual(len(self.tree.order), 5)
+        self.assertEqual(self.tree.rows()[0], ('Rede', '0.0', 'N/A'))
+        self.assertEqual(self.list.scrollbar.position, (0.0, 5 / 10_000))
+    
+    def test_scroll_reuses_items(self):
+        """Rolar reescreve os mesmos itens e respeita o fim do buffer"""
+        self.list.set_data(readings(100))
+        items = list(self.tree.order)
+        
+        self.list.yview('scroll', 1, 'pages')
+        self.assertEqual(self.tree.order, items)
+        self.assertEqual(self.tree.rows()[0][1], '5.0')
+        
+        self.list.yview('moveto', '1.0')
+        self.assertEqual(self.list.offset, 95)
+        self.assertEqual(self.tree.rows()[-1][1], '99.0')
+        
+        self.list.yview('scroll', -200, 'units')
+        self.assertEqual(self.list.offset, 0)
+    
+    def test_unchanged_rows_are_not_rewritten(self):
+        """Atualização com os mesmos dados não escreve no Treeview"""
+        self.list.set_data(readings(100))
+        writes = self.tree.writes
+        self.list.set_data(readings(100))
+        self.assertEqual(self.tree.writes, writes)
+        
+        changed = readings(100)
+        changed.loc[2, 'value'] = -1.0
+        self.list.set_data(changed)
+        self.assertEqual(self.tree.writes, writes + 1)
+    
+    def test_shrinking_data(self):
+        """Menos dados que linhas visíveis remove itens e limita o deslocamento"""
+        self.list.set_data(readings(100))
+        self.list.yview('moveto', '0.5')
+        self.list.set_data(readings(3))
+        self.assertEqual(self.list.offset, 0)
+        self.assertEqual(len(self.tree.order), 3)
+        
+        self.list.set_data(None)
+        self.assertEqual(self.tree.order, [])
+        self.assertEqual(self.list.scrollbar.position, (0.0, 1.0))
+
+if __name__ == '__main__':
+    unittest.main()